@@ -1,42 +1,91 @@
-from fastapi import APIRouter, Depends, Query
+import logging
+import time
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import StreamingResponse
 from typing import List
 import httpx
 from sqlalchemy import Engine
-from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from agents import Tool
-from ...models import ConversationRequest, ConversationResponse
+from ...models import ConversationRequest, ConversationResponse, ToolProgress
 from ...services import ConversationService
-from ...dependencies import get_sync_db, get_db, get_hass_client, get_tools, get_agent_session_engine
+from ...dependencies import get_sync_db, get_db, get_hass_client, get_tools, get_session_store, get_admission, get_connection_pool, get_router
+from ...llm import AdmissionController, ConnectionPool, ModelRouter
+from ...memory import SessionStore
+from ...runtime import Deadline
+from ...runtime.deadline import DEADLINE_HEADER
+from ...settings import get_settings
+from .streaming import Segment, coalesce, sse_event
 
+_LOGGER = logging.getLogger('uvicorn.error')
 
 router = APIRouter()
 
 @router.post("/conversation")
 async def process_conversation(
+    request: Request,
     conversation_request: ConversationRequest,
     stream: bool = Query(False),
     hass_client: httpx.AsyncClient = Depends(get_hass_client),
     tools: List[Tool] = Depends(get_tools),
     db: AsyncSession = Depends(get_db),
     db_engine: Engine = Depends(get_sync_db),
-    session_engine: AsyncEngine = Depends(get_agent_session_engine),
+    session_store: SessionStore = Depends(get_session_store),
+    admission: AdmissionController = Depends(get_admission),
+    connection_pool: ConnectionPool = Depends(get_connection_pool),
+    model_router: ModelRouter = Depends(get_router),
 ):
-    """Process a conversation with the agent. If stream=true, respond via SSE."""
+    """Process a conversation with the agent. If stream=true, respond via SSE.
+
+    The SSE events are:
+    - `sentence`: text ending with a complete sentence, ready for text-to-speech
+    - `delta`: text flushed before its sentence was over
+    - `tool`: a tool call the agent started
+    - `done`: the end of the response, with the time it took to the first sentence
+    """
+    deadline = Deadline.from_header(
+        request.headers.get(DEADLINE_HEADER),
+        default=get_settings().default_request_timeout,
+    )
 
     if stream:
+        settings = get_settings()
+
         async def event_generator():
-            async for chunk in ConversationService.process_conversation(
+            started_at = time.perf_counter()
+            first_sentence: float | None = None
+            chunks = ConversationService.process_conversation(
                 conversation_request=conversation_request,
                 hass_client=hass_client,
                 tools=tools,
                 db=db,
                 db_engine=db_engine,
-                session_engine=session_engine,
-            ):
-                yield chunk
+                session_store=session_store,
+                admission=admission,
+                connection_pool=connection_pool,
+                model_router=model_router,
+                is_disconnected=request.is_disconnected,
+                deadline=deadline,
+            )
+            # Close the conversation stream, and thus cancel the run, as soon as the response stops
+            async with aclosing(coalesce(
+                chunks,
+                max_bytes=settings.stream_max_bytes,
+                max_delay=settings.stream_max_delay,
+                sentences=settings.stream_sentence_flush,
+            )) as items:
+                async for item in items:
+                    if isinstance(item, ToolProgress):
+                        yield sse_event("tool", item.model_dump())
+                    elif isinstance(item, Segment):
+                        if item.complete and first_sentence is None:
+                            first_sentence = time.perf_counter() - started_at
+                        yield sse_event("sentence" if item.complete else "delta", {"text": item.text})
+            if first_sentence is not None:
+                _LOGGER.debug(f"First sentence streamed after {first_sentence:.3f}s")
+            yield sse_event("done", {"time_to_first_sentence": first_sentence})
 
         return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -48,8 +97,14 @@ async def process_conversation(
         tools=tools,
         db=db,
         db_engine=db_engine,
-        session_engine=session_engine,
+        session_store=session_store,
+        admission=admission,
+        connection_pool=connection_pool,
+        model_router=model_router,
+        is_disconnected=request.is_disconnected,
+        deadline=deadline,
     ):
-        final_text += chunk
+        if isinstance(chunk, str):
+            final_text += chunk
 
     return ConversationResponse(response=final_text)
\ No newline at end of file
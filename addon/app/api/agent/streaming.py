@@ -0,0 +1,110 @@
+import asyncio
+import json
+import re
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any, NamedTuple
+
+# End of a sentence (or clause) followed by whitespace, or a line break
+_SENTENCE_END = re.compile(r"[.!?;:](?:\s+)|\n+")
+
+_END = object()
+
+
+class Segment(NamedTuple):
+    text: str
+    complete: bool  # Whether the text ends with a complete sentence
+
+
+def sse_event(event: str, data: dict[str, Any]) -> str:
+    """Frame an event as Server-Sent Events, the data being a JSON object on a single line."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _ends_sentence(text: str) -> bool:
+    return text.rstrip()[-1:] in (".", "!", "?", ";", ":")
+
+
+def _sentence_split(text: str) -> int:
+    """Index up to which `text` holds complete sentences, 0 if none."""
+    end = 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.end()
+    return end
+
+
+async def coalesce(
+    chunks: AsyncIterator[str | Any],
+    max_bytes: int = 256,
+    max_delay: float | None = 0.1,
+    sentences: bool = True,
+) -> AsyncIterator[Segment | Any]:
+    """Merge small text chunks (e.g. token deltas) into larger segments.
+
+    Buffered text is flushed once it reaches `max_bytes`, once it has waited
+    `max_delay` seconds, and, if `sentences` is set, as soon as it ends a sentence so
+    that text-to-speech can start on it right away. Items other than text flush the
+    buffer and are passed through as is.
+
+    `chunks` is consumed by a task of its own, which is cancelled (and `chunks`
+    closed) when the returned generator is closed.
+    """
+    queue: asyncio.Queue[Any] = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async with aclosing(chunks):  # type: ignore[type-var]
+                async for chunk in chunks:
+                    queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(_END)
+
+    producer = asyncio.create_task(produce())
+    loop = asyncio.get_running_loop()
+    buffer = ""
+    started_at = 0.0  # When the buffered text started waiting
+    try:
+        while True:
+            timeout = None
+            if buffer and max_delay is not None:
+                timeout = max(started_at + max_delay - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except TimeoutError:
+                yield Segment(buffer, complete=_ends_sentence(buffer))
+                buffer = ""
+                continue
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            if not isinstance(item, str):
+                if buffer:
+                    yield Segment(buffer, complete=_ends_sentence(buffer))
+                    buffer = ""
+                yield item
+                continue
+            if not item:
+                continue
+
+            if not buffer:
+                started_at = loop.time()
+            buffer += item
+            split = _sentence_split(buffer) if sentences else 0
+            complete = split > 0
+            if len(buffer.encode()) >= max_bytes:
+                split, complete = len(buffer), split == len(buffer)
+            if split:
+                yield Segment(buffer[:split], complete=complete)
+                buffer = buffer[split:]
+                started_at = loop.time()
+        if buffer:
+            # The response is over, so is its last sentence
+            yield Segment(buffer, complete=True)
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
@@ -1,16 +1,31 @@
 import httpx
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-
-from ...dependencies import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from ...dependencies import (
+    get_admission,
+    get_connection_pool,
+    get_db,
+    get_router,
+    get_session_store,
+    get_sessionmaker,
+)
+from ...llm import AdmissionController, ConnectionPool, ModelRouter
+from ...memory import SessionStore
 from ...models import (
     Connection,
     ConnectionCreate,
     ConnectionUpdate,
+    ConnectionPoolUpdate,
+    ConnectionStatus,
     ConversationList,
     Span,
     ConversationNeighbors,
     ConversationTracesResponse,
+    SessionStats,
+    AdmissionStats,
+    RouteStats,
 )
 from ...services import (
     ConversationService,
@@ -18,6 +33,7 @@ from ...services import (
     TraceService,
     ToolService,
 )
+from ...static import accepted_encodings, gzip_stream
 
 router = APIRouter()
 
@@ -36,6 +52,30 @@ async def get_conversations(
     return await ConversationService.get_conversations(db)
 
 
+@router.get("/sessions/stats", response_model=SessionStats)
+async def get_session_stats(
+    session_store: SessionStore = Depends(get_session_store),
+) -> SessionStats:
+    """Get the number and size of the resident agent sessions."""
+    return SessionStats(**session_store.stats())
+
+
+@router.get("/admission/stats", response_model=list[AdmissionStats])
+async def get_admission_stats(
+    admission: AdmissionController = Depends(get_admission),
+) -> list[AdmissionStats]:
+    """Get the queue of model calls of each connection."""
+    return [AdmissionStats(**stats) for stats in admission.stats()]
+
+
+@router.get("/router/stats", response_model=list[RouteStats])
+async def get_router_stats(
+    model_router: ModelRouter = Depends(get_router),
+) -> list[RouteStats]:
+    """Get the requests and latency of each model tier."""
+    return [RouteStats(**stats) for stats in model_router.stats()]
+
+
 @router.get("/traces/{trace_id}/spans", response_model=list[Span])
 async def get_spans(
     trace_id: str,
@@ -50,11 +90,21 @@ async def get_spans(
 
 @router.get("/conversations/{group_id}/traces", response_model=ConversationTracesResponse)
 async def get_traces_by_group(
-    group_id: str, db: AsyncSession = Depends(get_db)
-) -> ConversationTracesResponse:
-    """Get all traces and their spans for a given conversation group."""
-    traces = await TraceService.get_traces_with_spans_by_group_id(db, group_id)
-    return ConversationTracesResponse(group_id=group_id, traces=traces)
+    group_id: str,
+    request: Request,
+    sessionmaker: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+) -> StreamingResponse:
+    """Get all traces and their spans for a given conversation group.
+
+    Long conversations weigh megabytes, so the JSON is streamed straight from the
+    database (gzipped for clients accepting it) instead of going through the models.
+    """
+    body = TraceService.stream_traces_json(sessionmaker, group_id)
+    headers = {"vary": "accept-encoding"}
+    if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+        body = gzip_stream(body)
+        headers["content-encoding"] = "gzip"
+    return StreamingResponse(body, media_type="application/json", headers=headers)
 
 
 @router.get("/conversations/{group_id}/neighbors", response_model=ConversationNeighbors)
@@ -71,6 +121,15 @@ async def get_connections(db: AsyncSession = Depends(get_db)) -> list[Connection
     return await ConnectionService.get_connections(db, mask_key=True)
 
 
+@router.get("/connections/pool", response_model=list[ConnectionStatus])
+async def get_pool_status(
+    db: AsyncSession = Depends(get_db),
+    pool: ConnectionPool = Depends(get_connection_pool),
+) -> list[ConnectionStatus]:
+    """Get the routing state (load, health, circuit) of the connections requests are routed to."""
+    return await ConnectionService.get_pool_status(db, pool)
+
+
 @router.post("/connections", response_model=Connection)
 async def create_connection(
     connection_create: ConnectionCreate, db: AsyncSession = Depends(get_db)
@@ -105,6 +164,18 @@ async def set_active_connection(
     return await ConnectionService.set_active_connection(db, connection_id)
 
 
+@router.put("/connections/{connection_id}/pool", response_model=Connection)
+async def set_pool_member(
+    connection_id: int,
+    pool_update: ConnectionPoolUpdate,
+    db: AsyncSession = Depends(get_db),
+) -> Connection:
+    """Add a connection to, or remove it from, the pool, optionally setting its tier."""
+    return await ConnectionService.set_pool_member(
+        db, connection_id, pool_update.in_pool, pool_update.tier
+    )
+
+
 @router.get("/models")
 async def get_models(db: AsyncSession = Depends(get_db)):
     """Get all models from the active connection."""
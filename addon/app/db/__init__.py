@@ -1,7 +1,8 @@
-from .models import Span, Trace, Connection
+from .models import Span, Trace, Connection, ConnectionPoolMember
 
 __all__ = [
     "Span",
     "Trace",
     "Connection",
+    "ConnectionPoolMember",
 ]
\ No newline at end of file
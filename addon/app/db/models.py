@@ -18,6 +18,28 @@ class Connection(Base):
     backend: Mapped[str] = mapped_column(String)
     model: Mapped[str | None] = mapped_column(String, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
+    # Membership lives in its own table so existing databases pick it up through create_all
+    pool_member: Mapped[ConnectionPoolMember | None] = relationship(
+        "ConnectionPoolMember", lazy="selectin", cascade="all, delete-orphan"
+    )
+
+    @property
+    def in_pool(self) -> bool:
+        return self.pool_member is not None
+
+    @property
+    def tier(self) -> str:
+        return self.pool_member.tier if self.pool_member is not None else "large"
+
+
+class ConnectionPoolMember(Base):
+    __tablename__ = "connection_pool_members"
+
+    connection_id: Mapped[int] = mapped_column(
+        ForeignKey("connections.id", ondelete="CASCADE"), primary_key=True
+    )
+    # "small" members serve simple requests, "large" ones everything else
+    tier: Mapped[str] = mapped_column(String, default="large")
 
 
 class Trace(Base):
@@ -1,5 +1,5 @@
 from fastapi import Request
-from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from collections.abc import AsyncGenerator
 from sqlalchemy import Engine
 from openai import AsyncOpenAI
@@ -7,6 +7,9 @@ import httpx
 from typing import List
 from agents import Tool
 
+from .llm import AdmissionController, ConnectionPool, ModelRouter
+from .memory import SessionStore
+
 
 async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get an async database session."""
@@ -15,6 +18,11 @@ async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
         yield session 
 
 
+def get_sessionmaker(request: Request) -> async_sessionmaker[AsyncSession]:
+    """Dependency to get the async session factory, for responses streamed after the handler returns."""
+    return request.state.db
+
+
 def get_sync_db(request: Request) -> Engine:
     """Dependency to get a sync database session."""
     return request.state.db_sync_engine
@@ -32,5 +40,17 @@ def get_tools(request: Request) -> List[Tool]:
     return request.state.tools
 
 
-def get_agent_session_engine(request: Request) -> AsyncEngine:
-    return request.state.agent_session_engine
\ No newline at end of file
+def get_session_store(request: Request) -> SessionStore:
+    return request.state.session_store
+
+
+def get_admission(request: Request) -> AdmissionController:
+    return request.state.admission
+
+
+def get_connection_pool(request: Request) -> ConnectionPool:
+    return request.state.connection_pool
+
+
+def get_router(request: Request) -> ModelRouter:
+    return request.state.router
@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .static import accepted_encodings
+
+_BASE_TAG = re.compile(r"<base[^>]*>")
+
+
+def base_href(ingress_path: str | None) -> str:
+    """Base URL of the frontend, behind Home Assistant's ingress or not."""
+    href = ingress_path or "/"
+    if not href.startswith("/"):
+        href = "/" + href
+    if not href.endswith("/"):
+        href = href + "/"
+    return href
+
+
+def render_html(html: str, href: str) -> str:
+    """Point the page's `<base>` at `href`, adding the tag if there's none."""
+    if "<base" in html:
+        return _BASE_TAG.sub(f"<base href=\"{href}\">", html, count=1)
+    return html.replace("<head>", f"<head><base href=\"{href}\">", 1)
+
+
+@dataclass(frozen=True)
+class _Page:
+    body: bytes
+    gzipped: bytes
+    etag: str
+
+
+class IngressMiddleware:
+    """Serves the frontend's pages with a `<base href>` matching the ingress path.
+
+    Home Assistant's ingress serves the add-on under `X-Ingress-Path`, which the
+    frontend's relative URLs have to be resolved against. Requests for a page (the
+    SPA routes and `.html` files) are answered directly with the page rendered for
+    that path, cached per path. Everything else, the API and its streams included,
+    goes straight to the app without its responses being touched.
+
+    Pages are revalidated by clients with their ETag, and gzipped for those accepting it.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        frontend_dir: Path,
+        passthrough: tuple[str, ...] = ("/api/", "/assets/", "/docs", "/redoc", "/openapi.json", "/metrics"),
+        max_cached: int = 16,
+    ):
+        self.app = app
+        self.frontend_dir = frontend_dir.resolve()
+        self.passthrough = passthrough
+        self.max_cached = max_cached
+        self._pages: OrderedDict[tuple[Path, str], _Page] = OrderedDict()
+
+    def _page(self, path: str) -> Path | None:
+        """The page served for `path`, if any, mirroring the app's SPA fallback."""
+        target = (self.frontend_dir / path.lstrip("/")).resolve()
+        if not target.is_relative_to(self.frontend_dir):
+            return None
+        if target.is_file():
+            return target if target.suffix == ".html" else None
+        return self.frontend_dir / "index.html"
+
+    def _render(self, page: Path, href: str) -> _Page:
+        key = (page, href)
+        rendered = self._pages.get(key)
+        if rendered is None:
+            body = render_html(page.read_text(encoding="utf-8", errors="ignore"), href).encode()
+            rendered = _Page(
+                body=body,
+                gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+                etag=f'"{hashlib.md5(body).hexdigest()}"',
+            )
+            self._pages[key] = rendered
+            if len(self._pages) > self.max_cached:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(key)
+        return rendered
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or scope["path"].startswith(self.passthrough)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        page = self._page(scope["path"])
+        if page is None or not page.is_file():
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        rendered = self._render(page, base_href(request_headers.get("x-ingress-path")))
+        body, etag = rendered.body, rendered.etag
+        headers = [
+            (b"content-type", b"text/html; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"vary", b"accept-encoding, x-ingress-path"),
+        ]
+        if "gzip" in accepted_encodings(request_headers.get("accept-encoding", "")):
+            body, etag = rendered.gzipped, rendered.etag[:-1] + '-gzip"'
+            headers.append((b"content-encoding", b"gzip"))
+        headers.append((b"etag", etag.encode()))
+
+        if_none_match = request_headers.get("if-none-match", "")
+        if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body if scope["method"] == "GET" else b""})
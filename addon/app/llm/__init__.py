@@ -0,0 +1,29 @@
+from .wrapper import ModelWrapper
+from .deadline import DeadlineModel
+from .admission import AdmissionController, AdmissionModel, AdmissionRejected, Priority
+from .pool import ConnectionPool, PoolModel, is_backend_failure
+from .router import ModelRouter, RouteDecision, record_route
+from .selection import ToolSelectionModel
+from .speculation import SpeculativeModel
+from .constraints import GUIDED_BACKENDS, ConstrainedToolCallModel
+from .timing import TokenTimingModel
+
+__all__ = [
+    "ModelWrapper",
+    "DeadlineModel",
+    "AdmissionController",
+    "AdmissionModel",
+    "AdmissionRejected",
+    "Priority",
+    "ConnectionPool",
+    "PoolModel",
+    "is_backend_failure",
+    "ModelRouter",
+    "RouteDecision",
+    "record_route",
+    "ToolSelectionModel",
+    "SpeculativeModel",
+    "GUIDED_BACKENDS",
+    "ConstrainedToolCallModel",
+    "TokenTimingModel",
+]
@@ -0,0 +1,257 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from agents import Model, ModelResponse
+from agents.items import TResponseStreamEvent
+from agents.tracing import SpanError, custom_span
+
+from ..runtime import Deadline, DeadlineExceeded
+from .timing import queue_time
+from .wrapper import ModelWrapper
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+
+class Priority(IntEnum):
+    """Priority of a model call, lower values are served first."""
+    INTERACTIVE = 0  # Someone is waiting for the answer, e.g. a voice satellite
+    BACKGROUND = 1  # Automations, summaries
+
+
+class AdmissionRejected(DeadlineExceeded):
+    """Raised when a model call can't get a slot before the request deadline."""
+
+    def __init__(self, message: str | None = None):
+        super().__init__("queue", message)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class _Backend:
+    """Admission state of a single connection."""
+    limit: int
+    active: int = 0
+    queue: list[_Waiter] = field(default_factory=list)
+    # Exponential moving average of the time a slot is held, used to predict waits
+    avg_hold: float | None = None
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+    max_depth: int = 0
+    total_queue_time: float = 0.0
+    max_queue_time: float = 0.0
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for waiter in self.queue if not waiter.future.done())
+
+
+class AdmissionController:
+    """Limits the number of concurrent model calls per connection.
+
+    Calls beyond `max_concurrency` wait in a priority queue (interactive before
+    background, then first come first served). A call is rejected right away when
+    its predicted wait exceeds what is left of its deadline, and gives up once the
+    deadline expires while queued.
+    """
+
+    # Weight of the latest observation in the hold time average
+    HOLD_SMOOTHING = 0.3
+
+    def __init__(self, max_concurrency: int = 1):
+        self.max_concurrency = max_concurrency
+        self._backends: dict[str, _Backend] = {}
+        self._seq = itertools.count()
+
+    def _backend(self, key: str) -> _Backend:
+        backend = self._backends.get(key)
+        if backend is None:
+            backend = self._backends[key] = _Backend(limit=self.max_concurrency)
+        return backend
+
+    def predict_wait(self, key: str, priority: Priority) -> float:
+        """Predicted queue time of a new call, 0 if it would be admitted right away."""
+        backend = self._backend(key)
+        ahead = sum(
+            1 for waiter in backend.queue
+            if not waiter.future.done() and waiter.priority <= priority
+        )
+        if backend.active < backend.limit and ahead == 0:
+            return 0.0
+        if backend.avg_hold is None:
+            return 0.0  # Nothing to base a prediction on yet
+        # Slots free up `limit` at a time
+        return math.ceil((ahead + 1) / backend.limit) * backend.avg_hold
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        key: str,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[float]:
+        """Hold a slot of connection `key`, yields the time spent queued."""
+        backend = self._backend(key)
+        queue_time = await self._wait_for_slot(key, backend, priority, deadline)
+        started = time.monotonic()
+        try:
+            yield queue_time
+        finally:
+            held = time.monotonic() - started
+            backend.avg_hold = (
+                held if backend.avg_hold is None
+                else self.HOLD_SMOOTHING * held + (1 - self.HOLD_SMOOTHING) * backend.avg_hold
+            )
+            self._release(backend)
+
+    async def _wait_for_slot(
+        self,
+        key: str,
+        backend: _Backend,
+        priority: Priority,
+        deadline: Deadline | None,
+    ) -> float:
+        if backend.active < backend.limit and backend.depth == 0:
+            backend.active += 1
+            backend.admitted += 1
+            return 0.0
+
+        remaining = deadline.remaining() if deadline is not None else None
+        if remaining is not None:
+            predicted = self.predict_wait(key, priority)
+            if predicted > remaining:
+                backend.rejected += 1
+                _record_admission(key, priority, 0.0, backend.depth, rejected=True)
+                raise AdmissionRejected(
+                    f"Predicted queue time of {predicted:.1f}s for {key} exceeds the remaining {remaining:.1f}s"
+                )
+
+        waiter = _Waiter(int(priority), next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(backend.queue, waiter)
+        backend.max_depth = max(backend.max_depth, backend.depth)
+
+        enqueued = time.monotonic()
+        try:
+            async with asyncio.timeout(remaining):
+                await waiter.future
+        except TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(backend)
+            backend.timed_out += 1
+            _record_admission(key, priority, time.monotonic() - enqueued, backend.depth, rejected=True)
+            raise AdmissionRejected(f"No slot freed up for {key} before the deadline") from None
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was handed over right as we were cancelled
+                self._release(backend)
+            else:
+                waiter.future.cancel()
+            raise
+
+        queue_time = time.monotonic() - enqueued
+        backend.admitted += 1
+        backend.total_queue_time += queue_time
+        backend.max_queue_time = max(backend.max_queue_time, queue_time)
+        _record_admission(key, priority, queue_time, backend.depth)
+        return queue_time
+
+    def _release(self, backend: _Backend) -> None:
+        # Hand the slot over to the next live waiter, if any
+        while backend.queue:
+            waiter = heapq.heappop(backend.queue)
+            if not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+        backend.active -= 1
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "connection": key,
+                "limit": backend.limit,
+                "active": backend.active,
+                "queue_depth": backend.depth,
+                "max_queue_depth": backend.max_depth,
+                "admitted": backend.admitted,
+                "rejected": backend.rejected,
+                "timed_out": backend.timed_out,
+                "avg_queue_time": backend.total_queue_time / backend.admitted if backend.admitted else 0.0,
+                "max_queue_time": backend.max_queue_time,
+            }
+            for key, backend in self._backends.items()
+        ]
+
+
+def _record_admission(
+    key: str,
+    priority: Priority,
+    queue_time: float,
+    depth: int,
+    rejected: bool = False,
+) -> None:
+    """Record a queued (or rejected) model call in the current trace."""
+    span = custom_span(
+        "admission",
+        data={
+            "connection": key,
+            "priority": priority.name.lower(),
+            "queue_time": round(queue_time, 4),
+            "queue_depth": depth,
+        },
+    )
+    span.start()
+    if rejected:
+        _LOGGER.warning(f"Model call to {key} rejected after {queue_time:.2f}s in queue")
+        span.set_error(SpanError(message="Admission rejected", data={"connection": key}))
+    span.finish()
+
+
+class AdmissionModel(ModelWrapper):
+    """Acquires a slot of the connection before every model call.
+
+    Streamed calls hold the slot until the stream is exhausted or closed.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        controller: AdmissionController,
+        key: str,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: Deadline | None = None,
+    ):
+        super().__init__(model)
+        self.controller = controller
+        self.key = key
+        self.priority = priority
+        self.deadline = deadline
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        async with self.controller.acquire(self.key, self.priority, self.deadline) as queued:
+            queue_time.set(queued)
+            return await self.model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        async with self.controller.acquire(self.key, self.priority, self.deadline) as queued:
+            queue_time.set(queued)
+            stream = self.model.stream_response(*args, **kwargs)
+            try:
+                async for event in stream:
+                    yield event
+            finally:
+                await stream.aclose()  # type: ignore[attr-defined]
@@ -0,0 +1,267 @@
+import json
+import logging
+from collections.abc import AsyncIterator, Iterable
+from contextlib import aclosing
+from typing import Any
+
+from agents import FunctionTool, Model, ModelResponse, ModelSettings, Tool
+from agents.items import TResponseOutputItem, TResponseStreamEvent
+from agents.tracing import SpanError, custom_span
+from jsonschema import Draft202012Validator
+from openai.types.responses import (
+    ResponseCompletedEvent,
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseFunctionCallArgumentsDoneEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemAddedEvent,
+    ResponseOutputItemDoneEvent,
+    ResponseUsage,
+)
+
+from .wrapper import ModelWrapper, get_argument, replace_argument
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+# Backends turning the schema of a required tool into a decoding grammar (llama.cpp with
+# --jinja) or guided decoding (vLLM, SGLang)
+GUIDED_BACKENDS = frozenset({"llama.cpp", "vllm", "sglang"})
+
+
+def invalid_tool_calls(
+    output: Iterable[TResponseOutputItem], tools: list[Tool]
+) -> list[tuple[ResponseFunctionToolCall, str]]:
+    """Function calls of `output` whose arguments don't match the tool's `params_json_schema`.
+
+    Calls to unknown tools (e.g. handoffs) are left to the SDK.
+    """
+    by_name = {tool.name: tool for tool in tools if isinstance(tool, FunctionTool)}
+    invalid = []
+    for item in output:
+        if not isinstance(item, ResponseFunctionToolCall) or item.name not in by_name:
+            continue
+        try:
+            arguments = json.loads(item.arguments or "{}")
+        except ValueError as e:
+            invalid.append((item, f"Invalid JSON: {e}"))
+            continue
+        error = next(Draft202012Validator(by_name[item.name].params_json_schema).iter_errors(arguments), None)
+        if error is not None:
+            invalid.append((item, error.message))
+    return invalid
+
+
+def _record_validation(
+    call: ResponseFunctionToolCall,
+    error: str,
+    constrained: bool,
+    retry_error: str | None = None,
+) -> None:
+    span = custom_span(
+        "tool_call_validation",
+        data={
+            "tool": call.name,
+            "arguments": call.arguments,
+            "constrained": constrained,
+            "retried": constrained,
+            "retry_valid": constrained and retry_error is None,
+        },
+    )
+    span.start()
+    span.set_error(SpanError(message="Malformed tool call", data={"error": error, "retry_error": retry_error}))
+    span.finish()
+
+
+def _function_call_index(event: TResponseStreamEvent) -> int | None:
+    """Output index of the function call an event is about, None for other events."""
+    if isinstance(event, (ResponseOutputItemAddedEvent, ResponseOutputItemDoneEvent)):
+        return event.output_index if isinstance(event.item, ResponseFunctionToolCall) else None
+    if isinstance(event, (ResponseFunctionCallArgumentsDeltaEvent, ResponseFunctionCallArgumentsDoneEvent)):
+        return event.output_index
+    return None
+
+
+class _Attempt:
+    """A streamed attempt, with the events of its malformed function calls held back."""
+
+    def __init__(self):
+        # Events of the calls not validated yet, by output index
+        self.held: dict[int, list[TResponseStreamEvent]] = {}
+        # Calls as streamed so far, by output index
+        self.calls: dict[int, ResponseFunctionToolCall] = {}
+        self.validated: set[int] = set()
+        self.completed: ResponseCompletedEvent | None = None
+
+    def release(self, call_ids: set[str] | None = None) -> list[TResponseStreamEvent]:
+        """The held events, only those of the calls in `call_ids` if given."""
+        return [
+            event
+            for index, events in self.held.items()
+            if call_ids is None or (index in self.calls and self.calls[index].call_id in call_ids)
+            for event in events
+        ]
+
+
+def _merge_usage(first: ResponseUsage | None, second: ResponseUsage | None) -> ResponseUsage | None:
+    if first is None or second is None:
+        return second or first
+    return second.model_copy(update={
+        "input_tokens": first.input_tokens + second.input_tokens,
+        "output_tokens": first.output_tokens + second.output_tokens,
+        "total_tokens": first.total_tokens + second.total_tokens,
+    })
+
+
+class ConstrainedToolCallModel(ModelWrapper):
+    """Validates tool calls and retries malformed ones under a decoding constraint.
+
+    The arguments of every tool call are checked against the tool's
+    `params_json_schema`. When one doesn't match and `constrain` is set, the turn is
+    sent again with that tool only and `tool_choice="required"`, which backends
+    supporting guided decoding enforce with a grammar built from the schema. The
+    valid calls of the first attempt are kept alongside the retried one, saving the
+    turn the model would otherwise spend reading the error and trying again.
+
+    Malformed calls are recorded as `tool_call_validation` spans, with or without
+    constraints, so that their rates can be compared.
+
+    When constraining a stream, the events of a function call are held back until its
+    streamed arguments validate, and those of a malformed call are only passed on if
+    it's kept. Callers acting on a call as soon as it's streamed (tool
+    progress, speculation) never see one that gets replaced. Without `constrain`,
+    events are passed through untouched.
+    """
+
+    def __init__(self, model: Model, constrain: bool = True):
+        super().__init__(model)
+        self.constrain = constrain
+
+    def _constrained_arguments(
+        self, args: tuple[Any, ...], kwargs: dict[str, Any], call: ResponseFunctionToolCall
+    ) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        tools: list[Tool] = get_argument(args, kwargs, "tools")
+        model_settings: ModelSettings = get_argument(args, kwargs, "model_settings")
+        args, kwargs = replace_argument(args, kwargs, "tools", [tool for tool in tools if tool.name == call.name])
+        args, kwargs = replace_argument(args, kwargs, "handoffs", [])
+        return replace_argument(
+            args, kwargs, "model_settings", model_settings.resolve(ModelSettings(tool_choice="required"))
+        )
+
+    def _merge_output(
+        self,
+        output: list[TResponseOutputItem],
+        invalid: list[tuple[ResponseFunctionToolCall, str]],
+        retried: list[TResponseOutputItem],
+    ) -> list[TResponseOutputItem]:
+        malformed = {call.call_id for call, _ in invalid[:1]}
+        kept = [
+            item for item in output
+            if not (isinstance(item, ResponseFunctionToolCall) and item.call_id in malformed)
+        ]
+        return kept + [item for item in retried if isinstance(item, ResponseFunctionToolCall)]
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        response = await self.model.get_response(*args, **kwargs)
+        tools: list[Tool] = get_argument(args, kwargs, "tools")
+        invalid = invalid_tool_calls(response.output, tools)
+        if not invalid:
+            return response
+        call, error = invalid[0]
+        if not self.constrain:
+            _record_validation(call, error, constrained=False)
+            return response
+
+        _LOGGER.debug(f"Malformed call to {call.name} ({error}), retrying it constrained")
+        retry_args, retry_kwargs = self._constrained_arguments(args, kwargs, call)
+        retry = await self.model.get_response(*retry_args, **retry_kwargs)
+        retry_invalid = invalid_tool_calls(retry.output, tools)
+        _record_validation(call, error, constrained=True, retry_error=retry_invalid[0][1] if retry_invalid else None)
+
+        response.usage.add(retry.usage)
+        return ModelResponse(
+            output=self._merge_output(response.output, invalid, retry.output),
+            usage=response.usage,
+            response_id=retry.response_id,
+        )
+
+    async def _stream_attempt(
+        self, attempt: _Attempt, tools: list[Tool], args: tuple[Any, ...], kwargs: dict[str, Any]
+    ) -> AsyncIterator[TResponseStreamEvent]:
+        async with aclosing(self.model.stream_response(*args, **kwargs)) as stream:  # type: ignore[type-var]
+            async for event in stream:
+                if isinstance(event, ResponseCompletedEvent):
+                    attempt.completed = event
+                    continue
+                index = _function_call_index(event)
+                if index is None:
+                    yield event
+                    continue
+                if index in attempt.validated:
+                    yield event
+                    continue
+                attempt.held.setdefault(index, []).append(event)
+                if isinstance(event, (ResponseOutputItemAddedEvent, ResponseOutputItemDoneEvent)):
+                    attempt.calls[index] = event.item  # type: ignore[assignment]
+                elif isinstance(event, ResponseFunctionCallArgumentsDeltaEvent) and index in attempt.calls:
+                    call = attempt.calls[index]
+                    attempt.calls[index] = call.model_copy(update={"arguments": call.arguments + event.delta})
+
+                # Arguments are only worth validating once they look complete
+                call = attempt.calls.get(index)
+                if (
+                    call is not None
+                    and call.arguments.rstrip().endswith("}")
+                    and not invalid_tool_calls([call], tools)
+                ):
+                    attempt.validated.add(index)
+                    for held in attempt.held.pop(index):
+                        yield held
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        tools: list[Tool] = get_argument(args, kwargs, "tools")
+        if not self.constrain:
+            async with aclosing(self.model.stream_response(*args, **kwargs)) as stream:  # type: ignore[type-var]
+                async for event in stream:
+                    if isinstance(event, ResponseCompletedEvent):
+                        if invalid := invalid_tool_calls(event.response.output, tools):
+                            _record_validation(*invalid[0], constrained=False)
+                    yield event
+            return
+
+        first = _Attempt()
+        async for event in self._stream_attempt(first, tools, args, kwargs):
+            yield event
+        completed = first.completed
+        invalid = invalid_tool_calls(completed.response.output, tools) if completed is not None else []
+        if completed is None or not invalid:
+            for event in first.release():
+                yield event
+            if completed is not None:
+                yield completed
+            return
+
+        call, error = invalid[0]
+        _LOGGER.debug(f"Malformed call to {call.name} ({error}), retrying it constrained")
+        retry_args, retry_kwargs = self._constrained_arguments(args, kwargs, call)
+        retry = _Attempt()
+        async for event in self._stream_attempt(retry, tools, retry_args, retry_kwargs):
+            yield event
+        retried = retry.completed
+        if retried is None:
+            for event in first.release():
+                yield event
+            yield completed
+            return
+
+        retry_invalid = invalid_tool_calls(retried.response.output, tools)
+        _record_validation(call, error, constrained=True, retry_error=retry_invalid[0][1] if retry_invalid else None)
+        output = self._merge_output(completed.response.output, invalid, retried.response.output)
+        kept = {item.call_id for item in output if isinstance(item, ResponseFunctionToolCall)}
+        # The retried call may reuse the id of the malformed one
+        for event in [*first.release(kept - {call.call_id}), *retry.release(kept)]:
+            yield event
+        yield retried.model_copy(update={
+            "response": retried.response.model_copy(update={
+                "output": output,
+                "usage": _merge_usage(completed.response.usage, retried.response.usage),
+            })
+        })
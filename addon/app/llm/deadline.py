@@ -0,0 +1,65 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+from agents import Model, ModelResponse
+from agents.items import TResponseStreamEvent
+
+from ..runtime import Deadline, DeadlineExceeded, record_deadline_exceeded
+from .wrapper import ModelWrapper
+
+
+class DeadlineModel(ModelWrapper):
+    """Bounds every model call by the request deadline.
+
+    Each call (LLM turn) is additionally capped at `turn_timeout` seconds and a
+    stream that doesn't produce any event for `idle_timeout` seconds is aborted.
+    """
+
+    def __init__(
+        self,
+        model: Model,
+        deadline: Deadline,
+        turn_timeout: float | None = None,
+        idle_timeout: float | None = None,
+    ):
+        super().__init__(model)
+        self.deadline = deadline
+        self.turn_timeout = turn_timeout
+        self.idle_timeout = idle_timeout
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        self.deadline.check("llm_turn")
+        try:
+            async with asyncio.timeout(self.deadline.timeout(self.turn_timeout)):
+                return await self.model.get_response(*args, **kwargs)
+        except TimeoutError:
+            record_deadline_exceeded("llm_turn", self.deadline)
+            raise DeadlineExceeded("llm_turn") from None
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        self.deadline.check("llm_turn")
+        loop = asyncio.get_running_loop()
+        turn_timeout = self.deadline.timeout(self.turn_timeout)
+        turn_expires_at = loop.time() + turn_timeout if turn_timeout is not None else None
+
+        stream = self.model.stream_response(*args, **kwargs)
+        try:
+            while True:
+                stage = "llm_idle"
+                timeout = self.idle_timeout
+                if turn_expires_at is not None:
+                    turn_remaining = turn_expires_at - loop.time()
+                    if timeout is None or turn_remaining < timeout:
+                        stage, timeout = "llm_turn", turn_remaining
+                try:
+                    async with asyncio.timeout(timeout):
+                        event = await anext(stream)
+                except StopAsyncIteration:
+                    return
+                except TimeoutError:
+                    record_deadline_exceeded(stage, self.deadline)
+                    raise DeadlineExceeded(stage) from None
+                yield event
+        finally:
+            await stream.aclose()  # type: ignore[attr-defined]
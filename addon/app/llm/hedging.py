@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from agents.items import TResponseStreamEvent
+from agents.tracing import custom_span
+
+from ..models import Connection
+
+if TYPE_CHECKING:
+    from .pool import ConnectionPool
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+_END = object()
+
+
+@dataclass
+class _Failed:
+    error: Exception
+
+
+@dataclass
+class _Attempt:
+    """A stream consumed by its own task.
+
+    Streams are driven from a single task from start to end since models open
+    tracing spans whose context can't be entered and exited from different tasks.
+    """
+    connection: Connection
+    queue: asyncio.Queue = field(default_factory=asyncio.Queue)
+    first: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+    task: asyncio.Task | None = None
+    finished: bool = False
+
+    async def pump(self, stream: AsyncIterator[TResponseStreamEvent]) -> None:
+        try:
+            async with aclosing(stream):  # type: ignore[type-var]
+                async for event in stream:
+                    self._put(event)
+            self._put(_END)
+        except Exception as e:
+            self._put(_Failed(e))
+
+    def _put(self, item: Any) -> None:
+        self.queue.put_nowait(item)
+        if not self.first.done():
+            self.first.set_result(item)
+
+    @property
+    def error(self) -> Exception | None:
+        item = self.first.result() if self.first.done() else None
+        return item.error if isinstance(item, _Failed) else None
+
+
+def _record_hedge(
+    primary: Connection,
+    secondary: Connection,
+    delay: float,
+    hedged: bool,
+    winner: Connection | None,
+    first_event_after: float | None,
+) -> None:
+    span = custom_span(
+        "hedge",
+        data={
+            "primary": primary.url,
+            "secondary": secondary.url,
+            "delay": delay,
+            "hedged": hedged,
+            "winner": None if winner is None else ("primary" if winner is primary else "secondary"),
+            "first_event_after": None if first_event_after is None else round(first_event_after, 4),
+        },
+    )
+    span.start()
+    span.finish()
+
+
+async def hedged_stream(
+    pool: ConnectionPool,
+    primary: Connection,
+    secondary: Connection,
+    open_stream: Callable[[Connection], AsyncIterator[TResponseStreamEvent]],
+    delay: float,
+    on_winner: Callable[[Connection], Any] | None = None,
+    tried: set[int] | None = None,
+) -> AsyncIterator[TResponseStreamEvent]:
+    """Stream from `primary`, hedging with `secondary` if it is slow to start.
+
+    When `primary` produced no event after `delay` seconds, the same request is sent
+    to `secondary`. The first stream to produce an event is used and the other one
+    is cancelled. If one of them fails before producing anything, the other one is
+    awaited instead. The outcome is recorded on the trace as a `hedge` span.
+
+    The ids of the connections the request was sent to are added to `tried`.
+    """
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+
+    def start(connection: Connection) -> _Attempt:
+        if tried is not None:
+            tried.add(connection.id)
+        pool.begin(connection)
+        attempt = _Attempt(connection)
+        attempt.task = asyncio.create_task(attempt.pump(open_stream(connection)))
+        return attempt
+
+    async def finish(attempt: _Attempt, error: BaseException | None) -> None:
+        if attempt.finished:
+            return
+        attempt.finished = True
+        assert attempt.task is not None
+        attempt.task.cancel()
+        try:
+            await attempt.task
+        except asyncio.CancelledError:
+            pass
+        pool.end(attempt.connection, error)
+
+    attempts = [start(primary)]
+    winner: _Attempt | None = None
+    error: Exception | None = None
+    try:
+        await asyncio.wait({attempts[0].first}, timeout=delay)
+        if not attempts[0].first.done():
+            _LOGGER.debug(f"No response from {primary.url} after {delay}s, hedging with {secondary.url}")
+            attempts.append(start(secondary))
+
+        pending = list(attempts)
+        while pending and winner is None:
+            await asyncio.wait({a.first for a in pending}, return_when=asyncio.FIRST_COMPLETED)
+            # Prefer the primary when both are ready
+            for attempt in [a for a in pending if a.first.done()]:
+                pending.remove(attempt)
+                error = attempt.error
+                if error is None:
+                    winner = attempt
+                    break
+                await finish(attempt, error)
+    finally:
+        for attempt in attempts:
+            if attempt is not winner:
+                # The loser was merely slow, not failing
+                await finish(attempt, asyncio.CancelledError())
+
+    _record_hedge(
+        primary,
+        secondary,
+        delay,
+        hedged=len(attempts) > 1,
+        winner=winner.connection if winner else None,
+        first_event_after=loop.time() - started_at if winner else None,
+    )
+    if winner is None:
+        assert error is not None
+        raise error
+
+    if on_winner is not None:
+        on_winner(winner.connection)
+    try:
+        while (item := await winner.queue.get()) is not _END:
+            if isinstance(item, _Failed):
+                raise item.error
+            yield item
+    except BaseException as e:
+        await finish(winner, e)
+        raise
+    await finish(winner, None)
@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import openai
+from openai import AsyncOpenAI
+
+from agents import Model, ModelResponse
+from agents.items import TResponseStreamEvent
+from agents.tracing import SpanError, custom_span
+
+from ..models import Connection
+from ..runtime import Deadline, DeadlineExceeded
+from .admission import AdmissionRejected
+from .hedging import hedged_stream
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Whether an error is the backend's fault (outage, overload, timeout).
+
+    Client errors such as a bad request would fail on any backend and don't count.
+    """
+    if isinstance(error, AdmissionRejected):
+        return False
+    if isinstance(error, DeadlineExceeded):
+        return error.stage in ("llm_turn", "llm_idle")
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code == 429
+    return isinstance(error, (openai.APIConnectionError, ConnectionError))
+
+
+@dataclass
+class _Member:
+    """Routing state of a connection."""
+    url: str
+    api_key: str | None
+    client: AsyncOpenAI
+    outstanding: int = 0
+    failures: int = 0
+    opened_at: float | None = None  # When the circuit opened, None while closed
+    probing: bool = False  # A half-open circuit lets a single call through
+    healthy: bool | None = None
+    last_error: str | None = None
+
+
+class ConnectionPool:
+    """Routes model calls across connections.
+
+    Calls go to the available connection with the fewest outstanding calls. A
+    connection whose calls or health checks fail `failure_threshold` times in a row
+    has its circuit opened and gets no traffic for `open_seconds`, after which a
+    single probe call decides whether it is closed again.
+
+    The pool also owns one OpenAI client per connection so that HTTP connections to
+    the backends are reused across requests.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        open_seconds: float = 30,
+        health_interval: float | None = 30,
+        health_timeout: float = 5,
+        load_members: Callable[[], Awaitable[list[Connection]]] | None = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._load_members = load_members
+        self._members: dict[int, _Member] = {}
+        self._checker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.health_interval and self._load_members is not None:
+            self._checker = asyncio.create_task(self._check_periodically())
+
+    async def stop(self) -> None:
+        if self._checker is not None:
+            self._checker.cancel()
+            try:
+                await self._checker
+            except asyncio.CancelledError:
+                pass
+            self._checker = None
+        for member in self._members.values():
+            await member.client.close()
+        self._members.clear()
+
+    def _member(self, connection: Connection) -> _Member:
+        member = self._members.get(connection.id)
+        if member is not None and (member.url, member.api_key) != (connection.url, connection.api_key):
+            # The connection was edited, start over with a new client
+            asyncio.create_task(member.client.close())
+            member = None
+        if member is None:
+            member = self._members[connection.id] = _Member(
+                url=connection.url,
+                api_key=connection.api_key,
+                client=AsyncOpenAI(base_url=connection.url, api_key=connection.api_key or ""),
+            )
+        return member
+
+    def client(self, connection: Connection) -> AsyncOpenAI:
+        return self._member(connection).client
+
+    def circuit(self, connection: Connection) -> CircuitState:
+        member = self._member(connection)
+        if member.opened_at is None:
+            return "closed"
+        if time.monotonic() - member.opened_at < self.open_seconds:
+            return "open"
+        return "half_open"
+
+    def is_available(self, connection: Connection) -> bool:
+        circuit = self.circuit(connection)
+        if circuit == "half_open":
+            return not self._member(connection).probing
+        return circuit == "closed" and self._member(connection).healthy is not False
+
+    def choose(self, connections: list[Connection], exclude: set[int] | frozenset[int] = frozenset()) -> Connection | None:
+        """Pick the available connection with the fewest outstanding calls.
+
+        When none is available, the one whose circuit opened first is tried anyway
+        rather than failing the request outright.
+        """
+        candidates = [c for c in connections if c.id not in exclude]
+        if not candidates:
+            return None
+        available = [c for c in candidates if self.is_available(c)]
+        if available:
+            # min() keeps the configured order on ties
+            return min(available, key=lambda c: self._member(c).outstanding)
+        return min(candidates, key=lambda c: self._member(c).opened_at or 0)
+
+    @asynccontextmanager
+    async def track(self, connection: Connection) -> AsyncIterator[None]:
+        """Account for a call to `connection` and feed its outcome to the circuit breaker."""
+        self.begin(connection)
+        try:
+            yield
+        except BaseException as e:
+            self.end(connection, e)
+            raise
+        else:
+            self.end(connection)
+
+    def begin(self, connection: Connection) -> None:
+        member = self._member(connection)
+        if self.circuit(connection) == "half_open":
+            member.probing = True
+        member.outstanding += 1
+
+    def end(self, connection: Connection, error: BaseException | None = None) -> None:
+        """Finish a call started with `begin`, `error` is None if it succeeded.
+
+        Calls that were cancelled or failed for reasons unrelated to the backend
+        don't affect the circuit.
+        """
+        member = self._member(connection)
+        member.outstanding -= 1
+        member.probing = False
+        if error is None:
+            self.record_success(connection)
+        elif is_backend_failure(error):
+            self.record_failure(connection, error)
+
+    def record_success(self, connection: Connection) -> None:
+        member = self._member(connection)
+        if member.opened_at is not None:
+            _LOGGER.info(f"Connection {connection.url} recovered, closing its circuit")
+        member.failures = 0
+        member.healthy = True
+        member.opened_at = None
+        member.last_error = None
+
+    def record_failure(self, connection: Connection, error: BaseException) -> None:
+        member = self._member(connection)
+        member.failures += 1
+        member.last_error = str(error) or type(error).__name__
+        half_open = self.circuit(connection) == "half_open"
+        if half_open or member.failures >= self.failure_threshold:
+            if member.opened_at is None or half_open:
+                _LOGGER.warning(
+                    f"Opening circuit of connection {connection.url} after {member.failures} failures: {member.last_error}"
+                )
+            member.opened_at = time.monotonic()
+
+    async def check_health(self, connection: Connection) -> bool:
+        """Ping the backend's models endpoint."""
+        member = self._member(connection)
+        try:
+            await member.client.with_options(
+                timeout=self.health_timeout, max_retries=0
+            ).models.list()
+        except Exception as e:
+            member.healthy = False
+            self.record_failure(connection, e)
+            return False
+        member.healthy = True
+        if self.circuit(connection) != "closed":
+            # Let the next call probe the backend right away
+            member.opened_at = time.monotonic() - self.open_seconds
+        return True
+
+    async def _check_periodically(self) -> None:
+        assert self._load_members is not None and self.health_interval
+        while True:
+            try:
+                connections = await self._load_members()
+                await asyncio.gather(*(self.check_health(c) for c in connections))
+            except Exception as e:
+                _LOGGER.error(f"Error while checking connection health: {e}", exc_info=True)
+            await asyncio.sleep(self.health_interval)
+
+    def status(self, connection: Connection) -> dict[str, Any]:
+        member = self._member(connection)
+        return {
+            "outstanding": member.outstanding,
+            "healthy": member.healthy,
+            "circuit": self.circuit(connection),
+            "failures": member.failures,
+            "last_error": member.last_error,
+        }
+
+
+def _record_failover(failed: Connection, error: BaseException, to: Connection) -> None:
+    span = custom_span(
+        "failover",
+        data={"from": failed.url, "to": to.url, "model": to.model},
+    )
+    span.start()
+    span.set_error(SpanError(message="Connection failed", data={"connection": failed.url, "error": str(error)}))
+    span.finish()
+
+
+class PoolModel(Model):
+    """Routes each model call to a connection of the pool.
+
+    The connection that served the first turn is kept for the following turns while
+    it stays available, so that backends can reuse their prompt cache. If the first
+    turn fails on a backend before producing anything, it is retried on the next
+    connection.
+
+    With `hedge_delay` set, a first turn that hasn't streamed anything after that
+    many seconds is also sent to a second connection and the fastest one is used.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        connections: list[Connection],
+        build_model: Callable[[Connection], Model],
+        deadline: Deadline | None = None,
+        hedge_delay: float | None = None,
+    ):
+        self.pool = pool
+        self.connections = connections
+        self.build_model = build_model
+        self.deadline = deadline
+        self.hedge_delay = hedge_delay
+        self.current: Connection | None = None
+        self._models: dict[int, Model] = {}
+        self._turns = 0
+
+    def _model_for(self, connection: Connection) -> Model:
+        if connection.id not in self._models:
+            self._models[connection.id] = self.build_model(connection)
+        return self._models[connection.id]
+
+    def _pick(self, tried: set[int]) -> Connection | None:
+        if self.current is not None and self.current.id not in tried and self.pool.is_available(self.current):
+            return self.current
+        return self.pool.choose(self.connections, exclude=tried)
+
+    def _hedge_partner(self, primary: Connection, tried: set[int]) -> Connection | None:
+        if self.hedge_delay is None or self._turns > 1:
+            return None
+        candidates = [
+            c for c in self.connections
+            if c.id != primary.id and c.id not in tried and self.pool.is_available(c)
+        ]
+        return self.pool.choose(candidates)
+
+    def _should_fail_over(self, error: Exception, tried: set[int]) -> bool:
+        if self._turns > 1 or not is_backend_failure(error):
+            return False
+        if self.deadline is not None and self.deadline.expired:
+            return False
+        return len(tried) < len(self.connections)
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        self._turns += 1
+        tried: set[int] = set()
+        while True:
+            connection = self._pick(tried)
+            assert connection is not None
+            try:
+                async with self.pool.track(connection):
+                    response = await self._model_for(connection).get_response(*args, **kwargs)
+            except Exception as e:
+                tried.add(connection.id)
+                if not self._should_fail_over(e, tried):
+                    raise
+                next_connection = self._pick(tried)
+                assert next_connection is not None
+                _LOGGER.warning(f"Connection {connection.url} failed, failing over to {next_connection.url}: {e}")
+                _record_failover(connection, e, next_connection)
+                continue
+            self.current = connection
+            return response
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        self._turns += 1
+        tried: set[int] = set()
+        while True:
+            connection = self._pick(tried)
+            assert connection is not None
+            secondary = self._hedge_partner(connection, tried)
+            started = False
+            try:
+                if secondary is not None:
+                    assert self.hedge_delay is not None
+                    events = hedged_stream(
+                        self.pool,
+                        connection,
+                        secondary,
+                        lambda c: self._model_for(c).stream_response(*args, **kwargs),
+                        self.hedge_delay,
+                        on_winner=lambda c: setattr(self, "current", c),
+                        tried=tried,
+                    )
+                    async with aclosing(events):
+                        async for event in events:
+                            started = True
+                            yield event
+                else:
+                    async with self.pool.track(connection):
+                        stream = self._model_for(connection).stream_response(*args, **kwargs)
+                        try:
+                            async for event in stream:
+                                started = True
+                                self.current = connection
+                                yield event
+                        finally:
+                            await stream.aclose()  # type: ignore[attr-defined]
+            except Exception as e:
+                tried.add(connection.id)
+                # Once events went out, the response can't be restarted elsewhere
+                if started or not self._should_fail_over(e, tried):
+                    raise
+                next_connection = self._pick(tried)
+                assert next_connection is not None
+                _LOGGER.warning(f"Connection {connection.url} failed, failing over to {next_connection.url}: {e}")
+                _record_failover(connection, e, next_connection)
+                continue
+            if secondary is None:
+                self.current = connection
+            return
@@ -0,0 +1,130 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from agents.tracing import Span, Trace, custom_span
+
+from ..tools.resolver import EntityResolver, normalize
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+Route = Literal["small", "large"]
+
+# Verbs opening single-step commands, and words opening simple state queries
+_COMMAND_VERBS = {
+    "turn", "switch", "set", "open", "close", "lock", "unlock", "start", "stop",
+    "pause", "resume", "dim", "brighten", "toggle", "activate", "play", "cancel",
+}
+_QUERY_WORDS = {"is", "are", "what", "whats", "how"}
+# Words hinting at conditions, sequences or reasoning
+_COMPLEX_WORDS = {
+    "if", "when", "unless", "because", "why", "then", "after", "before", "until",
+    "every", "schedule", "explain", "compare", "suggest", "should", "except",
+}
+# Words referring back to earlier turns
+_REFERENCE_WORDS = {"it", "that", "them", "those", "there", "again", "same"}
+
+
+@dataclass
+class RouteDecision:
+    route: Route
+    score: float
+    features: dict[str, Any]
+
+
+@dataclass
+class _RouteStats:
+    requests: int = 0
+    escalations: int = 0  # Requests the route failed and handed over to the large route
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+
+
+class ModelRouter:
+    """Picks between the small and the large model tier from cheap local features.
+
+    Each feature hinting at a complex request adds to a score, requests scoring
+    below `threshold` go to the small tier. Nothing here calls a model, the whole
+    classification takes microseconds.
+    """
+
+    def __init__(self, threshold: float = 1.5, long_request_words: int = 15):
+        self.threshold = threshold
+        self.long_request_words = long_request_words
+        self._stats: dict[str, _RouteStats] = {}
+
+    def classify(
+        self,
+        text: str,
+        resolver: EntityResolver | None = None,
+        history_items: int = 0,
+    ) -> RouteDecision:
+        words = normalize(text).split()
+        features: dict[str, Any] = {
+            "words": len(words),
+            "command": bool(words) and words[0] in _COMMAND_VERBS,
+            "query": bool(words) and words[0] in _QUERY_WORDS,
+            "complex_words": sorted(set(words) & _COMPLEX_WORDS),
+            "conjunctions": words.count("and"),
+            "entities": len(resolver.mentions(text)) if resolver is not None else None,
+            "follow_up": history_items > 0 and bool(set(words) & _REFERENCE_WORDS),
+        }
+
+        score = 0.0
+        if len(words) > self.long_request_words:
+            score += 1 if len(words) <= 2 * self.long_request_words else 2
+        if not (features["command"] or features["query"]):
+            score += 1
+        score += len(features["complex_words"])
+        score += 0.5 * features["conjunctions"]
+        if features["entities"] is not None and (features["entities"] == 0 or features["entities"] > 2):
+            # Either the target must be inferred, or there are many of them
+            score += 1
+        if features["follow_up"]:
+            score += 1
+
+        route: Route = "small" if score < self.threshold else "large"
+        return RouteDecision(route=route, score=score, features=features)
+
+    def record(self, route: Route, latency: float, escalated: bool = False) -> None:
+        stats = self._stats.setdefault(route, _RouteStats())
+        stats.requests += 1
+        stats.escalations += escalated
+        stats.total_latency += latency
+        stats.max_latency = max(stats.max_latency, latency)
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "route": route,
+                "requests": stats.requests,
+                "escalations": stats.escalations,
+                "avg_latency": stats.total_latency / stats.requests if stats.requests else 0.0,
+                "max_latency": stats.max_latency,
+            }
+            for route, stats in self._stats.items()
+        ]
+
+
+def record_route(
+    decision: RouteDecision,
+    route: Route,
+    parent: Trace | Span[Any] | None = None,
+    escalated_from: Route | None = None,
+    error: str | None = None,
+) -> None:
+    """Record the route a run took in its trace."""
+    span = custom_span(
+        "route",
+        data={
+            "route": route,
+            "decision": decision.route,
+            "score": decision.score,
+            "features": decision.features,
+            "escalated_from": escalated_from,
+            "error": error,
+        },
+        parent=parent,
+    )
+    span.start()
+    span.finish()
@@ -0,0 +1,77 @@
+import logging
+from collections.abc import AsyncIterator
+from typing import Any
+
+from agents import Model, ModelResponse, Tool
+from agents.items import TResponseStreamEvent
+from agents.tracing import custom_span
+
+from ..tools.selection import ToolSelection, estimate_schema_tokens
+from .wrapper import ModelWrapper, get_argument, replace_argument
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+
+def _called_tools(input: Any) -> set[str]:
+    """Names of the tools called so far in the run's input items."""
+    if isinstance(input, str):
+        return set()
+    names = set()
+    for item in input:
+        if isinstance(item, dict) and item.get("type") == "function_call":
+            names.add(item.get("name"))
+    return names
+
+
+class ToolSelectionModel(ModelWrapper):
+    """Sends the model only the tools selected for the request.
+
+    Every tool stays registered on the agent, so if the model calls a tool that
+    wasn't sent, the call still runs and the tool's group is sent from the next
+    turn on. Selections are recorded on the trace as `tool_selection` spans.
+    """
+
+    def __init__(self, model: Model, selection: ToolSelection):
+        super().__init__(model)
+        self.selection = selection
+        self._recorded = False
+
+    def _prepare(self, args: tuple[Any, ...], kwargs: dict[str, Any]) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        tools: list[Tool] = get_argument(args, kwargs, "tools")
+        known = {tool.name for tool in tools}
+        expanded = [
+            name for name in _called_tools(get_argument(args, kwargs, "input"))
+            if name in known and self.selection.expand(name)
+        ]
+        if expanded:
+            _LOGGER.debug(f"Model called unselected tools {expanded}, sending their groups")
+        selected = self.selection.filter(tools)
+        if not self._recorded or expanded:
+            self._recorded = True
+            self._record(tools, selected, expanded)
+        return replace_argument(args, kwargs, "tools", selected)
+
+    def _record(self, tools: list[Tool], selected: list[Tool], expanded: list[str]) -> None:
+        total_tokens = sum(estimate_schema_tokens(tool) for tool in tools)
+        selected_tokens = sum(estimate_schema_tokens(tool) for tool in selected)
+        span = custom_span(
+            "tool_selection",
+            data={
+                "selected": sorted(tool.name for tool in selected),
+                "selected_count": len(selected),
+                "total_count": len(tools),
+                "schema_tokens": selected_tokens,
+                "schema_tokens_saved": total_tokens - selected_tokens,
+                "expanded": expanded,
+            },
+        )
+        span.start()
+        span.finish()
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        args, kwargs = self._prepare(args, kwargs)
+        return await self.model.get_response(*args, **kwargs)
+
+    def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        args, kwargs = self._prepare(args, kwargs)
+        return self.model.stream_response(*args, **kwargs)
@@ -0,0 +1,23 @@
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+from agents import Model
+from agents.items import TResponseStreamEvent
+
+from ..tools.speculation import SpeculativeTools
+from .wrapper import ModelWrapper
+
+
+class SpeculativeModel(ModelWrapper):
+    """Shows the streamed events to `speculation` so that read-only tools start early."""
+
+    def __init__(self, model: Model, speculation: SpeculativeTools):
+        super().__init__(model)
+        self.speculation = speculation
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        async with aclosing(self.model.stream_response(*args, **kwargs)) as stream:  # type: ignore[type-var]
+            async for event in stream:
+                self.speculation.observe(event)
+                yield event
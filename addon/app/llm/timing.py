@@ -0,0 +1,89 @@
+import math
+import time
+from collections.abc import AsyncIterator
+from contextvars import ContextVar
+from typing import Any
+
+from agents.items import TResponseStreamEvent
+from agents.tracing import get_current_span
+from agents.tracing.span_data import GenerationSpanData
+from agents.tracing.spans import NoOpSpan
+from openai.types.responses import ResponseCompletedEvent, ResponseUsage
+
+from ..tracing import record_generation_timing
+from .wrapper import ModelWrapper
+
+# Time the current model call waited for a slot of its connection, set by `AdmissionModel`
+queue_time: ContextVar[float | None] = ContextVar("queue_time", default=None)
+
+ITL_PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted `values`."""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def token_timing(
+    started_at: float,
+    token_times: list[float],
+    usage: ResponseUsage | None,
+    queued: float | None = None,
+) -> dict[str, Any]:
+    """Where the time of a streamed model call went, from the arrival time of its tokens."""
+    timing: dict[str, Any] = {
+        "queue_time": round(queued, 4) if queued is not None else None,
+        "time_to_first_token": None,
+        "inter_token_latency": None,
+        "tokens_per_second": None,
+        "prompt_tokens": usage.input_tokens if usage is not None else None,
+        "completion_tokens": usage.output_tokens if usage is not None else None,
+        "cached_tokens": usage.input_tokens_details.cached_tokens if usage is not None else None,
+    }
+    if not token_times:
+        return timing
+
+    timing["time_to_first_token"] = round(token_times[0] - started_at, 4)
+    gaps = sorted(later - earlier for earlier, later in zip(token_times, token_times[1:]))
+    if gaps:
+        timing["inter_token_latency"] = {f"p{p}": round(percentile(gaps, p), 4) for p in ITL_PERCENTILES}
+        # Decoding rate, after the first token which comes with the prompt processing
+        tokens = usage.output_tokens if usage is not None and usage.output_tokens else len(token_times)
+        decoding = token_times[-1] - token_times[0]
+        if decoding > 0:
+            timing["tokens_per_second"] = round((tokens - 1) / decoding, 1)
+    return timing
+
+
+class TokenTimingModel(ModelWrapper):
+    """Records the token timing of streamed model calls on their generation span.
+
+    Non-empty deltas of text, reasoning and tool call arguments are counted as tokens,
+    local backends streaming one token per chunk. The timing is stored with the span by
+    `HASpanExporter`, under "timing".
+
+    Wraps the model creating the generation span, which is current while it streams.
+    """
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        queued = queue_time.get()
+        started_at = time.perf_counter()
+        token_times: list[float] = []
+
+        stream = self.model.stream_response(*args, **kwargs)
+        try:
+            async for event in stream:
+                if event.type.endswith(".delta") and getattr(event, "delta", None):
+                    token_times.append(time.perf_counter())
+                elif isinstance(event, ResponseCompletedEvent):
+                    span = get_current_span()
+                    if (
+                        span is not None
+                        and not isinstance(span, NoOpSpan)
+                        and isinstance(span.span_data, GenerationSpanData)
+                    ):
+                        timing = token_timing(started_at, token_times, event.response.usage, queued)
+                        record_generation_timing(span.span_id, timing)
+                yield event
+        finally:
+            await stream.aclose()  # type: ignore[attr-defined]
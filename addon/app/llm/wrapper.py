@@ -0,0 +1,44 @@
+from collections.abc import AsyncIterator
+from typing import Any
+
+from agents import Model, ModelResponse
+from agents.items import TResponseStreamEvent
+
+
+class ModelWrapper(Model):
+    """Model delegating to another model.
+
+    Subclasses override `get_response`/`stream_response` to add behavior around the
+    wrapped model. Arguments are passed through untouched so that wrappers keep
+    working across Agents SDK versions adding keyword arguments.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> ModelResponse:
+        return await self.model.get_response(*args, **kwargs)
+
+    def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[TResponseStreamEvent]:
+        return self.model.stream_response(*args, **kwargs)
+
+
+# Positions of the arguments of `Model.get_response`/`Model.stream_response`, which the
+# SDK passes either positionally or by keyword
+MODEL_ARGUMENTS = ("system_instructions", "input", "model_settings", "tools", "output_schema", "handoffs", "tracing")
+
+
+def get_argument(args: tuple[Any, ...], kwargs: dict[str, Any], name: str) -> Any:
+    if name in kwargs:
+        return kwargs[name]
+    return args[MODEL_ARGUMENTS.index(name)]
+
+
+def replace_argument(
+    args: tuple[Any, ...], kwargs: dict[str, Any], name: str, value: Any
+) -> tuple[tuple[Any, ...], dict[str, Any]]:
+    """Copy of the model call arguments with `name` set to `value`."""
+    index = MODEL_ARGUMENTS.index(name)
+    if name in kwargs or index >= len(args):
+        return args, {**kwargs, name: value}
+    return args[:index] + (value,) + args[index + 1:], kwargs
@@ -3,9 +3,8 @@ if os.getenv("DEBUGPY", "false").lower() == "true":
     import debugpy
     debugpy.listen(("0.0.0.0", 6789))
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.responses import Response, FileResponse
-from fastapi.staticfiles import StaticFiles
 import logging
 from contextlib import asynccontextmanager
 import httpx
@@ -13,12 +12,18 @@ from pathlib import Path
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from openai import AsyncOpenAI
-from starlette.middleware.base import BaseHTTPMiddleware
 
 from .tools import get_all_tools
 from .api import router as api_router
 from .db.base import Base
+from .dependencies import get_admission
+from .ingress import IngressMiddleware
+from .llm import AdmissionController, ConnectionPool, ModelRouter
+from .memory import SessionStore
+from .metrics import CONTENT_TYPE, LLM_QUEUE_DEPTH, REGISTRY
+from .services import ConnectionService
 from .settings import Settings, get_settings
+from .static import PrecompressedStaticFiles
 
 
 # TODO: Set up
@@ -53,6 +58,33 @@ def create_app(settings: Settings | None = None) -> FastAPI:
         async with db_async_engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
 
+        session_store = SessionStore(
+            agent_session_engine,
+            max_items=settings.max_history_items,
+            ttl_seconds=settings.max_history_seconds,
+            max_bytes=settings.max_history_bytes,
+            keep_turns=settings.history_keep_turns,
+            token_budget=settings.history_token_budget,
+        )
+        await session_store.start()
+
+        admission = AdmissionController(max_concurrency=settings.llm_max_concurrency)
+
+        async def load_pool_connections():
+            async with async_session() as db:
+                return await ConnectionService.get_pool_connections(db, mask_key=False)
+
+        connection_pool = ConnectionPool(
+            failure_threshold=settings.pool_failure_threshold,
+            open_seconds=settings.pool_open_seconds,
+            health_interval=settings.pool_health_interval,
+            health_timeout=settings.pool_health_timeout,
+            load_members=load_pool_connections,
+        )
+        await connection_pool.start()
+
+        router = ModelRouter(threshold=settings.router_threshold)
+
         # For use with sync trace exporter
         # May need better handling
         db_sync_engine = create_engine(f"sqlite:///{settings.db_path / 'home_agent.db'}")
@@ -134,7 +166,10 @@ def create_app(settings: Settings | None = None) -> FastAPI:
                 "db": async_session,
                 "db_sync_engine": db_sync_engine,
                 "openai_client": openai_client,
-                "agent_session_engine": agent_session_engine,
+                "session_store": session_store,
+                "admission": admission,
+                "connection_pool": connection_pool,
+                "router": router,
             }
         finally:
             # Shutdown
@@ -143,63 +178,35 @@ def create_app(settings: Settings | None = None) -> FastAPI:
             await db_async_engine.dispose()
             db_sync_engine.dispose()
             await openai_client.close()
+            await session_store.stop()
+            await connection_pool.stop()
             await agent_session_engine.dispose()
     
     app = FastAPI(lifespan=lifespan)
 
-    class IngressBaseMiddleware(BaseHTTPMiddleware):
-        async def dispatch(self, request: Request, call_next):
-            response = await call_next(request)
-
-            # Only modify HTML responses
-            content_type = response.headers.get("content-type", "")
-            if "text/html" not in content_type:
-                return response
-
-            # Derive base href from HA header or URL path
-            base_href = request.headers.get("X-Ingress-Path") or "/"
-            if not base_href.startswith("/"):
-                base_href = "/" + base_href
-            if not base_href.endswith("/"):
-                base_href = base_href + "/"
-
-            try:
-                body = b""  # type: ignore
-                async for chunk in response.body_iterator:  # type: ignore[attr-defined]
-                    body += chunk
-            except Exception:
-                # Fallback if body_iterator is not available
-                body = await response.body()
-
-            html = body.decode("utf-8", errors="ignore")
-
-            # If a <base> exists, replace it; else inject right after <head>
-            if "<base" in html:
-                import re
-                html = re.sub(r"<base[^>]*>", f"<base href=\"{base_href}\">", html, count=1)
-            else:
-                html = html.replace("<head>", f"<head><base href=\"{base_href}\">")
-
-            new_response = Response(
-                content=html,
-                media_type="text/html; charset=utf-8",
-                status_code=response.status_code,
-                headers={k: v for k, v in response.headers.items() if k.lower() != "content-length"},
-            )
-            return new_response
-
-    app.add_middleware(IngressBaseMiddleware)
-
     app.include_router(api_router)
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(admission: AdmissionController = Depends(get_admission)) -> Response:
+        """Metrics in the Prometheus text format."""
+        for stats in admission.stats():
+            LLM_QUEUE_DEPTH.set(stats["queue_depth"], connection=stats["connection"])
+        return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
     # Frontend
     frontend_dir = Path(__file__).parent.parent / "frontend" / "build" / "client"
-    
-    app.mount("/assets", StaticFiles(directory=frontend_dir / "assets"), name="assets")
+
+    # Pages get a <base href> matching the ingress path, other responses aren't touched
+    app.add_middleware(IngressMiddleware, frontend_dir=frontend_dir)
+
+    app.mount("/assets", PrecompressedStaticFiles(directory=frontend_dir / "assets"), name="assets")
+
+    # Built files at the root (JS chunks, favicon), precompressed and cached like assets
+    root_files = PrecompressedStaticFiles(directory=frontend_dir, check_dir=False)
 
     # SPA fallback: serve built files if they exist, otherwise index.html
     @app.get("/{full_path:path}")
-    async def spa_fallback(full_path: str):
+    async def spa_fallback(full_path: str, request: Request):
         target = (frontend_dir / full_path).resolve()
         # Security: ensure target stays within frontend_dir
         try:
@@ -209,7 +216,7 @@ def create_app(settings: Settings | None = None) -> FastAPI:
             return Response(status_code=404)
 
         if target.is_file():
-            return FileResponse(target)
+            return await root_files.get_response(full_path, request.scope)
         # For any non-file route (e.g., "/conversations"), serve index.html
         return FileResponse(frontend_dir / "index.html")
 
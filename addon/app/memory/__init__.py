@@ -0,0 +1,6 @@
+from .store import SessionStore, BoundedSession
+
+__all__ = [
+    "SessionStore",
+    "BoundedSession",
+]
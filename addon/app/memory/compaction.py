@@ -0,0 +1,131 @@
+import json
+from typing import Any
+
+from agents import TResponseInputItem
+
+# Notes are replayed as assistant messages rather than system ones since many local
+# chat templates only accept a single leading system message.
+NOTE_ROLE = "assistant"
+
+
+def estimate_tokens(item: Any) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return len(json.dumps(item, separators=(",", ":"))) // 4 + 1
+
+
+def is_user_message(item: Any) -> bool:
+    return isinstance(item, dict) and item.get("role") == "user"
+
+
+def split_turns(items: list[TResponseInputItem]) -> list[list[TResponseInputItem]]:
+    """Split history into turns, each starting with a user message."""
+    turns: list[list[TResponseInputItem]] = []
+    for item in items:
+        if is_user_message(item) or not turns:
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+def _format_arguments(arguments: str) -> str:
+    try:
+        parsed = json.loads(arguments or "{}")
+    except json.JSONDecodeError:
+        return arguments
+    if not isinstance(parsed, dict):
+        return arguments
+    return ", ".join(f"{k}={v!r}" for k, v in parsed.items())
+
+
+def _output_text(output: Any) -> str:
+    if isinstance(output, str):
+        return output
+    return json.dumps(output, separators=(",", ":"))
+
+
+def compact_turn(turn: list[TResponseInputItem], max_output_chars: int = 120) -> list[TResponseInputItem]:
+    """Collapse the tool calls of a turn into a single factual note.
+
+    User and assistant text messages are kept as is, reasoning items are dropped and
+    every function call/output pair becomes one line such as
+    `turn_on(name='Kitchen Light', domain='light') -> Done.`.
+    """
+    calls: dict[str, str] = {}
+    facts: list[str] = []
+    kept: list[TResponseInputItem] = []
+
+    for item in turn:
+        item_type = item.get("type") if isinstance(item, dict) else None
+        if item_type == "function_call":
+            calls[item["call_id"]] = f"{item['name']}({_format_arguments(item.get('arguments', ''))})"
+        elif item_type == "function_call_output":
+            call = calls.pop(item["call_id"], "tool call")
+            output = _output_text(item.get("output", ""))
+            if len(output) > max_output_chars:
+                output = output[:max_output_chars] + "..."
+            facts.append(f"{call} -> {output}")
+        elif item_type == "reasoning":
+            continue
+        else:
+            kept.append(item)
+
+    facts.extend(f"{call} -> (no result)" for call in calls.values())
+    if not facts:
+        return kept
+
+    note: TResponseInputItem = {
+        "role": NOTE_ROLE,
+        "content": "Actions taken: " + "; ".join(facts),
+    }  # type: ignore[assignment]
+    # Place the note right after the user message that triggered the actions
+    return kept[:1] + [note] + kept[1:]
+
+
+def compact_history(
+    items: list[TResponseInputItem],
+    keep_turns: int,
+    token_budget: int | None = None,
+    summary: str | None = None,
+    summarized_items: int = 0,
+) -> list[TResponseInputItem]:
+    """Compact conversation history before it is replayed to the model.
+
+    - The first `summarized_items` items are replaced by `summary` when one is available.
+    - The last `keep_turns` turns are kept raw, older turns have their tool calls
+      collapsed into notes.
+    - Oldest turns are dropped until the history fits `token_budget`. The summary
+      and the most recent turn are always kept.
+    """
+    prefix: list[TResponseInputItem] = []
+    if summary:
+        items = items[summarized_items:]
+        prefix = [{"role": NOTE_ROLE, "content": f"Summary of the earlier conversation: {summary}"}]  # type: ignore[list-item]
+
+    turns = split_turns(items)
+    split = max(len(turns) - keep_turns, 0)
+    turns = [compact_turn(turn) for turn in turns[:split]] + turns[split:]
+
+    if token_budget is not None:
+        used = sum(estimate_tokens(item) for item in prefix)
+        sizes = [sum(estimate_tokens(item) for item in turn) for turn in turns]
+        total = used + sum(sizes)
+        while len(turns) > 1 and total > token_budget:
+            total -= sizes.pop(0)
+            turns.pop(0)
+
+    return prefix + [item for turn in turns for item in turn]
+
+
+def format_for_summary(items: list[TResponseInputItem]) -> str:
+    """Render history as plain text for the summarization prompt."""
+    lines: list[str] = []
+    for turn in split_turns(items):
+        for item in compact_turn(turn, max_output_chars=300):
+            content = item.get("content") if isinstance(item, dict) else None
+            if isinstance(content, list):
+                content = " ".join(
+                    part.get("text", "") for part in content if isinstance(part, dict)
+                )
+            if content:
+                lines.append(f"{item.get('role', 'assistant')}: {content}")
+    return "\n".join(lines)
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from agents import TResponseInputItem
+from agents.extensions.memory.sqlalchemy_session import SQLAlchemySession
+
+from .compaction import compact_history, format_for_summary, split_turns
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+
+@dataclass
+class SessionInfo:
+    """Bookkeeping for a resident session."""
+    last_used: float
+    items: int = 0
+    size_bytes: int = 0
+    summary: str | None = None
+    summarized_up_to: int = 0  # Id of the last message covered by the summary
+
+
+class BoundedSession(SQLAlchemySession):
+    """SQLAlchemy session that keeps at most `max_items` items.
+
+    Oldest items are dropped first, always cutting at a user message so that tool
+    calls are never separated from their outputs.
+    """
+
+    def __init__(self, session_id: str, *, store: SessionStore, **kwargs):
+        super().__init__(session_id, engine=store.engine, create_tables=False, **kwargs)
+        self._store = store
+
+    async def get_items(self, limit: int | None = None) -> list[TResponseInputItem]:
+        """Get the history, compacted if the store has compaction enabled."""
+        self._store.touch(self.session_id)
+        if self._store.keep_turns is None or limit is not None:
+            return await super().get_items(limit)
+
+        rows = await self.get_rows()
+        info = self._store.info(self.session_id)
+        return compact_history(
+            [item for _, item in rows],
+            keep_turns=self._store.keep_turns,
+            token_budget=self._store.token_budget,
+            summary=info.summary,
+            summarized_items=sum(1 for row_id, _ in rows if row_id <= info.summarized_up_to),
+        )
+
+    async def get_rows(self) -> list[tuple[int, TResponseInputItem]]:
+        """Get the raw history along with the message ids, oldest first."""
+        async with self._session_factory() as sess:
+            result = await sess.execute(
+                select(self._messages.c.id, self._messages.c.message_data)
+                .where(self._messages.c.session_id == self.session_id)
+                .order_by(self._messages.c.id.asc())
+            )
+            rows = []
+            for row_id, raw in result.all():
+                try:
+                    rows.append((row_id, await self._deserialize_item(raw)))
+                except json.JSONDecodeError:
+                    continue
+            return rows
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        if not items:
+            return
+        await super().add_items(items)
+        await self._trim()
+        await self._store.refresh(self)
+
+    async def pop_item(self) -> TResponseInputItem | None:
+        item = await super().pop_item()
+        await self._store.refresh(self)
+        return item
+
+    async def last_id(self) -> int:
+        """Id of the latest message, 0 if there's none."""
+        async with self._session_factory() as sess:
+            result = await sess.execute(
+                select(func.coalesce(func.max(self._messages.c.id), 0))
+                .where(self._messages.c.session_id == self.session_id)
+            )
+            return result.scalar_one()
+
+    async def remove_items_after(self, row_id: int) -> None:
+        """Remove the messages added after message `row_id`, e.g. those of a failed run.
+
+        Unlike counting items, this holds when trimming dropped older messages since.
+        """
+        async with self._session_factory() as sess:
+            async with sess.begin():
+                await sess.execute(
+                    delete(self._messages).where(
+                        self._messages.c.session_id == self.session_id,
+                        self._messages.c.id > row_id,
+                    )
+                )
+        await self._store.refresh(self)
+
+    async def clear_session(self) -> None:
+        await super().clear_session()
+        self._store.forget(self.session_id)
+
+    async def _trim(self) -> None:
+        """Drop the oldest items beyond the store's per-conversation limit."""
+        async with self._session_factory() as sess:
+            async with sess.begin():
+                rows = (
+                    await sess.execute(
+                        select(self._messages.c.id, self._messages.c.message_data)
+                        .where(self._messages.c.session_id == self.session_id)
+                        .order_by(self._messages.c.id.asc())
+                    )
+                ).all()
+
+                excess = len(rows) - self._store.max_items
+                if excess <= 0:
+                    return
+
+                # Move the cut forward to the next user message, or back to the
+                # last one if the latest turn alone exceeds the limit
+                user_rows = [i for i, row in enumerate(rows) if _is_user_message(row.message_data)]
+                cut = next((i for i in user_rows if i >= excess), user_rows[-1] if user_rows else 0)
+                if cut == 0:
+                    return
+
+                await sess.execute(
+                    delete(self._messages).where(
+                        self._messages.c.id.in_([row.id for row in rows[:cut]])
+                    )
+                )
+
+
+def _is_user_message(message_data: str) -> bool:
+    try:
+        item = json.loads(message_data)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(item, dict) and item.get("role") == "user"
+
+
+class SessionStore:
+    """Store for agent conversation history.
+
+    Sessions live in a shared (typically in-memory) database. The store creates the
+    tables once, bounds the number of items per conversation, evicts conversations
+    idle for longer than `ttl_seconds` and, when the total size exceeds `max_bytes`,
+    evicts the least recently used conversations.
+
+    When `keep_turns` is set, history is compacted before being replayed to the model:
+    only the last `keep_turns` turns are kept raw, older tool calls are collapsed into
+    notes, and the result is trimmed to `token_budget` tokens. Older history can also
+    be summarized in the background with `summarize_in_background`.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        max_items: int,
+        ttl_seconds: float,
+        max_bytes: int,
+        keep_turns: int | None = None,
+        token_budget: int | None = None,
+        sweep_interval: float = 60,
+    ):
+        self.engine = engine
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.keep_turns = keep_turns
+        self.token_budget = token_budget
+        self.sweep_interval = sweep_interval
+        self._sessions: OrderedDict[str, SessionInfo] = OrderedDict()
+        self._sweeper: asyncio.Task | None = None
+        self._summaries: dict[str, asyncio.Task] = {}
+
+    async def start(self) -> None:
+        """Create the tables and start the periodic idle sweep."""
+        # Any session instance carries the table definitions
+        metadata = SQLAlchemySession("", engine=self.engine)._metadata
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+        self._sweeper = asyncio.create_task(self._sweep_periodically())
+
+    async def stop(self) -> None:
+        for task in self._summaries.values():
+            task.cancel()
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def get_session(self, session_id: str) -> BoundedSession:
+        """Get the session for a conversation, evicting stale ones first."""
+        await self.evict_expired()
+        self.touch(session_id)
+        return BoundedSession(session_id, store=self)
+
+    def touch(self, session_id: str) -> None:
+        info = self._sessions.get(session_id)
+        if info is None:
+            self._sessions[session_id] = SessionInfo(last_used=time.monotonic())
+        else:
+            info.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+
+    def info(self, session_id: str) -> SessionInfo:
+        if session_id not in self._sessions:
+            self.touch(session_id)
+        return self._sessions[session_id]
+
+    def forget(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def summarize_in_background(
+        self,
+        session_id: str,
+        summarize: Callable[[str], Awaitable[str]],
+    ) -> None:
+        """Summarize the history older than `keep_turns` without blocking the caller.
+
+        `summarize` receives the previous summary and the new history as text and
+        returns the updated summary. At most one summary runs per conversation.
+        """
+        if self.keep_turns is None or session_id in self._summaries:
+            return
+        task = asyncio.create_task(self._summarize(session_id, summarize))
+        self._summaries[session_id] = task
+        task.add_done_callback(lambda _: self._summaries.pop(session_id, None))
+
+    async def _summarize(
+        self,
+        session_id: str,
+        summarize: Callable[[str], Awaitable[str]],
+    ) -> None:
+        assert self.keep_turns is not None
+        rows = await BoundedSession(session_id, store=self).get_rows()
+        info = self.info(session_id)
+        rows = [(row_id, item) for row_id, item in rows if row_id > info.summarized_up_to]
+
+        turns = split_turns([item for _, item in rows])
+        old_turns = turns[: max(len(turns) - self.keep_turns, 0)]
+        if not old_turns:
+            return
+        old_items = sum(len(turn) for turn in old_turns)
+
+        text = format_for_summary([item for _, item in rows[:old_items]])
+        if info.summary:
+            text = f"Previous summary: {info.summary}\n{text}"
+
+        try:
+            summary = await summarize(text)
+        except Exception as e:
+            _LOGGER.warning(f"Failed to summarize session {session_id}: {e}")
+            return
+
+        # The session may have been evicted in the meantime
+        if session_id in self._sessions and summary:
+            info.summary = summary.strip()
+            info.summarized_up_to = rows[old_items - 1][0]
+
+    async def refresh(self, session: BoundedSession) -> None:
+        """Update the bookkeeping of a session after it changed, then enforce the size cap."""
+        async with self.engine.connect() as conn:
+            row = (
+                await conn.execute(
+                    select(
+                        func.count(session._messages.c.id),
+                        func.coalesce(func.sum(func.length(session._messages.c.message_data)), 0),
+                    ).where(session._messages.c.session_id == session.session_id)
+                )
+            ).one()
+        self.touch(session.session_id)
+        info = self._sessions[session.session_id]
+        info.items, info.size_bytes = row[0], row[1]
+        await self._enforce_size_cap(keep=session.session_id)
+
+    async def evict(self, session_id: str) -> None:
+        await BoundedSession(session_id, store=self).clear_session()
+
+    async def evict_expired(self) -> None:
+        deadline = time.monotonic() - self.ttl_seconds
+        # Sessions are ordered by last use, so expired ones are at the front
+        expired = []
+        for session_id, info in self._sessions.items():
+            if info.last_used > deadline:
+                break
+            expired.append(session_id)
+        for session_id in expired:
+            _LOGGER.debug(f"Evicting idle session {session_id}")
+            await self.evict(session_id)
+
+    async def _enforce_size_cap(self, keep: str) -> None:
+        while self.size_bytes > self.max_bytes:
+            session_id = next(iter(self._sessions))
+            if session_id == keep:
+                # Never evict the conversation being served
+                break
+            _LOGGER.debug(f"Evicting least recently used session {session_id}")
+            await self.evict(session_id)
+
+    async def _sweep_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.evict_expired()
+            except Exception as e:
+                _LOGGER.error(f"Error while evicting idle sessions: {e}", exc_info=True)
+
+    @property
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(info.size_bytes for info in self._sessions.values())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "sessions": self.session_count,
+            "items": sum(info.items for info in self._sessions.values()),
+            "size_bytes": self.size_bytes,
+        }
@@ -0,0 +1,224 @@
+"""Process-wide metrics, exposed in the Prometheus text format on `/metrics`.
+
+Only the metric types the add-on needs: recording one is a dict lookup under a lock,
+the values are formatted when scraped.
+"""
+import bisect
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a Home Assistant call to a whole request
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Seconds, for the in-process steps
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Registry:
+    """The metrics rendered together on a scrape."""
+
+    def __init__(self):
+        self._metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Registry | None = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Metric {self.name} takes the labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+    def render(self) -> list[str]:
+        documentation = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        return [f"# HELP {self.name} {documentation}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class _Series:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Registry | None = None,
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], _Series] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        # Observations above the last bucket only count towards +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets) + 1)
+            series.counts[index] += 1
+            series.sum += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the block."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series.counts) if series is not None else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = [(key, list(s.counts), s.sum) for key, s in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+ENTITY_FETCH_SECONDS = Histogram(
+    "home_agent_entity_fetch_seconds",
+    "Time to fetch the home entities from Home Assistant.",
+)
+PROMPT_BUILD_SECONDS = Histogram(
+    "home_agent_prompt_build_seconds",
+    "Time to build the instructions of an agent turn.",
+    buckets=FAST_BUCKETS,
+)
+LLM_TTFT_SECONDS = Histogram(
+    "home_agent_llm_time_to_first_token_seconds",
+    "Time from the start of an agent turn to the first streamed chunk of the model, queueing included.",
+)
+LLM_SECONDS = Histogram(
+    "home_agent_llm_seconds",
+    "Duration of model calls.",
+    ["model"],
+)
+TOOL_CALL_SECONDS = Histogram(
+    "home_agent_tool_call_seconds",
+    "Duration of the Home Assistant call of a tool.",
+    ["tool"],
+)
+REQUEST_SECONDS = Histogram(
+    "home_agent_request_seconds",
+    "End-to-end time of conversation requests.",
+)
+REQUESTS = Counter(
+    "home_agent_requests_total",
+    "Conversation requests by outcome.",
+    ["outcome"],
+)
+TURNS = Counter(
+    "home_agent_turns_total",
+    "Agent turns, per request when divided by home_agent_requests_total.",
+)
+TOOL_FAILURES = Counter(
+    "home_agent_tool_failures_total",
+    "Home Assistant calls of tools that failed or were answered with an error.",
+    ["tool"],
+)
+LLM_QUEUE_DEPTH = Gauge(
+    "home_agent_llm_queue_depth",
+    "Model calls waiting for a slot of a connection.",
+    ["connection"],
+)
+CACHE_LOOKUPS = Counter(
+    "home_agent_cache_lookups_total",
+    "Lookups of the add-on's caches, whose hit rate is hits over all results.",
+    ["cache", "result"],
+)
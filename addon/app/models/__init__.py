@@ -1,13 +1,18 @@
-from .conversation import ConversationRequest, ConversationResponse, ConversationList, Conversation
-from .connection import Connection, ConnectionCreate, ConnectionUpdate
+from .conversation import ConversationRequest, Location, ToolProgress, ConversationResponse, ConversationList, Conversation, SessionStats, AdmissionStats, RouteStats
+from .connection import Connection, ConnectionCreate, ConnectionUpdate, ConnectionPoolUpdate, ConnectionStatus
 from .trace import Span, ConversationNeighbors, TraceWithSpans, ConversationTracesResponse
 from .tool import Tool
 
 __all__ = [
     "ConversationRequest",
+    "Location",
+    "ToolProgress",
     "ConversationResponse",
     "ConversationList",
     "Conversation",
+    "SessionStats",
+    "AdmissionStats",
+    "RouteStats",
     "Span",
     "ConversationNeighbors",
     "TraceWithSpans",
@@ -15,5 +20,7 @@ __all__ = [
     "Connection",
     "ConnectionCreate",
     "ConnectionUpdate",
+    "ConnectionPoolUpdate",
+    "ConnectionStatus",
     "Tool",
 ]
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -24,5 +26,25 @@ class Connection(ConnectionBase):
     id: int
     model: str | None = Field(None, description="The model selected for the backend")
     is_active: bool = Field(False, description="Whether the backend is active")
+    in_pool: bool = Field(False, description="Whether requests are load balanced onto the backend")
+    tier: Literal["small", "large"] = Field(
+        "large", description="Whether the backend serves simple requests only (small) or any request (large)"
+    )
+
+    model_config = ConfigDict(from_attributes=True)
+
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class ConnectionPoolUpdate(BaseModel):
+    in_pool: bool
+    tier: Literal["small", "large"] | None = None
+
+
+class ConnectionStatus(BaseModel):
+    id: int
+    url: str
+    model: str | None = None
+    outstanding: int = Field(0, description="Model calls in flight")
+    healthy: bool | None = Field(None, description="Result of the last health check, None if not checked yet")
+    circuit: Literal["closed", "open", "half_open"] = "closed"
+    failures: int = Field(0, description="Consecutive failed calls or health checks")
+    last_error: str | None = None
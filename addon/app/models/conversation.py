@@ -1,12 +1,25 @@
 from pydantic import BaseModel
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal
 from datetime import datetime
 
+class Location(BaseModel):
+    """Where the requesting device (e.g. a voice satellite) is."""
+    area: str | None = None
+    floor: str | None = None
+
 class ConversationRequest(BaseModel):
     """Model for conversation request."""
     text: str
     conversation_id: str
     language: str
+    # Interactive requests (voice, chat) are served before background ones (automations)
+    priority: Literal["interactive", "background"] = "interactive"
+    location: Location | None = None
+
+class ToolProgress(BaseModel):
+    """A tool call the agent started, streamed ahead of the rest of the response."""
+    name: str
+    call_id: str
 
 class ConversationResponse(BaseModel):
     """Model for conversation response."""
@@ -24,4 +37,37 @@ class Conversation(BaseModel):
 class ConversationList(BaseModel):
     """Model for a list of conversations."""
 
-    conversations: List[Conversation] 
\ No newline at end of file
+    conversations: List[Conversation] 
+
+
+class SessionStats(BaseModel):
+    """Model for the resident agent sessions."""
+
+    sessions: int
+    items: int
+    size_bytes: int
+
+
+class RouteStats(BaseModel):
+    """Model for the requests served by a model tier."""
+
+    route: Literal["small", "large"]
+    requests: int
+    escalations: int
+    avg_latency: float
+    max_latency: float
+
+
+class AdmissionStats(BaseModel):
+    """Model for the model call queue of a connection."""
+
+    connection: str
+    limit: int
+    active: int
+    queue_depth: int
+    max_queue_depth: int
+    admitted: int
+    rejected: int
+    timed_out: int
+    avg_queue_time: float
+    max_queue_time: float
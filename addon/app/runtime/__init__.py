@@ -0,0 +1,14 @@
+from .cancellation import cancel_run, cancel_when, cancel_on_disconnect, record_cancellation
+from .deadline import Deadline, DeadlineExceeded, record_deadline_exceeded
+from .guard import RunGuard
+
+__all__ = [
+    "cancel_run",
+    "cancel_when",
+    "cancel_on_disconnect",
+    "record_cancellation",
+    "Deadline",
+    "DeadlineExceeded",
+    "record_deadline_exceeded",
+    "RunGuard",
+]
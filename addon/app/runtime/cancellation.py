@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from agents import RunResultStreaming
+from agents.tracing import SpanError, custom_span
+
+try:
+    # Private, checked against the SDK versions allowed by pyproject.toml
+    from agents._run_impl import QueueCompleteSentinel
+except ImportError:  # pragma: no cover
+    QueueCompleteSentinel = None  # type: ignore[assignment,misc]
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+
+def _complete_event_queue(result: RunResultStreaming) -> bool:
+    """Wake up a consumer waiting on the event queue of a run, if the SDK allows it."""
+    queue = getattr(result, "_event_queue", None)
+    if QueueCompleteSentinel is None or not isinstance(queue, asyncio.Queue):
+        return False
+    queue.put_nowait(QueueCompleteSentinel())
+    return True
+
+
+def cancel_run(result: RunResultStreaming) -> None:
+    """Cancel a streamed run along with its in-flight model request and tool calls."""
+    if result.is_complete:
+        return
+    # Cancels the run task, which in turn cancels the open model stream and pending tool calls
+    result.cancel()
+    # `cancel` doesn't wake up a consumer already waiting on the event queue
+    if not _complete_event_queue(result):
+        _LOGGER.warning("Can't wake up the consumer of the cancelled run with this Agents SDK version.")
+
+
+def record_cancellation(result: RunResultStreaming, reason: str) -> None:
+    """Mark a run as cancelled in its trace."""
+    if result.trace is None:
+        return
+    span = custom_span(
+        "run_cancelled",
+        data={"reason": reason, "turn": result.current_turn},
+        parent=result.trace,
+    )
+    span.start()
+    span.set_error(SpanError(message="Run cancelled", data={"reason": reason}))
+    span.finish()
+
+
+@asynccontextmanager
+async def cancel_when(
+    result: RunResultStreaming,
+    trigger: Callable[[], Awaitable[Any]] | None,
+) -> AsyncIterator[asyncio.Event]:
+    """Cancel the run as soon as `trigger` returns.
+
+    Yields an event that is set if the run was cancelled by the trigger.
+    """
+    triggered = asyncio.Event()
+
+    async def watch():
+        await trigger()  # type: ignore[misc]
+        triggered.set()
+        cancel_run(result)
+
+    watcher = asyncio.create_task(watch()) if trigger is not None else None
+    try:
+        yield triggered
+    except asyncio.CancelledError:
+        # Streaming events of a cancelled run re-raises the run task's CancelledError.
+        # Only swallow it if the current task itself isn't being cancelled.
+        task = asyncio.current_task()
+        if not triggered.is_set() or (task is not None and task.cancelling()):
+            raise
+    finally:
+        if watcher is not None:
+            watcher.cancel()
+
+
+def cancel_on_disconnect(
+    result: RunResultStreaming,
+    is_disconnected: Callable[[], Awaitable[bool]] | None,
+    poll_interval: float = 0.25,
+):
+    """Cancel the run as soon as the client goes away.
+
+    Polling catches disconnects even while no tokens are being produced, e.g. while
+    a busy backend is still processing the prompt.
+    """
+    if is_disconnected is None:
+        return cancel_when(result, None)
+
+    async def wait_for_disconnect():
+        while not await is_disconnected():
+            await asyncio.sleep(poll_interval)
+        _LOGGER.info("Client disconnected, cancelling the run.")
+
+    return cancel_when(result, wait_for_disconnect)
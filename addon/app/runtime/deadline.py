@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from agents.tracing import Span, SpanError, Trace, custom_span
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+# Remaining time budget of the request in milliseconds, set by the integration
+DEADLINE_HEADER = "X-Home-Agent-Deadline-Ms"
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of its time budget."""
+
+    def __init__(self, stage: str, message: str | None = None):
+        super().__init__(message or f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+class Deadline:
+    """Time budget of a request, measured on the monotonic clock."""
+
+    def __init__(self, budget: float | None):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget if budget is not None else None
+
+    @classmethod
+    def from_header(cls, value: str | None, default: float | None = None) -> "Deadline":
+        """Build a deadline from the deadline header, falling back to `default` seconds."""
+        if value:
+            try:
+                return cls(max(int(value), 0) / 1000)
+            except ValueError:
+                _LOGGER.warning(f"Ignoring invalid {DEADLINE_HEADER} header: {value!r}")
+        return cls(default)
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0)
+
+    @property
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def timeout(self, cap: float | None = None) -> float | None:
+        """Time allowed for an operation capped at `cap` seconds."""
+        remaining = self.remaining()
+        if remaining is None:
+            return cap
+        if cap is None:
+            return remaining
+        return min(remaining, cap)
+
+    def check(self, stage: str) -> None:
+        if self.expired:
+            raise DeadlineExceeded(stage)
+
+    async def wait(self) -> None:
+        """Sleep until the deadline expires (forever if there is none)."""
+        remaining = self.remaining()
+        if remaining is None:
+            await asyncio.Event().wait()
+        else:
+            await asyncio.sleep(remaining)
+
+
+def record_deadline_exceeded(
+    stage: str,
+    deadline: Deadline,
+    parent: Trace | Span[Any] | None = None,
+) -> None:
+    """Record a deadline-exceeded event in the current (or given) trace."""
+    _LOGGER.warning(f"Deadline of {deadline.budget}s exceeded during {stage}")
+    span = custom_span(
+        "deadline_exceeded",
+        data={"stage": stage, "budget": deadline.budget},
+        parent=parent,
+    )
+    span.start()
+    span.set_error(SpanError(message="Deadline exceeded", data={"stage": stage}))
+    span.finish()
@@ -0,0 +1,146 @@
+import asyncio
+import dataclasses
+import json
+import logging
+from typing import Any
+
+from agents import FunctionTool, Tool
+from agents.tool_context import ToolContext
+from agents.tracing import Span, SpanError, Trace, custom_span
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+# Tools undoing each other, alternating calls on the same entity are an oscillation
+OPPOSITE_TOOLS = {
+    "turn_on": "turn_off",
+    "turn_off": "turn_on",
+    "pause_media": "unpause_media",
+    "unpause_media": "pause_media",
+    "pause_timer": "unpause_timer",
+    "unpause_timer": "pause_timer",
+}
+
+# Tool results reporting a failure, see app.tools.hass_tools
+_FAILURE_PREFIXES = ("Failed", "Could not", "You must", "An error occurred")
+
+GUARD_MESSAGE = "Stopped: this call was already made and isn't making progress. Do not call tools again."
+
+
+def _is_failure(result: Any) -> bool:
+    if isinstance(result, dict):
+        return "error" in result or result.get("response_type") == "error"
+    return isinstance(result, str) and result.startswith(_FAILURE_PREFIXES)
+
+
+class RunGuard:
+    """Stops runs that are stuck calling tools without making progress.
+
+    The tools returned by `wrap` count, for the whole run:
+    - identical calls (same tool and arguments),
+    - alternating calls of opposite tools on the same entity (on/off/on...),
+    - failed calls.
+
+    A call reaching `max_repeated_calls` or `max_oscillations` isn't made, and the
+    `max_tool_failures`th failure ends the run as well. `wait` returns once the guard
+    tripped, for the caller to cancel the run, and `reason` tells why. A threshold of
+    None disables the check.
+    """
+
+    def __init__(
+        self,
+        max_repeated_calls: int | None = 3,
+        max_oscillations: int | None = 3,
+        max_tool_failures: int | None = 3,
+        opposites: dict[str, str] = OPPOSITE_TOOLS,
+    ):
+        self.max_repeated_calls = max_repeated_calls
+        self.max_oscillations = max_oscillations
+        self.max_tool_failures = max_tool_failures
+        self.opposites = opposites
+        self.reason: str | None = None
+        self.tool: str | None = None
+        self._tripped = asyncio.Event()
+        self._calls: dict[tuple[str, str], int] = {}
+        self._last_actions: dict[str, str] = {}  # Last opposite tool called per entity
+        self._oscillations: dict[str, int] = {}
+        self.failures = 0
+
+    @property
+    def tripped(self) -> bool:
+        return self._tripped.is_set()
+
+    async def wait(self) -> None:
+        await self._tripped.wait()
+
+    def wrap(self, tools: list[Tool]) -> list[Tool]:
+        return [
+            dataclasses.replace(tool, on_invoke_tool=self._invoker(tool)) if isinstance(tool, FunctionTool) else tool
+            for tool in tools
+        ]
+
+    def _trip(self, reason: str, tool: str) -> None:
+        if self.tripped:
+            return
+        _LOGGER.warning(f"Run stopped by the guard: {reason} ({tool})")
+        self.reason = reason
+        self.tool = tool
+        self._tripped.set()
+
+    def _check(self, name: str, arguments: str) -> str | None:
+        """Count the call, returning why it shouldn't be made if it shouldn't."""
+        try:
+            parsed = json.loads(arguments or "{}")
+        except ValueError:
+            parsed = arguments
+        key = (name, json.dumps(parsed, sort_keys=True))
+        self._calls[key] = self._calls.get(key, 0) + 1
+        if self.max_repeated_calls is not None and self._calls[key] >= self.max_repeated_calls:
+            return "repeated_call"
+
+        if name in self.opposites and isinstance(parsed, dict):
+            entity = str(parsed.get("name", "")).strip().lower()
+            if self._last_actions.get(entity) == self.opposites[name]:
+                self._oscillations[entity] = self._oscillations.get(entity, 0) + 1
+            self._last_actions[entity] = name
+            if self.max_oscillations is not None and self._oscillations.get(entity, 0) >= self.max_oscillations:
+                return "oscillation"
+        return None
+
+    def _failed(self, name: str) -> None:
+        self.failures += 1
+        if self.max_tool_failures is not None and self.failures >= self.max_tool_failures:
+            self._trip("tool_failures", name)
+
+    def _invoker(self, tool: FunctionTool):
+        async def invoke(ctx: ToolContext[Any], arguments: str) -> Any:
+            if self.tripped:
+                return GUARD_MESSAGE
+            reason = self._check(tool.name, arguments)
+            if reason is not None:
+                self._trip(reason, tool.name)
+                return GUARD_MESSAGE
+            try:
+                result = await tool.on_invoke_tool(ctx, arguments)
+            except Exception:
+                self._failed(tool.name)
+                raise
+            if _is_failure(result):
+                self._failed(tool.name)
+            return result
+        return invoke
+
+    def record(self, turn: int, parent: Trace | Span[Any] | None = None) -> None:
+        """Record why the guard stopped the run in its trace."""
+        span = custom_span(
+            "run_guard",
+            data={
+                "reason": self.reason,
+                "tool": self.tool,
+                "turn": turn,
+                "failures": self.failures,
+            },
+            parent=parent,
+        )
+        span.start()
+        span.set_error(SpanError(message="Run stopped by the guard", data={"reason": self.reason}))
+        span.finish()
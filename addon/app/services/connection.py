@@ -1,8 +1,9 @@
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import Connection as ConnectionModel
-from ..models import Connection, ConnectionCreate, ConnectionUpdate
+from ..db import Connection as ConnectionModel, ConnectionPoolMember
+from ..llm import ConnectionPool
+from ..models import Connection, ConnectionCreate, ConnectionUpdate, ConnectionStatus
 
 
 def mask_api_key(api_key: str | None) -> str | None:
@@ -125,4 +126,57 @@ class ConnectionService:
             if mask_key:
                 validated_connection.api_key = mask_api_key(validated_connection.api_key)
             return validated_connection
-        return None 
\ No newline at end of file
+        return None 
+
+    @staticmethod
+    async def set_pool_member(
+        db: AsyncSession,
+        connection_id: int,
+        in_pool: bool,
+        tier: str | None = None,
+    ) -> Connection:
+        """Add a connection to, or remove it from, the pool, optionally setting its tier."""
+        result = await db.execute(
+            select(ConnectionModel).where(ConnectionModel.id == connection_id)
+        )
+        connection = result.scalar_one()
+        if in_pool and connection.pool_member is None:
+            connection.pool_member = ConnectionPoolMember(tier=tier or "large")
+        elif in_pool and tier is not None:
+            connection.pool_member.tier = tier
+        elif not in_pool:
+            connection.pool_member = None
+        await db.commit()
+
+        validated_connection = Connection.model_validate(connection)
+        validated_connection.api_key = mask_api_key(validated_connection.api_key)
+        return validated_connection
+
+    @staticmethod
+    async def get_pool_connections(db: AsyncSession, mask_key: bool = True) -> list[Connection]:
+        """Get the connections requests are routed to.
+
+        These are the pool members, or the active connection if the pool is empty.
+        """
+        connections = [
+            connection
+            for connection in await ConnectionService.get_connections(db, mask_key=mask_key)
+            if connection.in_pool
+        ]
+        if connections:
+            return connections
+        active_connection = await ConnectionService.get_active_connection(db, mask_key=mask_key)
+        return [active_connection] if active_connection else []
+
+    @staticmethod
+    async def get_pool_status(db: AsyncSession, pool: ConnectionPool) -> list[ConnectionStatus]:
+        """Get the routing state of the connections requests are routed to."""
+        return [
+            ConnectionStatus(
+                id=connection.id,
+                url=connection.url,
+                model=connection.model,
+                **pool.status(connection),
+            )
+            for connection in await ConnectionService.get_pool_connections(db, mask_key=False)
+        ]
@@ -1,8 +1,16 @@
+import asyncio
 import logging
-from typing import Any, Dict, List
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from typing import Any, Dict, List, Literal
 import httpx
-from openai import AsyncOpenAI
-from openai.types.responses import ResponseTextDeltaEvent
+from openai.types.responses import (
+    ResponseCreatedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemDoneEvent,
+    ResponseTextDeltaEvent,
+)
 from sqlalchemy import Engine, desc, func, select, asc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
@@ -12,17 +20,17 @@ import yaml
 
 from agents import (
     Agent,
+    Model,
     Runner,
     OpenAIChatCompletionsModel,
     Tool,
     ModelSettings,
     RunContextWrapper,
     RunConfig,
+    RunResultStreaming,
     set_trace_processors,
 )
 from agents.tracing.processors import BatchTraceProcessor
-from agents.extensions.memory.sqlalchemy_session import SQLAlchemySession
-from sqlalchemy.ext.asyncio import AsyncEngine
 
 from ..db import Span, Trace
 from ..models import (
@@ -31,23 +39,115 @@ from ..models import (
     ConversationRequest,
     ConversationResponse,
     Connection,
+    Location,
+    ToolProgress,
 )
 from .connection import ConnectionService
 from ..tracing import HASpanExporter
+from ..llm import (
+    AdmissionController,
+    AdmissionModel,
+    ConnectionPool,
+    ConstrainedToolCallModel,
+    DeadlineModel,
+    GUIDED_BACKENDS,
+    ModelRouter,
+    PoolModel,
+    Priority,
+    SpeculativeModel,
+    TokenTimingModel,
+    ToolSelectionModel,
+    record_route,
+)
+from ..llm.router import Route
+from ..memory import SessionStore
+from ..metrics import (
+    CACHE_LOOKUPS,
+    ENTITY_FETCH_SECONDS,
+    LLM_TTFT_SECONDS,
+    PROMPT_BUILD_SECONDS,
+    REQUEST_SECONDS,
+    REQUESTS,
+    TURNS,
+)
+from ..runtime import (
+    Deadline,
+    DeadlineExceeded,
+    cancel_run,
+    cancel_on_disconnect,
+    cancel_when,
+    record_cancellation,
+    record_deadline_exceeded,
+    RunGuard,
+)
+from ..tools.resolver import EntityResolver, entity_areas, entity_names
+from ..tools.selection import ToolSelector
+from ..tools.speculation import READ_ONLY_TOOLS, SpeculativeTools
+from ..tools.tools import list_entities
 from ..settings import get_settings
+from ..specialists import build_triage_agent
 
 _LOGGER = logging.getLogger('uvicorn.error')
 
-def construct_prompt(home_entities: str) -> str:
+def construct_prompt(
+    home_entities: str,
+    location: Location | None = None,
+    other_areas_summarized: bool = False,
+    hierarchical: bool = False,
+    live_states: str = "",
+) -> str:
     """Construct prompt for the agent."""
     prompt = dedent("""\
         You are a helpful assistant that helps with tasks around the home. You will be given instructions that you are asked to follow. You can use the tools provided to you to control devices in the home in order to complete the task. When you have completed the task, you should respond with a summary of the task and the result in first person (e.g. I turned on the lights).
         
-        Following is a detailed list of entities and devices currently in the home. You can use the `get_state` tool to get the current state of an entity before taking action.
-        """) + "\n" + home_entities
-    
+        """)
+
+    if live_states:
+        get_state_hint = "For entities whose current state is not given at the end, you can use the `get_state` tool to get it before taking action."
+    else:
+        get_state_hint = "You can use the `get_state` tool to get the current state of an entity before taking action."
+    if hierarchical:
+        prompt += dedent(f"""\
+            Following are the floors and areas of the home, with the number of entities of each domain they contain. Use the `list_entities` tool to get the entities of an area before acting on them. {get_state_hint}
+            """)
+    else:
+        prompt += dedent(f"""\
+            Following is a detailed list of entities and devices currently in the home. {get_state_hint}
+            """)
+
+    if location is not None and location.area:
+        floor = f" on the {location.floor} floor" if location.floor else ""
+        prompt += dedent(f"""\
+            The request comes from a device in the {location.area} area{floor}, devices mentioned without an area are most likely there. Its entities are listed first.
+            """)
+        if other_areas_summarized and not hierarchical:
+            prompt += dedent("""\
+                Other areas only come with a count of their entities per domain, refer to their entities by area and name (e.g. "bedroom lamp").
+                """)
+
+    prompt += "\n" + home_entities
+    if live_states:
+        prompt += dedent("""
+            Current state of the entities most relevant to the request, it is up to date so there is no need to call `get_state` for them:
+            """) + live_states
+
     return prompt
 
+DEADLINE_FALLBACK = "Sorry, this is taking too long. Please try again."
+GUARD_FALLBACK = "Sorry, I couldn't complete that request. Please try rephrasing it."
+
+# Attributes worth inlining with an entity's state, the others rarely decide an action
+_LIVE_STATE_ATTRIBUTES = [
+    "brightness", "current_temperature", "temperature", "hvac_action", "current_position",
+    "percentage", "volume_level", "is_volume_muted", "media_title", "media_artist",
+]
+
+def construct_summary_prompt() -> str:
+    """Construct prompt for summarizing older conversation history."""
+    return dedent("""\
+        Summarize the following conversation between a user and a home assistant in at most three short sentences. Keep facts that may matter later, such as which devices were controlled, their resulting state, timers that were set and open requests. Do not add anything that is not in the conversation.
+        """)
+
 class ConversationService:
     """Service for handling agent conversations."""
 
@@ -138,10 +238,16 @@ class ConversationService:
         return ConversationList(conversations=conversations)
 
     @staticmethod
-    async def fetch_home_entities(hass_client: httpx.AsyncClient) -> str:
-        """Fetch the home entities from the Home Assistant API."""
+    async def fetch_home(
+        hass_client: httpx.AsyncClient,
+        timeout: float | None = None,
+    ) -> tuple[dict[str, dict[str, Any]], dict[str, str]]:
+        """Fetch the home from the Home Assistant API.
+
+        Returns the entities keyed by entity id, and the floor of each area that is on one.
+        """
         try:
-            response = await hass_client.get("/home_agent/entities")
+            response = await hass_client.get("/home_agent/entities", timeout=timeout)
         except Exception as e:
             _LOGGER.error(f"Exception while fetching home entities: {e}", exc_info=True)
             raise RuntimeError("Failed to fetch home entities from Home Assistant API") from e
@@ -158,12 +264,134 @@ class ConversationService:
             raise RuntimeError("Received invalid JSON when fetching home entities") from e
 
         entities = data.get("entities") if isinstance(data, dict) else None
+        area_floors = (data.get("floors") if isinstance(data, dict) else None) or {}
 
         if entities:
-            return yaml.dump(list(entities.values()), sort_keys=False)
+            return entities, area_floors
         
         _LOGGER.warning("No entities were found in the home.")
-        return ""
+        return {}, area_floors
+
+    @staticmethod
+    async def fetch_states(
+        hass_client: httpx.AsyncClient,
+        entity_ids: list[str],
+        timeout: float | None = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Fetch the current state of entities from Home Assistant's state machine, keyed by entity id."""
+        if not entity_ids:
+            return {}
+        response = await hass_client.post(
+            "/home_agent/entities/states",
+            json={"entities": [{"entity_id": entity_id} for entity_id in entity_ids]},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return {
+            result["entity_id"]: result
+            for result in response.json().get("results", [])
+            if "error" not in result and "entity_id" in result
+        }
+
+    @staticmethod
+    def format_states(states: dict[str, dict[str, Any]], entities: dict[str, dict[str, Any]]) -> str:
+        """Format entity states compactly for the prompt, one entity per line."""
+        lines = []
+        for entity_id, state in states.items():
+            names = entity_names(entities.get(entity_id, {}))
+            attributes = state.get("attributes") or {}
+            value = f"{state.get('state')}"
+            if unit := attributes.get("unit_of_measurement"):
+                value += f" {unit}"
+            details = [
+                f"{attribute} {attributes[attribute]}"
+                for attribute in _LIVE_STATE_ATTRIBUTES
+                if attributes.get(attribute) is not None
+            ]
+            name = f"{names[0]} ({entity_id})" if names else entity_id
+            lines.append(f"- {name}: {', '.join([value, *details])}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @staticmethod
+    def format_home_entities(
+        entities: dict[str, dict[str, Any]],
+        area: str | None = None,
+        scope: Literal["all", "first", "summary"] = "all",
+    ) -> str:
+        """Format the home entities for the prompt.
+
+        With an `area` and a `scope` other than "all", the entities of that area are
+        listed first. With "summary", the entities of other areas are only counted
+        per domain. Entities without an area are always listed.
+        """
+        if not entities:
+            return ""
+        if area is None or scope == "all":
+            return yaml.dump(list(entities.values()), sort_keys=False)
+
+        local, unassigned, others = [], [], []
+        for entity_id, entity in entities.items():
+            areas = entity_areas(entity)
+            if not areas:
+                unassigned.append((entity_id, entity))
+            elif any(a.casefold() == area.casefold() for a in areas):
+                local.append((entity_id, entity))
+            else:
+                others.append((entity_id, entity))
+
+        if scope == "first":
+            return yaml.dump([entity for _, entity in local + unassigned + others], sort_keys=False)
+
+        counts: dict[str, dict[str, int]] = {}
+        for entity_id, entity in others:
+            domain = entity.get("domain") or entity_id.partition(".")[0]
+            per_domain = counts.setdefault(entity_areas(entity)[0], {})
+            per_domain[domain] = per_domain.get(domain, 0) + 1
+        summaries = [{"area": other_area, "domains": domains} for other_area, domains in counts.items()]
+        return yaml.dump([entity for _, entity in local + unassigned] + summaries, sort_keys=False)
+
+    @staticmethod
+    def format_home_hierarchy(
+        entities: dict[str, dict[str, Any]],
+        area_floors: dict[str, str],
+        area: str | None = None,
+    ) -> str:
+        """Format the home as floors and areas with their number of entities per domain.
+
+        The size of the result depends on the number of areas rather than entities,
+        entities are listed on demand by the `list_entities` tool. Those of `area`
+        are listed in full though.
+        """
+        local = []
+        floors: dict[str, dict[str, dict[str, int]]] = {}
+        for entity_id, entity in entities.items():
+            areas = entity_areas(entity)
+            if area is not None and any(a.casefold() == area.casefold() for a in areas):
+                local.append(entity)
+                continue
+            entity_area = areas[0] if areas else "No area"
+            floor = area_floors.get(entity_area, "No floor")
+            domains = floors.setdefault(floor, {}).setdefault(entity_area, {})
+            domain = entity.get("domain") or entity_id.partition(".")[0]
+            domains[domain] = domains.get(domain, 0) + 1
+
+        summaries = [{"floor": floor, "areas": areas} for floor, areas in floors.items()]
+        return yaml.dump(local + summaries, sort_keys=False)
+
+    @staticmethod
+    async def summarize_history(model: Model, text: str) -> str:
+        """Summarize conversation history with the given model."""
+        agent = Agent(
+            name="History summarizer",
+            model=model,
+            instructions=construct_summary_prompt(),
+            model_settings=ModelSettings(
+                max_tokens=200,
+                extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+            ),
+        )
+        result = await Runner.run(agent, text, run_config=RunConfig(tracing_disabled=True))
+        return result.final_output or ""
 
     @staticmethod
     async def process_conversation(
@@ -172,34 +400,117 @@ class ConversationService:
         tools: List[Tool],
         db: AsyncSession,
         db_engine: Engine,
-        session_engine: AsyncEngine,
+        session_store: SessionStore,
+        admission: AdmissionController | None = None,
+        connection_pool: ConnectionPool | None = None,
+        model_router: ModelRouter | None = None,
+        is_disconnected: Callable[[], Awaitable[bool]] | None = None,
+        deadline: Deadline | None = None,
     ):
-        """Process a conversation with the agent."""
+        """Process a conversation with the agent.
+
+        Yields the response text as it's streamed, and a `ToolProgress` as soon as the
+        model is done with a tool call, before the tool runs.
+
+        If `is_disconnected` is provided, the run is cancelled as soon as it reports the
+        client went away. Closing or cancelling the generator cancels the run as well.
+
+        If `deadline` is provided, model calls, tool calls and the run as a whole are
+        bounded by it and a spoken fallback is returned when it expires.
+
+        If `admission` is provided, model calls wait for a slot of the connection
+        according to the request priority.
+
+        Model calls are routed by `connection_pool` across the pool members (or the
+        active connection when the pool is empty).
+
+        If `model_router` is provided and the pool has "small" tier members, simple
+        requests are sent to those and escalated to the "large" tier if they fail
+        before anything was streamed or any tool other than a read-only one was called.
+        """
+        settings = get_settings()
+        request_started_at = time.perf_counter()
+        deadline = deadline or Deadline(None)
         set_trace_processors([BatchTraceProcessor(exporter=HASpanExporter(db_engine))])
 
-        active_connection: Connection | None = await ConnectionService.get_active_connection(db, mask_key=False)
+        connections: list[Connection] = await ConnectionService.get_pool_connections(db, mask_key=False)
 
-        if not active_connection:
+        if not connections:
             yield "No active connection found. Please configure a connection."
             return
+
+        area = conversation_request.location.area if conversation_request.location else None
+        area_scoped = area is not None and settings.prompt_area_scope != "all"
+        hierarchical = settings.entity_prompt == "hierarchical"
+        if hierarchical:
+            tools = [*tools, list_entities]
+
+        def format_entities(entities: dict[str, dict[str, Any]]) -> str:
+            return ConversationService.format_home_entities(entities, area=area, scope=settings.prompt_area_scope)
+
+        def prompt(home_entities: str, hierarchical: bool = False, live_states: str = "") -> str:
+            return construct_prompt(
+                home_entities=home_entities,
+                location=conversation_request.location if area_scoped else None,
+                other_areas_summarized=area_scoped and settings.prompt_area_scope == "summary",
+                hierarchical=hierarchical,
+                live_states=live_states,
+            )
         
         def instructions(ctx_wrapper: RunContextWrapper[Any], agent: Agent | None) -> str:
-            return construct_prompt(home_entities=ctx_wrapper.context["home_entities"])
+            with PROMPT_BUILD_SECONDS.time():
+                return prompt(
+                    ctx_wrapper.context["home_entities"],
+                    hierarchical=hierarchical,
+                    live_states=ctx_wrapper.context["live_states"],
+                )
+
+        def specialist_instructions(entities: dict[str, dict[str, Any]]) -> str:
+            with PROMPT_BUILD_SECONDS.time():
+                return prompt(format_entities(entities))
 
-        # We're constrained to creating a new httpx client for each connection because the base_url can't be changed at runtime
-        async with AsyncOpenAI(
-            base_url=active_connection.url,
-            api_key=active_connection.api_key,
-        ) as openai_client:
+        def build_model(connection: Connection, background: bool = False) -> Model:
+            # Background calls (summaries) run after the response, outside of its deadline
+            model_deadline = Deadline(None) if background else deadline
+            openai_client = connection_pool.client(connection)
+            if len(connections) > 1:
+                # Fail over to another connection rather than retrying
+                openai_client = openai_client.with_options(max_retries=0)
+            model: Model = DeadlineModel(
+                TokenTimingModel(
+                    OpenAIChatCompletionsModel(
+                        model=connection.model or "generic",
+                        openai_client=openai_client,
+                    )
+                ),
+                model_deadline,
+                turn_timeout=settings.llm_turn_timeout,
+                idle_timeout=settings.stream_idle_timeout,
+            )
+            model = ConstrainedToolCallModel(
+                model,
+                constrain=settings.constrained_tool_calls and connection.backend in GUIDED_BACKENDS,
+            )
+            if admission is not None:
+                # Queue time doesn't count against the turn timeout, only the deadline
+                model = AdmissionModel(
+                    model,
+                    admission,
+                    key=str(connection.id),
+                    priority=Priority.BACKGROUND if background else Priority[conversation_request.priority.upper()],
+                    deadline=model_deadline,
+                )
+            return model
+
+        def build_agent(model: Model) -> Agent:
             agent = Agent(
                 name="Home Agent",
-                model=OpenAIChatCompletionsModel(
-                    model=active_connection.model or "generic",
-                    openai_client=openai_client,
-                ),
+                model=model,
                 instructions=instructions,
                 tools=tools,
                 model_settings=ModelSettings(
+                    # Local backends only report usage when asked, which the token timing needs
+                    include_usage=True,
                     extra_body={
                         "chat_template_kwargs": {
                             "enable_thinking": False,
@@ -207,9 +518,39 @@ class ConversationService:
                     }
                 ),
             )
+            if settings.agent_topology == "triage":
+                return build_triage_agent(
+                    model,
+                    tools,
+                    specialist_instructions,
+                    general=agent,
+                    model_settings=agent.model_settings,
+                )
+            return agent
+
+        async with AsyncExitStack() as stack:
+            # Updated as the request goes, recorded however it ends
+            outcome = "error"
+            result: RunResultStreaming | None = None
+
+            def record_request() -> None:
+                REQUEST_SECONDS.observe(time.perf_counter() - request_started_at)
+                REQUESTS.inc(outcome=outcome)
+                if result is not None:
+                    TURNS.inc(result.current_turn)
+
+            stack.callback(record_request)
+
+            if connection_pool is None:
+                # Clients only live for the request
+                connection_pool = ConnectionPool(health_interval=None)
+                stack.push_async_callback(connection_pool.stop)
 
             try:
-                home_entities = await ConversationService.fetch_home_entities(hass_client)
+                with ENTITY_FETCH_SECONDS.time():
+                    home_entities, area_floors = await ConversationService.fetch_home(
+                        hass_client, timeout=deadline.timeout(settings.tool_timeout)
+                    )
             except Exception as e:
                 _LOGGER.error(f"Unable to fetch home entities: {e}", exc_info=True)
                 yield f"I apologize, but I could not fetch the home entities: {str(e)}"
@@ -218,32 +559,197 @@ class ConversationService:
             context: Dict[str, Any] = {
                 "conversation_id": conversation_request.conversation_id,
                 "language": conversation_request.language,
-                "home_entities": home_entities,
+                "home_entities": (
+                    ConversationService.format_home_hierarchy(
+                        home_entities, area_floors, area=area if area_scoped else None
+                    )
+                    if hierarchical else format_entities(home_entities)
+                ),
+                "entities": home_entities,
+                "entity_resolver": EntityResolver(home_entities),
+                "area": area,
                 "hass_client": hass_client,
+                "deadline": deadline,
             }
 
             input = conversation_request.text
 
-            try:
-                settings = get_settings()
-                session = SQLAlchemySession(
-                    conversation_request.conversation_id,
-                    engine=session_engine,
-                    create_tables=True,
-                )
-                result = Runner.run_streamed(
-                    starting_agent=agent,
-                    input=input,
-                    context=context,
-                    max_turns=settings.max_turns,
-                    session=session,
-                    run_config=RunConfig(group_id=conversation_request.conversation_id),
+            speculation = None
+            if settings.speculative_tools:
+                speculation = SpeculativeTools(context)
+                stack.push_async_callback(speculation.aclose)
+                tools = speculation.wrap(tools)
+
+            guard = RunGuard(
+                max_repeated_calls=settings.guard_repeated_calls,
+                max_oscillations=settings.guard_oscillations,
+                max_tool_failures=settings.guard_tool_failures,
+            )
+            tools = guard.wrap(tools)
+
+            # Saves the model a `get_state` turn for the entities the request most likely targets
+            context["live_states"] = ""
+            if settings.inline_states:
+                ranked = context["entity_resolver"].rank(input, area=area, limit=settings.inline_states)
+                try:
+                    states = await ConversationService.fetch_states(
+                        hass_client, ranked, timeout=deadline.timeout(settings.tool_timeout)
+                    )
+                    context["live_states"] = ConversationService.format_states(states, home_entities)
+                except Exception as e:
+                    _LOGGER.warning(f"Unable to fetch the state of {ranked}, leaving it to get_state: {e}")
+
+            routes: list[tuple[Route, list[Connection]]] = [("large", connections)]
+            small = [c for c in connections if c.tier == "small"]
+            large = [c for c in connections if c.tier != "small"]
+            decision = None
+            if model_router is not None and settings.router_enabled and small and large:
+                decision = model_router.classify(
+                    input,
+                    resolver=context["entity_resolver"],
+                    history_items=session_store.info(conversation_request.conversation_id).items,
                 )
-                async for event in result.stream_events():
-                    if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
-                        yield event.data.delta
+                routes = [("large", large)]
+                if decision.route == "small":
+                    routes.insert(0, ("small", small))
+
+            tool_selection = None
+            if settings.tool_selection and settings.agent_topology == "single":
+                # Specialists of the triage topology have their own small tool sets
+                tool_selection = ToolSelector().select(tools, input, resolver=context["entity_resolver"])
+
+            try:
+                session = await session_store.get_session(conversation_request.conversation_id)
+                loop = asyncio.get_running_loop()
+                for index, (route, route_connections) in enumerate(routes):
+                    can_escalate = index + 1 < len(routes)
+                    if can_escalate:
+                        # To undo the run if it has to be escalated
+                        history_last_id = await session.last_id()
+                    pool_model = PoolModel(
+                        connection_pool,
+                        route_connections,
+                        build_model,
+                        deadline=deadline,
+                        hedge_delay=settings.llm_hedge_delay,
+                    )
+                    model: Model = pool_model
+                    if tool_selection is not None:
+                        model = ToolSelectionModel(model, tool_selection)
+                    if speculation is not None:
+                        model = SpeculativeModel(model, speculation)
+                    started_at = loop.time()
+                    result = Runner.run_streamed(
+                        starting_agent=build_agent(model),
+                        input=input,
+                        context=context,
+                        max_turns=settings.max_turns,
+                        session=session,
+                        run_config=RunConfig(group_id=conversation_request.conversation_id),
+                    )
+                    streamed = False
+                    # Set once a tool with side effects was called, which the next tier would repeat
+                    acted = False
+                    # A turn's model call starts once the items of the previous turn are out
+                    turn_started_at = started_at
+                    try:
+                        try:
+                            async with (
+                                cancel_on_disconnect(result, is_disconnected) as disconnected,
+                                cancel_when(result, deadline.wait) as expired,
+                                cancel_when(result, guard.wait) as stopped,
+                            ):
+                                async for event in result.stream_events():
+                                    if event.type == "run_item_stream_event":
+                                        turn_started_at = loop.time()
+                                    elif event.type == "raw_response_event" and isinstance(event.data, ResponseCreatedEvent):
+                                        LLM_TTFT_SECONDS.observe(loop.time() - turn_started_at)
+                                    elif event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                                        streamed = True
+                                        yield event.data.delta
+                                    elif (
+                                        event.type == "raw_response_event"
+                                        and isinstance(event.data, ResponseOutputItemDoneEvent)
+                                        and isinstance(event.data.item, ResponseFunctionToolCall)
+                                    ):
+                                        acted = acted or event.data.item.name not in READ_ONLY_TOOLS
+                                        yield ToolProgress(name=event.data.item.name, call_id=event.data.item.call_id)
+                        except (asyncio.CancelledError, GeneratorExit):
+                            # The response stopped being consumed
+                            cancel_run(result)
+                            record_cancellation(result, "stream_closed")
+                            outcome = "cancelled"
+                            raise
+                    except Exception as e:
+                        # Failed or ran out of turns, hand over to the next tier unless
+                        # the user already heard something or something was done
+                        if (
+                            not can_escalate
+                            or streamed
+                            or acted
+                            or isinstance(e, DeadlineExceeded)
+                            or deadline.expired
+                        ):
+                            raise
+                        _LOGGER.warning(f"Route {route} failed, escalating: {e}")
+                        assert decision is not None and model_router is not None
+                        record_route(decision, route, parent=result.trace, error=str(e) or type(e).__name__)
+                        model_router.record(route, loop.time() - started_at, escalated=True)
+                        # The turns of the next tier's run are counted when the request ends
+                        TURNS.inc(result.current_turn)
+                        await session.remove_items_after(history_last_id)
+                        continue
+
+                    if decision is not None and model_router is not None:
+                        record_route(
+                            decision,
+                            route,
+                            parent=result.trace,
+                            escalated_from=routes[0][0] if index > 0 else None,
+                        )
+                        model_router.record(route, loop.time() - started_at)
+                    break
+
+                if speculation is not None:
+                    speculation.record(parent=result.trace)
+                    CACHE_LOOKUPS.inc(speculation.stats.hits, cache="speculation", result="hit")
+                    CACHE_LOOKUPS.inc(speculation.stats.started - speculation.stats.hits, cache="speculation", result="miss")
+
+                if disconnected.is_set():
+                    record_cancellation(result, "client_disconnected")
+                    outcome = "disconnected"
+                    return
+
+                if expired.is_set():
+                    record_deadline_exceeded("request", deadline, parent=result.trace)
+                    outcome = "deadline"
+                    yield DEADLINE_FALLBACK
+                    return
+
+                if stopped.is_set():
+                    guard.record(result.current_turn, parent=result.trace)
+                    outcome = "guard"
+                    yield GUARD_FALLBACK
+                    return
+
+                if settings.history_summarize:
+                    # Off the request path, ready for the next turn
+                    summary_model = PoolModel(
+                        connection_pool,
+                        pool_model.connections,
+                        lambda connection: build_model(connection, background=True),
+                    )
+                    session_store.summarize_in_background(
+                        conversation_request.conversation_id,
+                        lambda text: ConversationService.summarize_history(summary_model, text),
+                    )
 
+                outcome = "completed"
                 yield ""
+            except DeadlineExceeded as e:
+                _LOGGER.warning(f"Conversation ran out of time: {e}")
+                outcome = "deadline"
+                yield DEADLINE_FALLBACK
             except Exception as e:
                 _LOGGER.error(f"Error streaming conversation: {e}")
-                yield f"I apologize, but I encountered an error: {str(e)}"
\ No newline at end of file
+                yield f"I apologize, but I encountered an error: {str(e)}"
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from sqlalchemy import asc, desc, func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from collections.abc import AsyncIterator
+from typing import Any
+
+from pydantic_core import to_json
+from sqlalchemy import String, asc, desc, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import aliased
 
 from ..db import Span as SpanModel
@@ -9,6 +13,26 @@ from ..db import Trace as TraceModel
 from ..models import Span, ConversationNeighbors, TraceWithSpans
 
 
+def _raw_json(value: str | None) -> bytes:
+    """A JSON column as stored, SQL NULL being JSON null as well."""
+    return b"null" if value is None else value.encode()
+
+
+def _span_json(row: Any) -> bytes:
+    """Encode a span row as the JSON of `Span`."""
+    return b"".join((
+        b'{"id":', to_json(row.id),
+        b',"trace_id":', to_json(row.trace_id),
+        b',"parent_id":', to_json(row.parent_id),
+        b',"started_at":', to_json(row.started_at),
+        b',"ended_at":', to_json(row.ended_at),
+        b',"span_type":', to_json(row.span_type),
+        b',"span_data":', _raw_json(row.span_data),
+        b',"error":', _raw_json(row.error),
+        b"}",
+    ))
+
+
 class TraceService:
     @staticmethod
     async def get_spans_by_trace_id(db: AsyncSession, trace_id: str) -> list[Span]:
@@ -69,6 +93,69 @@ class TraceService:
 
         return trace_with_spans
 
+    @staticmethod
+    async def stream_traces_json(
+        sessionmaker: async_sessionmaker[AsyncSession], group_id: str
+    ) -> AsyncIterator[bytes]:
+        """Stream the JSON of a group's `ConversationTracesResponse`, a trace at a time.
+
+        Rows are encoded as they are read, the JSON columns being copied as stored
+        rather than parsed, validated and dumped again. The session is the stream's own
+        as it outlives the request handler.
+        """
+        trace_times = (
+            select(
+                SpanModel.trace_id.label("trace_id"),
+                func.min(SpanModel.started_at).label("started_at"),
+                func.max(SpanModel.ended_at).label("ended_at"),
+            )
+            .join(TraceModel, TraceModel.id == SpanModel.trace_id)
+            .where(TraceModel.group_id == group_id)
+            .group_by(SpanModel.trace_id)
+            .subquery()
+        )
+        spans = (
+            select(
+                trace_times.c.started_at.label("trace_started_at"),
+                trace_times.c.ended_at.label("trace_ended_at"),
+                SpanModel.id,
+                SpanModel.trace_id,
+                SpanModel.parent_id,
+                SpanModel.started_at,
+                SpanModel.ended_at,
+                SpanModel.span_type,
+                type_coerce(SpanModel.span_data, String).label("span_data"),
+                type_coerce(SpanModel.error, String).label("error"),
+            )
+            .join(trace_times, trace_times.c.trace_id == SpanModel.trace_id)
+            .order_by(trace_times.c.started_at.asc(), SpanModel.trace_id, SpanModel.started_at.asc())
+        )
+
+        yield b'{"group_id":' + to_json(group_id) + b',"traces":['
+        async with sessionmaker() as db:
+            result = await db.stream(spans)
+            trace_id: str | None = None
+            chunk: list[bytes] = []
+            async for row in result:
+                if row.trace_id != trace_id:
+                    if trace_id is not None:
+                        chunk.append(b"]},")
+                        yield b"".join(chunk)
+                        chunk = []
+                    trace_id = row.trace_id
+                    chunk.append(
+                        b'{"trace_id":' + to_json(trace_id)
+                        + b',"started_at":' + to_json(row.trace_started_at)
+                        + b',"ended_at":' + to_json(row.trace_ended_at)
+                        + b',"spans":['
+                    )
+                else:
+                    chunk.append(b",")
+                chunk.append(_span_json(row))
+            if trace_id is not None:
+                chunk.append(b"]}")
+            yield b"".join(chunk) + b"]}"
+
     @staticmethod
     async def get_group_neighbors(db: AsyncSession, group_id: str) -> ConversationNeighbors:
         """Get previous and next group_ids by ordering groups via latest generation span time."""
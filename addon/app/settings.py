@@ -2,6 +2,7 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
 import os
 from functools import lru_cache
+from typing import Literal
 from dotenv import load_dotenv
 
 
@@ -12,6 +13,62 @@ class Settings(BaseSettings):
     ha_api_key: str  # Bearer token for Home Assistant authentication
     db_path: Path
     max_turns: int = 5
+    # Agent session history, defaults mirror the integration's DEFAULT_MAX_HISTORY/MAX_HISTORY_SECONDS
+    max_history_items: int = 40  # Items (messages, tool calls and outputs) kept per conversation
+    max_history_seconds: int = 600  # Idle time after which a conversation is forgotten
+    max_history_bytes: int = 32 * 1024 * 1024  # Total size of all conversations
+    history_keep_turns: int | None = 3  # Turns replayed raw, older ones are compacted. None disables compaction
+    history_token_budget: int | None = 2000  # Approximate tokens of history replayed to the model
+    history_summarize: bool = False  # Summarize older history in the background
+    # Time budgets in seconds, all bounded by the request deadline sent by the integration
+    default_request_timeout: float | None = 60  # Used when the request carries no deadline
+    llm_turn_timeout: float | None = 30  # Per model call
+    stream_idle_timeout: float | None = 15  # Max time between two streamed model events
+    tool_timeout: float | None = 10  # Per Home Assistant call made by a tool
+    # Concurrent model calls allowed per connection, others wait in a priority queue.
+    # Matches a single-slot llama.cpp server by default
+    llm_max_concurrency: int = 1
+    # Connection pool
+    pool_failure_threshold: int = 3  # Consecutive failures opening a connection's circuit
+    pool_open_seconds: float = 30  # Time an open circuit keeps a connection out of rotation
+    pool_health_interval: float | None = 30  # Health check period of pool members, None disables checks
+    pool_health_timeout: float = 5
+    # Send the first LLM turn to a second pool member as well when the first one has
+    # streamed nothing after that many seconds. None disables hedging
+    llm_hedge_delay: float | None = None
+    # Requests scoring below the threshold go to "small" tier pool members when there are any
+    router_enabled: bool = True
+    router_threshold: float = 1.5
+    # Only send the model the tools relevant to the request, see app.tools.selection
+    tool_selection: bool = True
+    # "triage" hands requests off to domain specialists with their own tools and
+    # entities, see app.specialists
+    agent_topology: Literal["single", "triage"] = "single"
+    # Entities of the requesting device's area come first in the prompt ("first"), with
+    # the other areas only counted per domain ("summary"), or in no particular order ("all")
+    prompt_area_scope: Literal["all", "first", "summary"] = "summary"
+    # "hierarchical" only puts floors, areas and per area domain counts in the prompt
+    # and lets the model list the entities it needs, for very large installations
+    entity_prompt: Literal["full", "hierarchical"] = "full"
+    # Current state of that many entities, the ones most relevant to the request, is
+    # added to the prompt so the model doesn't have to call `get_state`. 0 disables it
+    inline_states: int = 3
+    # Run read-only tools (get_state, get_timer_status) as soon as their arguments are
+    # streamed, before the model's response is complete
+    speculative_tools: bool = True
+    # Retry tool calls whose arguments don't match the tool's schema with that tool
+    # required, which guided decoding backends (llama.cpp, vLLM, SGLang) constrain to the
+    # schema. Malformed calls are recorded as tool_call_validation spans either way
+    constrained_tool_calls: bool = True
+    # Stop runs stuck in a loop with a spoken error, see app.runtime.guard. None disables a check
+    guard_repeated_calls: int | None = 3  # Identical tool calls, the last one isn't made
+    guard_oscillations: int | None = 3  # Alternating on/off calls on the same entity
+    guard_tool_failures: int | None = 3  # Failed tool calls
+    # Streamed text is coalesced into SSE events sent once they reach that many bytes,
+    # have waited that many seconds, or (sentence flush) end a sentence
+    stream_max_bytes: int = 256
+    stream_max_delay: float | None = 0.1
+    stream_sentence_flush: bool = True
 
     model_config = SettingsConfigDict(
         env_prefix="HOME_AGENT_",
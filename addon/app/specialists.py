@@ -0,0 +1,105 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+from textwrap import dedent
+from typing import Any
+
+from agents import Agent, Model, ModelSettings, RunContextWrapper, Tool
+
+
+@dataclass(frozen=True)
+class Specialist:
+    """Sub-agent handling one kind of request with its own tools and entities."""
+    name: str
+    description: str  # Read by the triage agent to pick a specialist
+    tools: frozenset[str]
+    domains: frozenset[str]  # Domains of the entities listed in its prompt
+
+
+SPECIALISTS = [
+    Specialist(
+        "lighting",
+        "Lights and switches: turning them on or off, brightness and color.",
+        tools=frozenset({"turn_on", "turn_off", "set_light", "get_state"}),
+        domains=frozenset({"light", "switch"}),
+    ),
+    Specialist(
+        "climate_covers",
+        "Heating, cooling, fans, temperature and humidity, covers, blinds, garage doors and valves.",
+        tools=frozenset({"turn_on", "turn_off", "set_position", "get_state"}),
+        domains=frozenset({"climate", "fan", "humidifier", "water_heater", "cover", "valve", "sensor"}),
+    ),
+    Specialist(
+        "media",
+        "TVs, speakers and music: playback, tracks and volume.",
+        tools=frozenset({
+            "turn_on", "turn_off", "pause_media", "unpause_media", "next_track",
+            "previous_track", "set_volume", "get_state",
+        }),
+        domains=frozenset({"media_player"}),
+    ),
+    Specialist(
+        "timers",
+        "Timers, and the current date and time.",
+        tools=frozenset({
+            "start_timer", "cancel_timer", "cancel_all_timers", "increase_timer",
+            "decrease_timer", "pause_timer", "unpause_timer", "get_timer_status",
+            "get_date_time",
+        }),
+        domains=frozenset(),
+    ),
+]
+
+
+def construct_triage_prompt() -> str:
+    return dedent("""\
+        You route requests about the home to the assistant able to handle them. Always transfer the request to exactly one of the assistants available to you and never answer yourself. Transfer requests that involve several kinds of devices, or fit none of the assistants, to the general home assistant.
+        """)
+
+
+def build_triage_agent(
+    model: Model,
+    tools: list[Tool],
+    prompt: Callable[[dict[str, dict[str, Any]]], str],
+    general: Agent,
+    model_settings: ModelSettings | None = None,
+    specialists: list[Specialist] = SPECIALISTS,
+) -> Agent:
+    """Build a triage agent handing requests off to the specialists.
+
+    Each specialist only gets its own tools, and `prompt` is given the entities of
+    its domains, read from the run context's "entities". Requests that fit no
+    specialist are handed off to `general`.
+    """
+    model_settings = model_settings or ModelSettings()
+    by_name = {tool.name: tool for tool in tools}
+
+    def instructions_for(domains: frozenset[str]) -> Callable[[RunContextWrapper[Any], Agent], str]:
+        def instructions(ctx_wrapper: RunContextWrapper[Any], agent: Agent) -> str:
+            entities: dict[str, dict[str, Any]] = ctx_wrapper.context["entities"]
+            return prompt({
+                entity_id: entity for entity_id, entity in entities.items()
+                if entity_id.partition(".")[0] in domains
+            })
+        return instructions
+
+    agents: list[Agent] = [
+        Agent(
+            name=specialist.name,
+            handoff_description=specialist.description,
+            model=model,
+            instructions=instructions_for(specialist.domains),
+            tools=[by_name[name] for name in sorted(specialist.tools) if name in by_name],
+            model_settings=model_settings,
+        )
+        for specialist in specialists
+    ]
+    agents.append(general.clone(handoff_description="Everything else, and requests involving several kinds of devices."))
+
+    return Agent(
+        name="triage",
+        model=model,
+        instructions=construct_triage_prompt(),
+        handoffs=agents,  # type: ignore[arg-type]
+        # The only tools are the handoffs
+        model_settings=model_settings.resolve(ModelSettings(tool_choice="required")),
+    )
@@ -0,0 +1,105 @@
+import mimetypes
+import os
+import re
+import zlib
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Precompressed siblings written at build time (frontend/scripts/compress.mjs), by preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+# Vite's "[name]-[hash]" file names, whose content never changes
+_HASHED_NAME = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """Content codings of an `Accept-Encoding` header, leaving out the refused (q=0) ones."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        try:
+            if params and float(params.strip().removeprefix("q=")) == 0:
+                continue
+        except ValueError:
+            pass
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a response body as it's streamed."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+def is_hashed(name: str) -> bool:
+    return _HASHED_NAME.search(name) is not None
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles serving the `.br`/`.gz` sibling of a file to clients accepting it.
+
+    Files with a content hash in their name are cached by clients for good, the others
+    are revalidated with their ETag.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Precompressed variants of a file, by file
+        self._variants: dict[str, list[tuple[str, str, os.stat_result]]] = {}
+
+    def variants(self, full_path: str) -> list[tuple[str, str, os.stat_result]]:
+        variants = self._variants.get(full_path)
+        if variants is None:
+            variants = []
+            for encoding, suffix in ENCODINGS:
+                try:
+                    variants.append((encoding, full_path + suffix, os.stat(full_path + suffix)))
+                except OSError:
+                    continue
+            self._variants[full_path] = variants
+        return variants
+
+    def file_response(
+        self,
+        full_path: os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        name = Path(full_path).name
+        headers = {"cache-control": IMMUTABLE if is_hashed(name) else "no-cache"}
+        media_type = mimetypes.guess_type(name)[0]
+
+        variants = self.variants(str(full_path))
+        if variants:
+            headers["vary"] = "accept-encoding"
+            accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, variant_path, variant_stat in variants:
+                if encoding in accepted:
+                    full_path, stat_result = variant_path, variant_stat  # type: ignore[assignment]
+                    headers["content-encoding"] = encoding
+                    break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
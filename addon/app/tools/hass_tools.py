@@ -1,6 +1,15 @@
 from agents import RunContextWrapper, function_tool, FunctionTool
 from typing import Any, Optional
-from httpx import AsyncClient, Response
+from httpx import AsyncClient, Response, TimeoutException
+import logging
+import time
+
+from .resolver import EntityResolver, Resolution
+from ..metrics import TOOL_CALL_SECONDS, TOOL_FAILURES
+from ..runtime import Deadline, DeadlineExceeded, record_deadline_exceeded
+from ..settings import get_settings
+
+_LOGGER = logging.getLogger('uvicorn.error')
 
 # from homeassistant.helpers.intent
 INTENT_TURN_ON = "HassTurnOn"
@@ -60,16 +69,125 @@ intents_names = [
     # INTENT_GET_STATE,
 ]
 
+# Intents whose `name` slot refers to an entity (as opposed to e.g. a timer name)
+entity_intents = {
+    INTENT_TURN_ON,
+    INTENT_TURN_OFF,
+    INTENT_LIGHT_SET,
+    INTENT_LIST_ADD_ITEM,
+    INTENT_VACUUM_START,
+    INTENT_VACUUM_RETURN_TO_BASE,
+    INTENT_MEDIA_PAUSE,
+    INTENT_MEDIA_UNPAUSE,
+    INTENT_MEDIA_NEXT,
+    INTENT_MEDIA_PREVIOUS,
+    INTENT_SET_VOLUME,
+    INTENT_GET_TEMPERATURE,
+    INTENT_SET_POSITION,
+}
+
+# Intents that don't change the state of the home
+read_only_intents = {
+    INTENT_TIMER_STATUS,
+    INTENT_GET_CURRENT_DATE,
+    INTENT_GET_CURRENT_TIME,
+    INTENT_GET_TEMPERATURE,
+}
+
+def resolve_entity_name(
+    ctx_wrapper: RunContextWrapper[Any],
+    name: str,
+    domain: str | None = None,
+) -> Resolution | None:
+    """
+    Resolves an entity name produced by the model against the entity snapshot.
+    Returns None if no snapshot is available.
+    """
+    resolver: EntityResolver | None = ctx_wrapper.context.get("entity_resolver")
+    if resolver is None:
+        return None
+
+    start = time.perf_counter()
+    # Same-named entities are told apart by the area of the requesting device
+    resolution = resolver.resolve(name, domain=domain, area=ctx_wrapper.context.get("area"))
+    _LOGGER.debug(
+        f"Resolved entity name {name!r} (domain={domain}) to {resolution.name!r} "
+        f"with {len(resolution.candidates)} candidates in {(time.perf_counter() - start) * 1000:.2f} ms"
+    )
+    return resolution
+
+def hass_timeout(ctx_wrapper: RunContextWrapper[Any]) -> float | None:
+    """
+    Timeout for a Home Assistant call, bounded by the request deadline.
+    """
+    timeout = get_settings().tool_timeout
+    deadline: Deadline | None = ctx_wrapper.context.get("deadline")
+    if deadline is None:
+        return timeout
+    deadline.check("tool")
+    return deadline.timeout(timeout)
+
+async def hass_request(
+    ctx_wrapper: RunContextWrapper[Any],
+    method: str,
+    url: str,
+    **kwargs: Any,
+) -> Response:
+    """
+    Sends a request to Home Assistant within the tool time budget.
+    """
+    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
+    try:
+        return await hass_client.request(method, url, timeout=hass_timeout(ctx_wrapper), **kwargs)
+    except TimeoutException:
+        deadline: Deadline = ctx_wrapper.context.get("deadline") or Deadline(None)
+        record_deadline_exceeded("tool", deadline)
+        raise DeadlineExceeded("tool", "Home Assistant did not respond in time.") from None
+
+def _ambiguous_response(resolution: Resolution) -> dict:
+    """Builds an intent-like error response listing the candidates."""
+    return {
+        "response_type": "error",
+        "speech": {"plain": {"speech": resolution.ambiguity_message()}},
+    }
+
 async def handle_intent(
-    hass_client: AsyncClient,
+    ctx_wrapper: RunContextWrapper[Any],
     intent_name: str,
     slots: dict[str, Any],
 ) -> dict:
     """
     Calls Home Assistant to handle an intent.
+    Entity names are resolved locally first so that near misses (plurals, typos, area words)
+    don't cost a failed call, and ambiguous names are answered with the ranked candidates.
+    Once an intent changed something, the live states inlined in the prompt are dropped
+    as they may no longer be current.
     """
-    response: Response = await hass_client.post("/intent/handle", json={"name": intent_name, "data": slots})
-    return response.json()
+    if intent_name in entity_intents and "name" in slots:
+        resolution = resolve_entity_name(ctx_wrapper, slots["name"], slots.get("domain"))
+        if resolution is not None:
+            if resolution.is_ambiguous:
+                return _ambiguous_response(resolution)
+            if resolution.name is not None:
+                slots = {**slots, "name": resolution.name}
+                if resolution.area is not None:
+                    slots["area"] = resolution.area
+
+    tool = getattr(ctx_wrapper, "tool_name", intent_name)
+    started_at = time.perf_counter()
+    try:
+        response = await hass_request(ctx_wrapper, "POST", "/intent/handle", json={"name": intent_name, "data": slots})
+        result = response.json()
+    except Exception:
+        TOOL_FAILURES.inc(tool=tool)
+        raise
+    finally:
+        TOOL_CALL_SECONDS.observe(time.perf_counter() - started_at, tool=tool)
+    if result.get("response_type") == "error":
+        TOOL_FAILURES.inc(tool=tool)
+    elif intent_name not in read_only_intents and ctx_wrapper.context.get("live_states"):
+        ctx_wrapper.context["live_states"] = ""
+    return result
 
 @function_tool
 async def turn_on(
@@ -80,14 +198,13 @@ async def turn_on(
     """
     Turns on/opens/presses a device or entity. For locks, this performs a 'lock' action. Use for requests like 'turn on', 'activate', 'enable', or 'lock'. Always specify the domain of the entity.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     
-    response = await handle_intent(hass_client, INTENT_TURN_ON, {"name": name, "domain": domain})
+    response = await handle_intent(ctx_wrapper, INTENT_TURN_ON, {"name": name, "domain": domain})
     
     if response.get("response_type") == "action_done":
         return "Done."
     else:
-        return "Failed."
+        return response.get("speech", {}).get("plain", {}).get("speech") or "Failed."
 
 @function_tool
 async def turn_off(
@@ -98,14 +215,13 @@ async def turn_off(
     """
     Turns off/closes/releases a device or entity. For locks, this performs a 'unlock' action. Use for requests like 'turn off', 'deactivate', 'disable', or 'unlock'. Always specify the domain of the entity.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
 
-    response = await handle_intent(hass_client, INTENT_TURN_OFF, {"name": name, "domain": domain})
+    response = await handle_intent(ctx_wrapper, INTENT_TURN_OFF, {"name": name, "domain": domain})
 
     if response.get("response_type") == "action_done":
         return "Done."
     else:
-        return "Failed."
+        return response.get("speech", {}).get("plain", {}).get("speech") or "Failed."
     
 @function_tool
 async def start_timer(
@@ -116,7 +232,6 @@ async def start_timer(
     name: Optional[str] = None
 ) -> str:
     """Starts a new timer."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {}
     if hours is not None:
         slots["hours"] = hours
@@ -130,7 +245,7 @@ async def start_timer(
     if not slots:
         return "You must provide at least one of hours, minutes, or seconds to start a timer."
 
-    response = await handle_intent(hass_client, INTENT_START_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_START_TIMER, slots)
     
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -146,10 +261,9 @@ async def cancel_timer(
     name: str
 ) -> str:
     """Cancels a timer. You must provide the name of the timer to identify it."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_CANCEL_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_CANCEL_TIMER, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -164,8 +278,7 @@ async def cancel_all_timers(
     ctx_wrapper: RunContextWrapper[Any]
 ) -> str:
     """Cancels all active timers."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
-    response = await handle_intent(hass_client, INTENT_CANCEL_ALL_TIMERS, {})
+    response = await handle_intent(ctx_wrapper, INTENT_CANCEL_ALL_TIMERS, {})
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -184,7 +297,6 @@ async def increase_timer(
     seconds: Optional[int] = None,
 ) -> str:
     """Adds time to a running timer. You must specify which timer and how much time to add."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
     if hours is not None:
         slots["hours"] = hours
@@ -196,7 +308,7 @@ async def increase_timer(
     if not any([hours, minutes, seconds]):
         return "You must specify how much time to add."
 
-    response = await handle_intent(hass_client, INTENT_INCREASE_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_INCREASE_TIMER, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -215,7 +327,6 @@ async def decrease_timer(
     seconds: Optional[int] = None,
 ) -> str:
     """Removes time from a running timer. You must specify which timer and how much time to remove."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
     if hours is not None:
         slots["hours"] = hours
@@ -227,7 +338,7 @@ async def decrease_timer(
     if not any([hours, minutes, seconds]):
         return "You must specify how much time to remove."
 
-    response = await handle_intent(hass_client, INTENT_DECREASE_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_DECREASE_TIMER, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -243,10 +354,9 @@ async def pause_timer(
     name: str
 ) -> str:
     """Pauses a running timer. You must provide the name of the timer to identify it."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_PAUSE_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_PAUSE_TIMER, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -262,10 +372,9 @@ async def unpause_timer(
     name: str,
 ) -> str:
     """Resumes a paused timer. You must provide the name of the timer to identify it."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_UNPAUSE_TIMER, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_UNPAUSE_TIMER, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -281,10 +390,9 @@ async def get_timer_status(
     name: str,
 ) -> str:
     """Gets the status of a timer. You must provide the name of the timer to identify it."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_TIMER_STATUS, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_TIMER_STATUS, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -297,8 +405,7 @@ async def get_current_date(
     ctx_wrapper: RunContextWrapper[Any]
 ) -> str:
     """Gets the current date."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
-    response = await handle_intent(hass_client, INTENT_GET_CURRENT_DATE, {})
+    response = await handle_intent(ctx_wrapper, INTENT_GET_CURRENT_DATE, {})
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
         return speech
@@ -309,8 +416,7 @@ async def get_current_time(
     ctx_wrapper: RunContextWrapper[Any]
 ) -> str:
     """Gets the current time."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
-    response = await handle_intent(hass_client, INTENT_GET_CURRENT_TIME, {})
+    response = await handle_intent(ctx_wrapper, INTENT_GET_CURRENT_TIME, {})
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
         return speech
@@ -324,7 +430,6 @@ async def get_temperature(
     # floor: Optional[str] = None,
 ) -> str:
     """Gets the current temperature from a climate device or sensor."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {}
     if name:
         slots["name"] = name
@@ -332,7 +437,7 @@ async def get_temperature(
     #     slots["area"] = area
     # if floor:
     #     slots["floor"] = floor
-    response = await handle_intent(hass_client, INTENT_GET_TEMPERATURE, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_GET_TEMPERATURE, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -351,10 +456,9 @@ async def set_position(
         name: The name of the entity to set the position of.
         position: The position to set the entity to, between 0 and 100.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name, "position": position}
 
-    response = await handle_intent(hass_client, INTENT_SET_POSITION, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_SET_POSITION, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -377,7 +481,6 @@ async def set_light(
         brightness: The brightness of the light to set, between 0 and 100.
         color: The name of the color to set the light to.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {
         "name": name,
         "domain": "light", # Avoids confusion when a non-light entity with the same name exists
@@ -386,7 +489,7 @@ async def set_light(
         slots["brightness"] = brightness
     if color is not None:
         slots["color"] = color
-    response = await handle_intent(hass_client, INTENT_LIGHT_SET, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_LIGHT_SET, slots)
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
         return speech
@@ -406,9 +509,8 @@ async def add_list_item(
         name: The name of the list to add the item to.
         item: The item to add to the list.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name, "item": item}
-    response = await handle_intent(hass_client, INTENT_LIST_ADD_ITEM, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_LIST_ADD_ITEM, slots)
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
         return speech
@@ -422,10 +524,9 @@ async def start_vacuum(
     name: str,
 ) -> str:
     """Starts a vacuum cleaner."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_VACUUM_START, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_VACUUM_START, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -441,10 +542,9 @@ async def return_vacuum_to_base(
     name: str,
 ) -> str:
     """Tells a vacuum cleaner to return to its base/dock."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_VACUUM_RETURN_TO_BASE, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_VACUUM_RETURN_TO_BASE, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -460,10 +560,9 @@ async def pause_media(
     name: str,
 ) -> str:
     """Pauses a media player."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_MEDIA_PAUSE, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_MEDIA_PAUSE, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -479,10 +578,9 @@ async def unpause_media(
     name: str,
 ) -> str:
     """Unpauses a media player."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_MEDIA_UNPAUSE, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_MEDIA_UNPAUSE, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -498,10 +596,9 @@ async def next_track(
     name: str,
 ) -> str:
     """Skips to the next track on a media player."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_MEDIA_NEXT, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_MEDIA_NEXT, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -517,10 +614,9 @@ async def previous_track(
     name: str,
 ) -> str:
     """Skips to the previous track on a media player."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots = {"name": name}
 
-    response = await handle_intent(hass_client, INTENT_MEDIA_PREVIOUS, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_MEDIA_PREVIOUS, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -542,11 +638,10 @@ async def set_volume(
         volume_level: The volume level to set, between 0 and 100.
         name: The name of the media player to set the volume of.
     """
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
     slots: dict[str, Any] = {"volume_level": volume_level}
     slots["name"] = name
 
-    response = await handle_intent(hass_client, INTENT_SET_VOLUME, slots)
+    response = await handle_intent(ctx_wrapper, INTENT_SET_VOLUME, slots)
 
     speech = response.get("speech", {}).get("plain", {}).get("speech")
     if speech:
@@ -563,9 +658,15 @@ async def get_state(
     domain: str,
 ) -> str:
     """Gets the state of an entity."""
-    hass_client: AsyncClient = ctx_wrapper.context["hass_client"]
-
-    response = await hass_client.get("/home_agent/entities/state", params={"name": name, "domain": domain})
+    resolution = resolve_entity_name(ctx_wrapper, name, domain)
+    if resolution is not None:
+        if resolution.is_ambiguous:
+            return resolution.ambiguity_message()
+        if resolution.name is not None:
+            # The Home Assistant entity index understands area qualified names
+            name = f"{resolution.area} {resolution.name}" if resolution.area else resolution.name
+
+    response = await hass_request(ctx_wrapper, "GET", "/home_agent/entities/state", params={"name": name, "domain": domain})
     
     return response.json()
 
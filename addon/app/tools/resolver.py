@@ -0,0 +1,291 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+# Scores are in [0, 1], exact name matches short-circuit scoring
+MIN_SCORE = 0.5  # Below this a candidate is not considered at all
+CONFIDENT_SCORE = 0.75  # A single candidate above this is resolved without asking
+MIN_MARGIN = 0.15  # Required lead of the best candidate over the runner-up
+MAX_CANDIDATES = 5
+
+_STOPWORDS = {"the", "a", "an", "in", "on", "of", "my", "all"}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def singularize(token: str) -> str:
+    """Naive English singularization, good enough for device names."""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    return [
+        singularize(token) for token in normalize(text).split() if token not in _STOPWORDS
+    ]
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != cb),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def _tokens_match(a: str, b: str) -> bool:
+    """Whether two tokens are equal up to a small typo."""
+    if a == b:
+        return True
+    if max(len(a), len(b)) < 4:
+        return False
+    return edit_distance(a, b) <= (1 if max(len(a), len(b)) < 8 else 2)
+
+
+def _split_names(value: Any) -> list[str]:
+    """Entity names/areas come as comma separated strings from Home Assistant."""
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return []
+
+
+def entity_names(info: dict[str, Any]) -> list[str]:
+    """Names of an entity of the snapshot, its primary name first."""
+    return _split_names(info.get("names"))
+
+
+def entity_areas(info: dict[str, Any]) -> list[str]:
+    """Areas of an entity of the snapshot, its own area first."""
+    return _split_names(info.get("areas"))
+
+
+@dataclass
+class _IndexedEntity:
+    entity_id: str
+    domain: str
+    names: list[str]
+    areas: list[str]
+    name_tokens: list[list[str]]
+    area_tokens: set[str]
+
+
+@dataclass
+class Candidate:
+    entity_id: str
+    name: str
+    domain: str
+    area: str | None
+    score: float
+
+    def describe(self) -> str:
+        area = f" in {self.area}" if self.area else ""
+        return f"{self.name} ({self.domain}{area})"
+
+
+@dataclass
+class Resolution:
+    """Outcome of resolving a name.
+
+    `name` is set when the name could be resolved to a single entity, `candidates`
+    holds the ranked matches otherwise (empty if nothing came close).
+    """
+
+    query: str
+    name: str | None = None
+    entity_id: str | None = None
+    area: str | None = None  # Set when the resolved name alone is not unique
+    candidates: list[Candidate] = field(default_factory=list)
+
+    @property
+    def is_ambiguous(self) -> bool:
+        return self.name is None and len(self.candidates) > 0
+
+    def ambiguity_message(self) -> str:
+        options = "; ".join(c.describe() for c in self.candidates)
+        return (
+            f"Could not tell which entity '{self.query}' refers to. "
+            f"Possible matches: {options}. Retry with the exact name."
+        )
+
+
+class EntityResolver:
+    """Resolves the entity names produced by the model against the entity snapshot.
+
+    The snapshot is the `entities` mapping returned by the Home Assistant
+    `/home_agent/entities` endpoint, keyed by entity id.
+    """
+
+    def __init__(self, entities: dict[str, dict[str, Any]]):
+        self._entities: list[_IndexedEntity] = []
+        self._exact: dict[str, set[str]] = {}
+
+        for entity_id, info in entities.items():
+            domain = info.get("domain") or entity_id.partition(".")[0]
+            names = entity_names(info)
+            areas = entity_areas(info)
+            if not names:
+                continue
+            area_tokens = {t for area in areas for t in tokenize(area)}
+            indexed = _IndexedEntity(
+                entity_id=entity_id,
+                domain=domain,
+                names=names,
+                areas=areas,
+                name_tokens=[tokenize(name) for name in names],
+                area_tokens=area_tokens,
+            )
+            self._entities.append(indexed)
+            for name in names:
+                self._exact.setdefault(normalize(name), set()).add(entity_id)
+
+        self._by_id = {entity.entity_id: entity for entity in self._entities}
+
+    def mentions(self, text: str) -> set[str]:
+        """Ids of the entities whose exact name appears in `text`."""
+        padded = f" {normalize(text)} "
+        return {
+            entity_id
+            for name, entity_ids in self._exact.items()
+            if f" {name} " in padded
+            for entity_id in entity_ids
+        }
+
+    def rank(self, text: str, area: str | None = None, limit: int = 5) -> list[str]:
+        """Ids of the entities `text` most likely refers to, best first.
+
+        Entities score the share of their name found in the text, with a bonus when
+        their area is mentioned or is `area` (the requesting device's).
+        """
+        tokens = set(tokenize(text))
+        if not tokens:
+            return []
+        area_hint = set(tokenize(area)) if area else set()
+
+        scored = []
+        for entity in self._entities:
+            score = max(
+                (sum(t in tokens for t in name_tokens) / len(name_tokens) for name_tokens in entity.name_tokens if name_tokens),
+                default=0.0,
+            )
+            if score == 0:
+                continue
+            if entity.area_tokens & tokens:
+                score += 0.25
+            elif area_hint and area_hint <= entity.area_tokens:
+                score += 0.2
+            if score >= MIN_SCORE:
+                scored.append((score, entity.entity_id))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [entity_id for _, entity_id in scored[:limit]]
+
+    def _score(
+        self, query_tokens: list[str], entity: _IndexedEntity, implied_tokens: list[str]
+    ) -> float:
+        best = 0.0
+        for name_tokens in entity.name_tokens:
+            if not name_tokens:
+                continue
+            available = set(name_tokens) | entity.area_tokens
+            matched = sum(
+                1 for q in query_tokens if any(_tokens_match(q, t) for t in available)
+            )
+            # Name tokens the query failed to mention, e.g. "light" for "kitchen light",
+            # unless implied by the requested domain
+            covered = sum(
+                1
+                for t in name_tokens
+                if any(_tokens_match(q, t) for q in query_tokens)
+                or t in implied_tokens
+            )
+            precision = matched / len(query_tokens)
+            recall = covered / len(name_tokens)
+            if precision == 0 or recall == 0:
+                continue
+            score = 2 * precision * recall / (precision + recall)
+            best = max(best, score * 0.95)  # Keep fuzzy matches below exact ones
+        return best
+
+    def resolve(
+        self,
+        name: str,
+        domain: str | None = None,
+        area: str | None = None,
+    ) -> Resolution:
+        """Resolve a name, optionally constrained to a domain and hinted by an area."""
+        resolution = Resolution(query=name)
+
+        exact = [
+            self._by_id[entity_id]
+            for entity_id in self._exact.get(normalize(name), ())
+            if domain is None or self._by_id[entity_id].domain == domain
+        ]
+        if len(exact) == 1:
+            resolution.name = name
+            resolution.entity_id = exact[0].entity_id
+            return resolution
+
+        query_tokens = tokenize(name)
+        if not query_tokens:
+            return resolution
+        area_hint = set(tokenize(area)) if area else set()
+        implied_tokens = tokenize(domain.replace("_", " ")) if domain else []
+
+        candidates: list[Candidate] = []
+        for entity in self._entities:
+            if domain is not None and entity.domain != domain:
+                continue
+            score = self._score(query_tokens, entity, implied_tokens)
+            if score < MIN_SCORE:
+                continue
+            if area_hint and area_hint & entity.area_tokens:
+                # The satellite's area breaks ties between same-named entities
+                score = min(score + 0.1, 0.99)
+            candidates.append(
+                Candidate(
+                    entity_id=entity.entity_id,
+                    name=entity.names[0],
+                    domain=entity.domain,
+                    area=entity.areas[0] if entity.areas else None,
+                    score=round(score, 3),
+                )
+            )
+
+        candidates.sort(key=lambda c: c.score, reverse=True)
+        candidates = candidates[:MAX_CANDIDATES]
+
+        if candidates:
+            best = candidates[0]
+            runner_up = candidates[1].score if len(candidates) > 1 else 0.0
+            if best.score >= CONFIDENT_SCORE and best.score - runner_up >= MIN_MARGIN:
+                resolution.name = best.name
+                resolution.entity_id = best.entity_id
+                if len(self._exact.get(normalize(best.name), ())) > 1:
+                    resolution.area = best.area
+                return resolution
+
+        resolution.candidates = candidates
+        return resolution
@@ -0,0 +1,139 @@
+import json
+from dataclasses import dataclass, field
+
+from agents import FunctionTool, Tool
+
+from .resolver import EntityResolver, normalize, singularize
+
+
+@dataclass(frozen=True)
+class ToolGroup:
+    """Tools that are only useful for some requests.
+
+    A group is selected when the request mentions one of its `words` (singularized),
+    one of its `phrases` (whole words, as written), or an entity of one of its `domains`.
+    """
+    name: str
+    tools: frozenset[str]
+    words: frozenset[str] = frozenset()
+    phrases: frozenset[str] = frozenset()
+    domains: frozenset[str] = frozenset()
+
+
+# Always sent, they cover most requests and the fallbacks of the others
+CORE_TOOLS = frozenset({"turn_on", "turn_off", "get_state", "get_date_time"})
+
+TOOL_GROUPS = [
+    ToolGroup(
+        "timers",
+        frozenset({
+            "start_timer", "cancel_timer", "cancel_all_timers", "increase_timer",
+            "decrease_timer", "pause_timer", "unpause_timer", "get_timer_status",
+        }),
+        words=frozenset({"timer", "hour", "minute", "remind", "alarm", "countdown"}),
+        # Not "second" or "left" alone, which also name floors and devices
+        phrases=frozenset({"seconds", "time left", "time is left", "time remaining", "how long"}),
+    ),
+    ToolGroup(
+        "lights",
+        frozenset({"set_light"}),
+        words=frozenset({"brightness", "bright", "brighter", "brighten", "dim", "dimmer", "color", "colour", "percent"}),
+        domains=frozenset({"light"}),
+    ),
+    ToolGroup(
+        "covers",
+        frozenset({"set_position"}),
+        words=frozenset({"position", "percent", "halfway", "blind", "shade", "shutter", "curtain"}),
+        domains=frozenset({"cover", "valve"}),
+    ),
+    ToolGroup(
+        "media",
+        frozenset({"pause_media", "unpause_media", "next_track", "previous_track", "set_volume"}),
+        words=frozenset({
+            "music", "song", "track", "playing", "pause", "resume", "volume", "louder",
+            "quieter", "skip", "next", "previous", "tv", "speaker",
+        }),
+        domains=frozenset({"media_player"}),
+    ),
+    ToolGroup(
+        "vacuum",
+        frozenset({"start_vacuum", "return_vacuum_to_base"}),
+        words=frozenset({"vacuum", "clean", "dock"}),
+        domains=frozenset({"vacuum"}),
+    ),
+    ToolGroup(
+        "lists",
+        frozenset({"add_list_item"}),
+        words=frozenset({"list", "shopping", "todo", "buy"}),
+        domains=frozenset({"todo"}),
+    ),
+]
+
+
+def estimate_schema_tokens(tool: Tool) -> int:
+    """Cheap estimate of the prompt tokens a tool definition costs (~4 characters per token)."""
+    if not isinstance(tool, FunctionTool):
+        return 0
+    return (len(tool.name) + len(tool.description or "") + len(json.dumps(tool.params_json_schema))) // 4 + 1
+
+
+@dataclass
+class ToolSelection:
+    """Tools sent to the model for a request.
+
+    The selection only grows: when the model calls a tool that wasn't sent (all
+    tools stay registered on the agent, so such calls still run), the tool's group
+    is added for the following turns.
+    """
+    selected: set[str]
+    groups: dict[str, ToolGroup] = field(default_factory=dict)  # By tool name
+    expanded: list[str] = field(default_factory=list)  # Tools added after the model asked for them
+
+    def filter(self, tools: list[Tool]) -> list[Tool]:
+        return [tool for tool in tools if tool.name in self.selected]
+
+    def expand(self, tool_name: str) -> bool:
+        """Add a tool the model asked for, returns whether it was missing."""
+        if tool_name in self.selected:
+            return False
+        group = self.groups.get(tool_name)
+        self.selected |= group.tools if group is not None else {tool_name}
+        self.expanded.append(tool_name)
+        return True
+
+
+class ToolSelector:
+    """Selects the tools plausibly relevant to a request.
+
+    Relevance comes from words of the request and the domains of the entities it
+    mentions, see `TOOL_GROUPS`. Tools that belong to no group are always sent.
+    """
+
+    def __init__(self, groups: list[ToolGroup] = TOOL_GROUPS, core: frozenset[str] = CORE_TOOLS):
+        self.groups = groups
+        self.core = core
+        self._group_by_tool = {name: group for group in groups for name in group.tools}
+
+    def select(
+        self,
+        tools: list[Tool],
+        text: str,
+        resolver: EntityResolver | None = None,
+    ) -> ToolSelection:
+        normalized = normalize(text)
+        words = {singularize(word) for word in normalized.split()}
+        padded = f" {normalized} "
+        domains = (
+            {entity_id.partition(".")[0] for entity_id in resolver.mentions(text)}
+            if resolver is not None else set()
+        )
+
+        selected = {tool.name for tool in tools if tool.name in self.core or tool.name not in self._group_by_tool}
+        for group in self.groups:
+            if (
+                words & group.words
+                or domains & group.domains
+                or any(f" {phrase} " in padded for phrase in group.phrases)
+            ):
+                selected |= group.tools
+        return ToolSelection(selected=selected, groups=self._group_by_tool)
@@ -0,0 +1,151 @@
+import asyncio
+import dataclasses
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from agents import FunctionTool, Tool
+from agents.tool_context import ToolContext
+from agents.tracing import Span, Trace, custom_span
+from openai.types.responses import (
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemAddedEvent,
+    ResponseOutputItemDoneEvent,
+)
+
+_LOGGER = logging.getLogger('uvicorn.error')
+
+# Tools without side effects, safe to run before the model's response is final
+READ_ONLY_TOOLS = frozenset({"get_state", "get_timer_status"})
+
+
+@dataclass
+class _Call:
+    name: str
+    call_id: str
+    arguments: str = ""
+    task: asyncio.Task | None = None
+    started_at: float = 0.0
+    finished_at: float | None = None
+
+
+@dataclass
+class SpeculationStats:
+    started: int = 0
+    hits: int = 0  # Speculative results the run used
+    saved: float = 0.0  # Seconds of tool time that overlapped the model's response
+    hit_tools: list[str] = field(default_factory=list)
+
+
+class SpeculativeTools:
+    """Runs read-only tool calls while the model is still streaming its response.
+
+    `observe` is fed the model's stream events and starts a read-only tool as soon as
+    the arguments of its call form a complete JSON object. The tools returned by
+    `wrap` then reuse the speculative result when the run invokes them, rather than
+    calling Home Assistant again. Mutating tools are never started early and only
+    run once the response is final, as usual.
+    """
+
+    def __init__(self, context: dict[str, Any], read_only: frozenset[str] = READ_ONLY_TOOLS):
+        self.context = context
+        self.read_only = read_only
+        self.stats = SpeculationStats()
+        self._tools: dict[str, FunctionTool] = {}
+        self._streaming: dict[int, _Call] = {}  # By output index
+        self._calls: dict[str, _Call] = {}  # By call id
+
+    def wrap(self, tools: list[Tool]) -> list[Tool]:
+        wrapped: list[Tool] = []
+        for tool in tools:
+            if isinstance(tool, FunctionTool) and tool.name in self.read_only:
+                self._tools[tool.name] = tool
+                tool = dataclasses.replace(tool, on_invoke_tool=self._invoker(tool))
+            wrapped.append(tool)
+        return wrapped
+
+    def observe(self, event: Any) -> None:
+        if isinstance(event, ResponseOutputItemAddedEvent):
+            item = event.item
+            if isinstance(item, ResponseFunctionToolCall) and item.name in self._tools:
+                self._streaming[event.output_index] = _Call(name=item.name, call_id=item.call_id)
+        elif isinstance(event, ResponseFunctionCallArgumentsDeltaEvent):
+            call = self._streaming.get(event.output_index)
+            if call is not None:
+                call.arguments += event.delta
+                if call.arguments.rstrip().endswith("}"):
+                    self._start_if_complete(event.output_index)
+        elif isinstance(event, ResponseOutputItemDoneEvent):
+            if event.output_index in self._streaming:
+                self._start_if_complete(event.output_index)
+
+    def _start_if_complete(self, output_index: int) -> None:
+        call = self._streaming[output_index]
+        try:
+            json.loads(call.arguments)
+        except ValueError:
+            return
+        del self._streaming[output_index]
+
+        loop = asyncio.get_running_loop()
+        tool = self._tools[call.name]
+        ctx = ToolContext(context=self.context, tool_name=call.name, tool_call_id=call.call_id)
+
+        def finished(_: asyncio.Task) -> None:
+            call.finished_at = loop.time()
+
+        call.started_at = loop.time()
+        call.task = asyncio.create_task(tool.on_invoke_tool(ctx, call.arguments))
+        call.task.add_done_callback(finished)
+        self._calls[call.call_id] = call
+        self.stats.started += 1
+        _LOGGER.debug(f"Started {call.name}({call.arguments}) speculatively")
+
+    def _invoker(self, tool: FunctionTool):
+        async def invoke(ctx: ToolContext[Any], arguments: str) -> Any:
+            call = self._calls.pop(ctx.tool_call_id, None)
+            if call is None or call.task is None or call.arguments != arguments:
+                return await tool.on_invoke_tool(ctx, arguments)
+
+            loop = asyncio.get_running_loop()
+            invoked_at = loop.time()
+            try:
+                result = await call.task
+            except Exception as e:
+                _LOGGER.debug(f"Speculative {call.name} failed, calling it again: {e}")
+                return await tool.on_invoke_tool(ctx, arguments)
+
+            # The part of the call that ran before the run got to it
+            saved = min(invoked_at, call.finished_at or invoked_at) - call.started_at
+            self.stats.hits += 1
+            self.stats.saved += saved
+            self.stats.hit_tools.append(call.name)
+            return result
+        return invoke
+
+    async def aclose(self) -> None:
+        """Cancel the speculative calls the run didn't use."""
+        tasks = [call.task for call in self._calls.values() if call.task is not None and not call.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._calls.clear()
+
+    def record(self, parent: Trace | Span[Any] | None = None) -> None:
+        """Record what speculation saved the run in its trace."""
+        if not self.stats.started:
+            return
+        span = custom_span(
+            "speculation",
+            data={
+                "started": self.stats.started,
+                "hits": self.stats.hits,
+                "tools": self.stats.hit_tools,
+                "saved": round(self.stats.saved, 4),
+            },
+            parent=parent,
+        )
+        span.start()
+        span.finish()
@@ -1,7 +1,10 @@
 from agents import function_tool, RunContextWrapper, FunctionTool
-from typing import Any
+from typing import Any, Optional
 from datetime import datetime
 
+from .resolver import entity_areas, normalize
+from ..metrics import CACHE_LOOKUPS
+
 @function_tool
 async def get_date_time(
     ctx_wrapper: RunContextWrapper[Any],
@@ -10,6 +13,46 @@ async def get_date_time(
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+@function_tool
+async def list_entities(
+    ctx_wrapper: RunContextWrapper[Any],
+    area: str,
+    domain: Optional[str] = None,
+) -> list[dict[str, Any]] | dict[str, str]:
+    """List the entities of an area of the home.
+
+    Args:
+        area: Name of the area, e.g. "Kitchen". Use "No area" for entities not assigned to any area.
+        domain: Only list the entities of this domain, e.g. "light".
+    """
+    # Listings are served from the entity snapshot of the run and cached for its duration
+    cache: dict[tuple[str, str | None], Any] = ctx_wrapper.context.setdefault("entity_listings", {})
+    key = (normalize(area), domain)
+    if key in cache:
+        CACHE_LOOKUPS.inc(cache="entity_listings", result="hit")
+        return cache[key]
+    CACHE_LOOKUPS.inc(cache="entity_listings", result="miss")
+
+    entities: dict[str, dict[str, Any]] = ctx_wrapper.context.get("entities") or {}
+    listing = []
+    known_areas = set()
+    for entity_id, entity in entities.items():
+        areas = entity_areas(entity) or ["No area"]
+        known_areas.add(areas[0])
+        if key[0] not in {normalize(a) for a in areas}:
+            continue
+        if domain is not None and (entity.get("domain") or entity_id.partition(".")[0]) != domain:
+            continue
+        listing.append(entity)
+
+    if not listing and key[0] not in {normalize(a) for a in known_areas}:
+        result: Any = {"error": f"Unknown area '{area}'. Known areas: {', '.join(sorted(known_areas))}."}
+    else:
+        result = listing
+    cache[key] = result
+    return result
+
+
 def get_tools() -> list[FunctionTool]:
     return [
         get_date_time,
@@ -1,3 +1,3 @@
-from .processor import HASpanExporter
+from .processor import HASpanExporter, record_generation_timing
 
-__all__ = ["HASpanExporter"]
\ No newline at end of file
+__all__ = ["HASpanExporter", "record_generation_timing"]
\ No newline at end of file
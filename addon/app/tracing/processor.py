@@ -1,4 +1,6 @@
 import json
+import threading
+from collections import OrderedDict
 from agents.tracing.processor_interface import TracingExporter
 from agents import Span, Trace
 from typing import Any
@@ -8,6 +10,29 @@ from sqlalchemy.orm import sessionmaker
 
 from ..db.models import Span as SpanModel
 from ..db.models import Trace as TraceModel
+from ..metrics import LLM_SECONDS
+
+# Timing of generation spans not exported yet, by span id
+_generation_timings: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_generation_timings_lock = threading.Lock()
+# Bounds the timings of spans that never get exported, e.g. with tracing disabled
+_MAX_PENDING_TIMINGS = 256
+
+
+def record_generation_timing(span_id: str, timing: dict[str, Any]) -> None:
+    """Store `timing` with the generation span `span_id` when it's exported.
+
+    Must be called before the span ends.
+    """
+    with _generation_timings_lock:
+        _generation_timings[span_id] = timing
+        while len(_generation_timings) > _MAX_PENDING_TIMINGS:
+            _generation_timings.popitem(last=False)
+
+
+def _pop_generation_timing(span_id: str) -> dict[str, Any] | None:
+    with _generation_timings_lock:
+        return _generation_timings.pop(span_id, None)
 
 
 class HASpanExporter(TracingExporter):
@@ -45,18 +70,30 @@ class HASpanExporter(TracingExporter):
                     if not trace:
                         continue
 
+                    started_at = datetime.fromisoformat(item.get("started_at", "0"))
+                    ended_at = datetime.fromisoformat(item.get("ended_at", "0"))
+                    span_data = item.get("span_data")
+                    if span_data.get("type") == "generation": # type: ignore
+                        if timing := _pop_generation_timing(item.get("id")): # type: ignore
+                            span_data = {**span_data, "timing": timing} # type: ignore
                     span = SpanModel(
                         id=item.get("id"),
                         trace_id=trace_id,
                         parent_id=item.get("parent_id"),
-                        started_at=datetime.fromisoformat(item.get("started_at", "0")),
-                        ended_at=datetime.fromisoformat(item.get("ended_at", "0")),
-                        span_type=item.get("span_data").get("type"), # type: ignore
-                        span_data=item.get("span_data"),
+                        started_at=started_at,
+                        ended_at=ended_at,
+                        span_type=span_data.get("type"), # type: ignore
+                        span_data=span_data,
                         error=item.get("error"),
                     )
                     session.add(span)
 
+                    if span_data.get("type") == "generation": # type: ignore
+                        LLM_SECONDS.observe(
+                            (ended_at - started_at).total_seconds(),
+                            model=span_data.get("model") or "unknown", # type: ignore
+                        )
+
             session.commit()
 
         
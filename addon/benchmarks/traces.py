@@ -0,0 +1,115 @@
+"""Compare the conversation traces endpoint with the model-based path it replaced.
+
+Usage: uv run python -m benchmarks.traces [--traces 50] [--spans 20] [--runs 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api import router as api_router
+from app.db import Span, Trace
+from app.db.base import Base
+from app.dependencies import get_db
+from app.models import ConversationTracesResponse
+from app.services import TraceService
+
+MESSAGES = [
+    {"role": "system", "content": "You are a voice assistant for Home Assistant. " * 40},
+    {"role": "user", "content": "Turn on the kitchen light and tell me the temperature outside."},
+    {"role": "assistant", "tool_calls": [{"id": "call_1", "type": "function", "function": {"name": "turn_on", "arguments": "{\"name\": \"Kitchen Light\", \"domain\": \"light\"}"}}]},
+    {"role": "tool", "tool_call_id": "call_1", "content": "Done."},
+]
+
+
+async def populate(sessionmaker: async_sessionmaker[AsyncSession], traces: int, spans: int) -> None:
+    start = datetime(2025, 1, 1)
+    async with sessionmaker() as db:
+        for t in range(traces):
+            db.add(Trace(id=f"trace_{t}", workflow_name="Agent workflow", group_id="conversation"))
+            for s in range(spans):
+                at = start + timedelta(minutes=t, seconds=s)
+                db.add(Span(
+                    id=f"span_{t}_{s}",
+                    trace_id=f"trace_{t}",
+                    parent_id=f"span_{t}_0" if s else None,
+                    started_at=at,
+                    ended_at=at + timedelta(milliseconds=800),
+                    span_type="generation",
+                    span_data={"input": MESSAGES, "output": [MESSAGES[2]], "model": "generic", "usage": {"input_tokens": 1200, "output_tokens": 24}},
+                    error=None,
+                ))
+        await db.commit()
+
+
+def build_app(sessionmaker: async_sessionmaker[AsyncSession]) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def db_state(request: Request, call_next):
+        request.state.db = sessionmaker
+        return await call_next(request)
+
+    # The previous implementation: ORM rows validated into models, validated again
+    # against the response model and dumped by FastAPI
+    @app.get("/baseline/{group_id}", response_model=ConversationTracesResponse)
+    async def baseline(group_id: str, db: AsyncSession = Depends(get_db)) -> ConversationTracesResponse:
+        traces = await TraceService.get_traces_with_spans_by_group_id(db, group_id)
+        return ConversationTracesResponse(group_id=group_id, traces=traces)
+
+    app.include_router(api_router)
+    return app
+
+
+async def measure(client: httpx.AsyncClient, url: str, runs: int, accept_encoding: str) -> tuple[float, int]:
+    durations = []
+    size = 0
+    for _ in range(runs):
+        started_at = time.perf_counter()
+        response = await client.get(url, headers={"Accept-Encoding": accept_encoding})
+        await response.aread()
+        durations.append(time.perf_counter() - started_at)
+        response.raise_for_status()
+        size = response.num_bytes_downloaded  # Before decoding
+    return statistics.median(durations), size
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--traces", type=int, default=50)
+    parser.add_argument("--spans", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(directory) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+        await populate(sessionmaker, args.traces, args.spans)
+
+        transport = httpx.ASGITransport(app=build_app(sessionmaker))
+        async with httpx.AsyncClient(transport=transport, base_url="http://addon") as client:
+            cases = [
+                ("baseline", "/baseline/conversation", "identity"),
+                ("streamed", "/api/frontend/conversations/conversation/traces", "identity"),
+                ("streamed+gzip", "/api/frontend/conversations/conversation/traces", "gzip"),
+            ]
+            print(f"{args.traces} traces x {args.spans} spans, median of {args.runs} runs")
+            for name, url, accept_encoding in cases:
+                await measure(client, url, 2, accept_encoding)  # Warm up
+                duration, size = await measure(client, url, args.runs, accept_encoding)
+                print(f"{name:>14}: {duration * 1000:8.1f} ms {size / 1024:10.1f} KiB")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -22,7 +22,7 @@ import {
   MenuItem,
   MenuItems,
 } from "@headlessui/react";
-import { Check, ChevronDown, MoreVertical, Trash2, AlertCircle } from "lucide-react";
+import { Check, ChevronDown, MoreVertical, Trash2, AlertCircle, Layers, Zap } from "lucide-react";
 import Loading from "../../components/Loading";
 import Breadcrumbs from "../../components/Breadcrumbs";
 
@@ -33,6 +33,8 @@ interface Connection {
   backend: string;
   model: string | null;
   is_active: boolean;
+  in_pool: boolean;
+  tier: "small" | "large";
 }
 
 interface Model {
@@ -191,6 +193,29 @@ export default function ConnectionsLlm() {
     }
   };
 
+  const handleUpdatePool = async (
+    connection: Connection,
+    update: { in_pool: boolean; tier?: "small" | "large" }
+  ) => {
+    try {
+      const response = await fetch(`api/frontend/connections/${connection.id}/pool`, {
+        method: "PUT",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(update),
+      });
+      if (!response.ok) {
+        throw new Error("Failed to update pool");
+      }
+      await fetchConnections();
+    } catch (err) {
+      if (err instanceof Error) {
+        setError(err.message);
+      } else {
+        setError("An unknown error occurred");
+      }
+    }
+  };
+
   const handleDeleteConnection = async (connectionId: number) => {
     try {
       const response = await fetch(`api/frontend/connections/${connectionId}`, {
@@ -301,6 +326,11 @@ export default function ConnectionsLlm() {
                 <td className="px-6 py-4 whitespace-nowrap text-sm text-zinc-500 dark:text-zinc-400">
                   {backendOptions.find((b) => b.id === connection.backend)
                     ?.name || connection.backend}
+                  {connection.in_pool && (
+                    <span className="ml-2 inline-flex items-center rounded-md bg-zinc-100 dark:bg-zinc-800 px-2 py-0.5 text-xs font-medium text-zinc-600 dark:text-zinc-300">
+                      {connection.tier === "small" ? "Pool · small" : "Pool"}
+                    </span>
+                  )}
                 </td>
                 <td className="px-6 py-4 whitespace-nowrap text-sm text-zinc-500 dark:text-zinc-400">
                   {connection.is_active ? (
@@ -372,10 +402,35 @@ export default function ConnectionsLlm() {
                     </div>
                     <MenuItems
                       transition
-                      className="absolute right-0 mt-2 w-32 origin-top-right divide-y divide-zinc-100 rounded-md bg-white dark:bg-zinc-900 shadow-lg ring-1 ring-black/5 focus:outline-none transition data-[closed]:scale-95 data-[closed]:opacity-0"
+                      className="absolute right-0 mt-2 w-44 origin-top-right divide-y divide-zinc-100 rounded-md bg-white dark:bg-zinc-900 shadow-lg ring-1 ring-black/5 focus:outline-none transition data-[closed]:scale-95 data-[closed]:opacity-0"
                       anchor="bottom end"
                     >
                       <div className="px-1 py-1">
+                        <MenuItem>
+                          <button
+                            onClick={() => handleUpdatePool(connection, { in_pool: !connection.in_pool })}
+                            className="group flex w-full items-center rounded-md px-2 py-2 text-sm cursor-pointer text-zinc-700 dark:text-zinc-300 data-[focus]:bg-zinc-100 dark:data-[focus]:bg-zinc-800"
+                          >
+                            <Layers className="mr-2 h-5 w-5" aria-hidden="true" />
+                            {connection.in_pool ? "Remove from pool" : "Add to pool"}
+                          </button>
+                        </MenuItem>
+                        {connection.in_pool && (
+                          <MenuItem>
+                            <button
+                              onClick={() =>
+                                handleUpdatePool(connection, {
+                                  in_pool: true,
+                                  tier: connection.tier === "small" ? "large" : "small",
+                                })
+                              }
+                              className="group flex w-full items-center rounded-md px-2 py-2 text-sm cursor-pointer text-zinc-700 dark:text-zinc-300 data-[focus]:bg-zinc-100 dark:data-[focus]:bg-zinc-800"
+                            >
+                              <Zap className="mr-2 h-5 w-5" aria-hidden="true" />
+                              {connection.tier === "small" ? "Use for all requests" : "Use for simple requests"}
+                            </button>
+                          </MenuItem>
+                        )}
                         <MenuItem>
                           <button
                             onClick={() => handleDeleteConnection(connection.id)}
@@ -16,6 +16,7 @@ import {
   SlidersHorizontal,
   AlertTriangle,
   MessagesSquare,
+  Timer,
 } from "lucide-react";
 import type { Span, ConversationTracesResponse, TraceWithSpans } from "../../types";
 import Breadcrumbs from "../../components/Breadcrumbs";
@@ -94,6 +95,23 @@ function renderGenerationPretty(spanData: { [key: string]: any }) {
   const usage =
     spanData.usage || spanData.token_usage || responseObj?.usage || undefined;
 
+  // Recorded for streamed calls, in seconds
+  const timing = spanData.timing || undefined;
+  const timingFields: Array<[string, any]> = timing
+    ? [
+        ["Queue time", timing.queue_time != null ? `${Math.round(timing.queue_time * 1000)}ms` : null],
+        ["Time to first token", timing.time_to_first_token != null ? `${Math.round(timing.time_to_first_token * 1000)}ms` : null],
+        [
+          "Inter-token latency (p50/p90/p99)",
+          timing.inter_token_latency
+            ? ["p50", "p90", "p99"].map((p) => `${Math.round(timing.inter_token_latency[p] * 1000)}`).join("/") + "ms"
+            : null,
+        ],
+        ["Tokens/s", timing.tokens_per_second],
+        ["Cached tokens", timing.cached_tokens],
+      ].filter(([, value]) => value !== null && value !== undefined) as Array<[string, any]>
+    : [];
+
   const modelConfig = spanData.model_config || {};
   const params: Record<string, any> = {};
   [
@@ -231,6 +249,22 @@ function renderGenerationPretty(spanData: { [key: string]: any }) {
           )}
         </div>
       )}
+
+      {timingFields.length > 0 && (
+        <div>
+          {renderKeyValue(
+            <span className="inline-flex items-center gap-2"><Timer className="h-3.5 w-3.5 text-zinc-500 dark:text-zinc-400" /><span>Timing</span></span>,
+            <div className="grid grid-cols-1 sm:grid-cols-2 gap-3">
+              {timingFields.map(([label, value]) => (
+                <div key={label}>
+                  <div className="text-xs font-medium uppercase tracking-wide text-zinc-500 dark:text-zinc-400">{label}</div>
+                  <div className="mt-2 text-sm text-zinc-800 dark:text-zinc-200"><code>{String(value)}</code></div>
+                </div>
+              ))}
+            </div>
+          )}
+        </div>
+      )}
     </div>
   );
 }
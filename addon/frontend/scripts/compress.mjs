@@ -0,0 +1,44 @@
+// Writes brotli (.br) and gzip (.gz) versions of the built client files, served by the
+// add-on to clients accepting them (see app/static.py)
+import { readdir, readFile, stat, writeFile } from "node:fs/promises";
+import { join, extname } from "node:path";
+import { brotliCompressSync, gzipSync, constants } from "node:zlib";
+
+const root = process.argv[2] ?? "build/client";
+const extensions = new Set([".js", ".mjs", ".css", ".html", ".svg", ".json", ".txt", ".ico", ".map"]);
+const minSize = 1024; // Not worth a round of decompression below that
+
+async function* files(dir) {
+  for (const entry of await readdir(dir, { withFileTypes: true })) {
+    const path = join(dir, entry.name);
+    if (entry.isDirectory()) yield* files(path);
+    else if (extensions.has(extname(entry.name))) yield path;
+  }
+}
+
+let original = 0;
+let brotli = 0;
+let gzipped = 0;
+for await (const path of files(root)) {
+  if ((await stat(path)).size < minSize) continue;
+  const content = await readFile(path);
+  const br = brotliCompressSync(content, {
+    params: {
+      [constants.BROTLI_PARAM_QUALITY]: constants.BROTLI_MAX_QUALITY,
+      [constants.BROTLI_PARAM_SIZE_HINT]: content.length,
+    },
+  });
+  const gz = gzipSync(content, { level: 9 });
+  original += content.length;
+  // Only keep the versions actually smaller than the file
+  if (br.length < content.length) await writeFile(`${path}.br`, br);
+  if (gz.length < content.length) await writeFile(`${path}.gz`, gz);
+  brotli += Math.min(br.length, content.length);
+  gzipped += Math.min(gz.length, content.length);
+}
+
+const kb = (bytes) => `${(bytes / 1024).toFixed(1)} KiB`;
+const saved = (bytes) => `${((1 - bytes / (original || 1)) * 100).toFixed(1)}%`;
+console.log(
+  `Compressed ${kb(original)}: brotli ${kb(brotli)} (-${saved(brotli)}), gzip ${kb(gzipped)} (-${saved(gzipped)})`,
+);
@@ -56,6 +56,7 @@ class FakeModel(Model):
         output_schema: AgentOutputSchema | None,
         handoffs: list[Handoff],
         tracing: ModelTracing,
+        **kwargs,  # previous_response_id etc., depending on the SDK version
     ) -> ModelResponse:
         with generation_span(disabled=not self.tracing_enabled) as span:
             output = self.get_next_output()
@@ -87,6 +88,7 @@ class FakeModel(Model):
         output_schema: AgentOutputSchema | None,
         handoffs: list[Handoff],
         tracing: ModelTracing,
+        **kwargs,  # previous_response_id etc., depending on the SDK version
     ) -> AsyncIterator[TResponseStreamEvent]:
         with generation_span(disabled=not self.tracing_enabled) as span:
             output = self.get_next_output()
@@ -105,6 +107,7 @@ class FakeModel(Model):
             yield ResponseCompletedEvent(
                 type="response.completed",
                 response=get_response_obj(output),
+                sequence_number=0,
             )
 
 
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from app.llm import AdmissionController, AdmissionRejected, Priority
+from app.runtime import Deadline
+
+
+@pytest.mark.anyio
+async def test_interactive_calls_are_served_before_background_ones():
+    controller = AdmissionController(max_concurrency=1)
+    order: list[str] = []
+
+    async def call(name: str, priority: Priority):
+        async with controller.acquire("llm", priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with controller.acquire("llm"):
+        tasks = [asyncio.create_task(call("automation", Priority.BACKGROUND))]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(call("voice", Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert controller.stats()[0]["queue_depth"] == 2
+
+    await asyncio.gather(*tasks)
+    assert order == ["voice", "automation"]
+
+    stats = controller.stats()[0]
+    assert stats["admitted"] == 3
+    assert stats["active"] == 0
+    assert stats["max_queue_depth"] == 2
+
+
+@pytest.mark.anyio
+async def test_calls_that_would_miss_the_deadline_are_rejected():
+    controller = AdmissionController(max_concurrency=1)
+
+    # Learn how long a call holds the slot
+    async with controller.acquire("llm"):
+        await asyncio.sleep(0.2)
+
+    async with controller.acquire("llm"):
+        with pytest.raises(AdmissionRejected):
+            async with controller.acquire("llm", deadline=Deadline(0.05)):
+                pass
+
+        # Without a prediction to go on, the call waits until the deadline
+        controller._backends["llm"].avg_hold = None
+        with pytest.raises(AdmissionRejected):
+            async with controller.acquire("llm", deadline=Deadline(0.05)):
+                pass
+
+    stats = controller.stats()[0]
+    assert stats["rejected"] == 1
+    assert stats["timed_out"] == 1
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
@@ -0,0 +1,29 @@
+import yaml
+
+from app.services import ConversationService
+
+ENTITIES = {
+    "light.kitchen": {"names": "Light", "domain": "light", "areas": "Kitchen"},
+    "light.bedroom": {"names": "Lamp", "domain": "light", "areas": "Bedroom"},
+    "fan.bedroom": {"names": "Fan", "domain": "fan", "areas": "Bedroom, Master Bedroom"},
+    "sensor.outside": {"names": "Outside Temperature", "domain": "sensor"},
+}
+
+
+def test_entities_of_the_satellite_area_come_first():
+    text = ConversationService.format_home_entities(ENTITIES, area="bedroom", scope="first")
+    assert [e["names"] for e in yaml.safe_load(text)] == ["Lamp", "Fan", "Outside Temperature", "Light"]
+
+
+def test_other_areas_are_summarized():
+    text = ConversationService.format_home_entities(ENTITIES, area="Kitchen", scope="summary")
+    assert yaml.safe_load(text) == [
+        ENTITIES["light.kitchen"],
+        ENTITIES["sensor.outside"],
+        {"area": "Bedroom", "domains": {"light": 1, "fan": 1}},
+    ]
+
+    # Without a location the block is unchanged
+    assert ConversationService.format_home_entities(ENTITIES, scope="summary") == yaml.dump(
+        list(ENTITIES.values()), sort_keys=False
+    )
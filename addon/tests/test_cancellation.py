@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from agents import Agent, Runner
+
+from app.runtime import cancel_on_disconnect, cancel_run
+from tests.fake_model import FakeModel
+
+
+class HangingModel(FakeModel):
+    """Model whose stream never produces anything, like a busy single-slot backend."""
+
+    def __init__(self):
+        super().__init__()
+        self.cancelled = asyncio.Event()
+
+    async def stream_response(self, *args, **kwargs):
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        yield  # pragma: no cover
+
+
+@pytest.mark.anyio
+async def test_disconnect_cancels_run_and_model_stream():
+    model = HangingModel()
+    agent = Agent(name="Test Agent", model=model)
+    result = Runner.run_streamed(agent, input="turn on the light")
+
+    disconnected_after = asyncio.get_running_loop().time() + 0.1
+
+    async def is_disconnected() -> bool:
+        return asyncio.get_running_loop().time() > disconnected_after
+
+    async def consume():
+        async with cancel_on_disconnect(result, is_disconnected, poll_interval=0.01) as disconnected:
+            async for _ in result.stream_events():
+                pass
+        return disconnected.is_set()
+
+    assert await asyncio.wait_for(consume(), timeout=2)
+    await asyncio.wait_for(model.cancelled.wait(), timeout=1)
+
+
+@pytest.mark.anyio
+async def test_cancel_run_wakes_a_waiting_consumer():
+    model = HangingModel()
+    result = Runner.run_streamed(Agent(name="Test Agent", model=model), input="turn on the light")
+
+    async def consume():
+        try:
+            async for _ in result.stream_events():
+                pass
+        except asyncio.CancelledError:
+            pass  # The run task's, re-raised by `stream_events`
+
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    assert not consumer.done()
+
+    # Relies on SDK internals, fails if `cancel` and the queue sentinel stop unblocking
+    # `stream_events`
+    cancel_run(result)
+    # Not `wait_for`, whose cancellation `stream_events` would swallow
+    done, _ = await asyncio.wait({consumer}, timeout=1)
+    assert consumer in done
+    await asyncio.wait_for(model.cancelled.wait(), timeout=1)
@@ -0,0 +1,147 @@
+from typing import Any
+
+import pytest
+from agents import ModelSettings, ModelTracing
+from openai.types.responses import (
+    ResponseCompletedEvent,
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseFunctionCallArgumentsDoneEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemAddedEvent,
+    ResponseOutputItemDoneEvent,
+    ResponseTextDeltaEvent,
+)
+
+from app.llm import ConstrainedToolCallModel
+from app.llm.constraints import invalid_tool_calls
+from app.tools import get_all_tools
+from tests.fake_model import FakeModel
+
+
+def call(name: str, arguments: str, call_id: str) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        type="function_call", name=name, arguments=arguments, call_id=call_id, id=call_id
+    )
+
+
+class RecordingModel(FakeModel):
+    def __init__(self):
+        super().__init__()
+        self.calls: list[tuple[list[str], Any]] = []
+
+    def stream_response(self, *args: Any, **kwargs: Any) -> Any:
+        self.calls.append(([tool.name for tool in args[3]], args[2].tool_choice))
+        return self._stream(super().stream_response(*args, **kwargs))
+
+    async def _stream(self, stream: Any) -> Any:
+        # Function calls come as added/arguments/done events before the completed one,
+        # like the chat completions stream handler emits them
+        async for event in stream:
+            for index, item in enumerate(event.response.output):
+                yield ResponseOutputItemAddedEvent(
+                    type="response.output_item.added",
+                    item=item.model_copy(update={"arguments": ""}),
+                    output_index=index,
+                    sequence_number=0,
+                )
+                yield ResponseFunctionCallArgumentsDeltaEvent(
+                    type="response.function_call_arguments.delta",
+                    delta=item.arguments,
+                    item_id=item.id,
+                    output_index=index,
+                    sequence_number=0,
+                )
+                yield ResponseFunctionCallArgumentsDoneEvent(
+                    type="response.function_call_arguments.done",
+                    arguments=item.arguments,
+                    item_id=item.id,
+                    output_index=index,
+                    sequence_number=0,
+                )
+                yield ResponseOutputItemDoneEvent(
+                    type="response.output_item.done", item=item, output_index=index, sequence_number=0
+                )
+            # Streamed after the calls, before the response completes
+            yield ResponseTextDeltaEvent(
+                type="response.output_text.delta",
+                content_index=0,
+                delta="On it.",
+                item_id="text",
+                logprobs=[],
+                output_index=len(event.response.output),
+                sequence_number=0,
+            )
+            yield event
+
+
+def test_arguments_are_checked_against_the_schema():
+    invalid = invalid_tool_calls([
+        call("turn_on", '{"name": "Kitchen Light", "domain": "light"}', "1"),
+        call("turn_on", '{"name": "Kitchen Light"}', "2"),
+        call("get_state", '{"name": "Kitchen', "3"),
+        call("transfer_to_lighting", '{}', "4"),
+    ], get_all_tools())
+
+    assert [(item.call_id, "JSON" in error) for item, error in invalid] == [("2", False), ("3", True)]
+
+
+@pytest.mark.anyio
+async def test_malformed_call_is_retried_with_the_tool_required():
+    tools = get_all_tools()
+    model = RecordingModel()
+    model.add_multiple_turn_outputs([
+        [
+            call("get_date_time", "{}", "1"),
+            call("turn_on", '{"name": "Kitchen Light"}', "2"),
+        ],
+        [call("turn_on", '{"name": "Kitchen Light", "domain": "light"}', "3")],
+    ])
+
+    constrained = ConstrainedToolCallModel(model)
+    events = [
+        event async for event in constrained.stream_response(
+            None, "Turn on the kitchen light", ModelSettings(), tools, None, [], ModelTracing.DISABLED
+        )
+    ]
+
+    assert model.calls == [([tool.name for tool in tools], None), (["turn_on"], "required")]
+    [completed] = [event for event in events if isinstance(event, ResponseCompletedEvent)]
+    assert [item.call_id for item in completed.response.output] == ["1", "3"]
+
+    # The malformed call is never streamed, callers only see the calls that run
+    done = [event.item.call_id for event in events if isinstance(event, ResponseOutputItemDoneEvent)]
+    assert done == ["1", "3"]
+    assert len(events) == 4 * 2 + 2 + 1
+    assert events[-1] is completed
+
+    # The valid call isn't held back until the response completes
+    kinds = [type(event).__name__ for event in events]
+    assert kinds[:5] == [
+        "ResponseOutputItemAddedEvent",
+        "ResponseFunctionCallArgumentsDeltaEvent",
+        "ResponseFunctionCallArgumentsDoneEvent",
+        "ResponseOutputItemDoneEvent",
+        "ResponseTextDeltaEvent",
+    ]
+
+
+@pytest.mark.anyio
+async def test_events_pass_through_unconstrained():
+    model = RecordingModel()
+    model.set_next_output([call("turn_on", '{"name": "Kitchen Light"}', "1")])
+
+    events = [
+        event async for event in ConstrainedToolCallModel(model, constrain=False).stream_response(
+            None, "Turn on the kitchen light", ModelSettings(), get_all_tools(), None, [], ModelTracing.DISABLED
+        )
+    ]
+
+    assert len(model.calls) == 1
+    assert [type(event).__name__ for event in events] == [
+        "ResponseOutputItemAddedEvent",
+        "ResponseFunctionCallArgumentsDeltaEvent",
+        "ResponseFunctionCallArgumentsDoneEvent",
+        "ResponseOutputItemDoneEvent",
+        "ResponseTextDeltaEvent",
+        "ResponseCompletedEvent",
+    ]
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+from agents import Agent, Runner
+
+from app.llm import DeadlineModel
+from app.runtime import Deadline, DeadlineExceeded
+from tests.test_cancellation import HangingModel
+
+
+def test_deadline_from_header():
+    assert Deadline.from_header("1500").budget == 1.5
+    assert Deadline.from_header(None, default=30).budget == 30
+    assert Deadline.from_header("soon", default=None).remaining() is None
+
+
+def test_deadline_timeout_is_capped():
+    deadline = Deadline(5)
+    assert deadline.timeout(1) == 1
+    assert 4 < deadline.timeout(10) <= 5
+    assert Deadline(None).timeout(10) == 10
+
+
+@pytest.mark.anyio
+async def test_idle_stream_raises_deadline_exceeded():
+    model = HangingModel()
+    agent = Agent(name="Test Agent", model=DeadlineModel(model, Deadline(10), idle_timeout=0.05))
+    result = Runner.run_streamed(agent, input="turn on the light")
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        async with asyncio.timeout(2):
+            async for _ in result.stream_events():
+                pass
+
+    assert exc_info.value.stage == "llm_idle"
+    assert model.cancelled.is_set()
@@ -0,0 +1,177 @@
+import asyncio
+import json
+from collections.abc import Sequence
+
+import httpx
+import pytest
+from agents import set_trace_processors
+from openai import AsyncOpenAI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.base import Base
+from app.llm import ConnectionPool, ModelRouter
+from app.memory import SessionStore
+from app.metrics import TURNS
+from app.models import ConnectionCreate, ConversationRequest, ToolProgress
+from app.services import ConnectionService, ConversationService
+from app.settings import get_settings
+from app.tools import get_all_tools
+
+ENTITIES = {"light.kitchen": {"names": "Kitchen Light", "domain": "light", "areas": "Kitchen", "state": "off"}}
+
+
+def sse(delta: dict, finish_reason: str) -> httpx.Response:
+    chunks = [
+        {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m", "choices": [
+            {"index": 0, "delta": delta, "finish_reason": None},
+        ]},
+        {"id": "c", "object": "chat.completion.chunk", "created": 0, "model": "m", "choices": [
+            {"index": 0, "delta": {}, "finish_reason": finish_reason},
+        ]},
+    ]
+    body = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+    return httpx.Response(200, content=body.encode(), headers={"content-type": "text/event-stream"})
+
+
+def tool_call(name: str, arguments: dict) -> httpx.Response:
+    return sse({"role": "assistant", "tool_calls": [{
+        "index": 0, "id": "call_1", "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)},
+    }]}, "tool_calls")
+
+
+class Home:
+    """Home Assistant and the two model tiers, answering over mock transports.
+
+    The small tier fails once out of turns, the large one answers "Done.".
+    """
+
+    def __init__(self, small_turns: Sequence[httpx.Response] = (), large_turns: Sequence[httpx.Response] = ()):
+        self.turns = {"small": small_turns, "large": large_turns}
+        self.intents: list[str] = []
+        self.model_calls: dict[str, int] = {"small": 0, "large": 0}
+        self.system_prompts: list[str] = []
+
+    def hass(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/home_agent/entities"):
+            return httpx.Response(200, json={"entities": ENTITIES})
+        if request.url.path.endswith("/entities/states"):
+            return httpx.Response(200, json={"results": [
+                {"entity_id": "light.kitchen", "state": "off", "attributes": {}},
+            ]})
+        if request.url.path.endswith("/intent/handle"):
+            self.intents.append(json.loads(request.content)["name"])
+            return httpx.Response(200, json={
+                "response_type": "action_done",
+                "speech": {"plain": {"speech": "Turned on the light"}},
+            })
+        return httpx.Response(404)
+
+    def llm(self, request: httpx.Request) -> httpx.Response:
+        tier = request.url.host
+        self.model_calls[tier] += 1
+        self.system_prompts.append(json.loads(request.content)["messages"][0]["content"])
+        if self.model_calls[tier] <= len(self.turns[tier]):
+            return self.turns[tier][self.model_calls[tier] - 1]
+        if tier == "small":
+            return httpx.Response(500, json={"error": "boom"})
+        return sse({"role": "assistant", "content": "Done."}, "stop")
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    monkeypatch.setenv("APP_ENV", "dev")
+    monkeypatch.setenv("HOME_AGENT_HA_API_URL", "http://ha/api")
+    monkeypatch.setenv("HOME_AGENT_HA_API_KEY", "key")
+    monkeypatch.setenv("HOME_AGENT_DB_PATH", str(tmp_path))
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
+    set_trace_processors([])
+
+
+async def converse(
+    home: Home,
+    tmp_path,
+    text: str,
+    tiers: tuple[str, ...] = ("small", "large"),
+    keep_turns: int | None = None,
+    **kwargs,
+) -> tuple[list, list]:
+    """Run a request against a pool of the given tiers, returns what it yielded and the history."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'traces.db'}")
+    Base.metadata.create_all(sync_engine)
+    session_store = SessionStore(engine, max_items=40, ttl_seconds=600, max_bytes=10**6, keep_turns=keep_turns)
+    await session_store.start()
+
+    pool = ConnectionPool(health_interval=None)
+    transport = httpx.MockTransport(home.llm)
+    pool.client = lambda connection: AsyncOpenAI(
+        base_url=connection.url,
+        api_key="key",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=transport),
+    )
+
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessionmaker() as db:
+        for tier in tiers:
+            connection = await ConnectionService.create_connection(
+                db, ConnectionCreate(url=f"http://{tier}/v1", backend="llama.cpp")
+            )
+            await ConnectionService.set_pool_member(db, connection.id, True, tier)
+
+        async with httpx.AsyncClient(base_url="http://ha/api", transport=httpx.MockTransport(home.hass)) as hass:
+            chunks = [
+                chunk
+                async for chunk in ConversationService.process_conversation(
+                    ConversationRequest(text=text, conversation_id="conv", language="en"),
+                    hass_client=hass,
+                    tools=get_all_tools(),
+                    db=db,
+                    db_engine=sync_engine,
+                    session_store=session_store,
+                    connection_pool=pool,
+                    model_router=ModelRouter(),
+                    **kwargs,
+                )
+            ]
+    # Let background summaries finish
+    await asyncio.gather(*session_store._summaries.values())
+    history = await (await session_store.get_session("conv")).get_items()
+    await session_store.stop()
+    await engine.dispose()
+    sync_engine.dispose()
+    return chunks, history
+
+
+@pytest.mark.anyio
+async def test_failed_small_tier_escalates(settings, tmp_path):
+    home = Home(small_turns=[tool_call("get_state", {"name": "Kitchen Light", "domain": "light"})])
+    turns = TURNS.value()
+
+    chunks, history = await converse(home, tmp_path, "is the kitchen light on")
+
+    assert "".join(chunk for chunk in chunks if isinstance(chunk, str)) == "Done."
+    assert home.model_calls == {"small": 2, "large": 1}
+    # The turns of the failed run count as well
+    assert TURNS.value() - turns == 3
+    # Only the large tier's run is kept
+    assert [item.get("role") for item in history] == ["user", "assistant"]
+
+
+@pytest.mark.anyio
+async def test_small_tier_failing_after_a_mutating_tool_does_not_escalate(settings, tmp_path):
+    home = Home(small_turns=[tool_call("turn_on", {"name": "Kitchen Light", "domain": "light"})])
+
+    chunks, _ = await converse(home, tmp_path, "turn on the kitchen light")
+
+    # The light isn't turned on a second time by the large tier
+    assert home.intents == ["HassTurnOn"]
+    assert home.model_calls == {"small": 2, "large": 0}
+    assert [chunk.name for chunk in chunks if isinstance(chunk, ToolProgress)] == ["turn_on"]
+    assert chunks[-1].startswith("I apologize, but I encountered an error")
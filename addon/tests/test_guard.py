@@ -0,0 +1,76 @@
+import json
+
+import pytest
+from agents import function_tool
+from agents.tool_context import ToolContext
+
+from app.runtime import RunGuard
+
+invoked: list[str] = []
+
+
+@function_tool
+async def turn_on(name: str, domain: str) -> str:
+    invoked.append(f"on {name}")
+    return "Done."
+
+
+@function_tool
+async def turn_off(name: str, domain: str) -> str:
+    invoked.append(f"off {name}")
+    return "Done."
+
+
+@function_tool
+async def start_timer(minutes: int) -> str:
+    return "Failed to start timer."
+
+
+async def call(tools, tool_name: str, **arguments) -> str:
+    tool = next(tool for tool in tools if tool.name == tool_name)
+    ctx = ToolContext(context={}, tool_name=tool_name, tool_call_id="call")
+    return await tool.on_invoke_tool(ctx, json.dumps(arguments))
+
+
+@pytest.fixture(autouse=True)
+def clear_invoked():
+    invoked.clear()
+
+
+@pytest.mark.anyio
+async def test_repeated_call_is_not_made():
+    guard = RunGuard(max_repeated_calls=3)
+    tools = guard.wrap([turn_on])
+
+    for _ in range(3):
+        await call(tools, "turn_on", domain="light", name="Kitchen")
+
+    assert invoked == ["on Kitchen"] * 2
+    assert guard.tripped and guard.reason == "repeated_call"
+
+
+@pytest.mark.anyio
+async def test_on_off_oscillation_is_stopped():
+    guard = RunGuard(max_repeated_calls=None, max_oscillations=2)
+    tools = guard.wrap([turn_on, turn_off])
+
+    await call(tools, "turn_on", name="Kitchen", domain="light")
+    await call(tools, "turn_off", name="Bedroom", domain="light")
+    await call(tools, "turn_off", name="Kitchen", domain="light")
+    assert not guard.tripped
+    await call(tools, "turn_on", name="Kitchen", domain="light")
+
+    assert invoked == ["on Kitchen", "off Bedroom", "off Kitchen"]
+    assert guard.reason == "oscillation"
+
+
+@pytest.mark.anyio
+async def test_repeated_failures_trip_the_guard():
+    guard = RunGuard(max_tool_failures=2)
+    tools = guard.wrap([start_timer])
+
+    await call(tools, "start_timer", minutes=1)
+    assert not guard.tripped
+    await call(tools, "start_timer", minutes=2)
+
+    assert guard.tripped and guard.reason == "tool_failures"
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+import yaml
+from agents.tool_context import ToolContext
+
+from app.services import ConversationService
+from app.tools.tools import list_entities
+
+ENTITIES = {
+    "light.kitchen": {"names": "Light", "domain": "light", "areas": "Kitchen"},
+    "switch.kitchen": {"names": "Kettle", "domain": "switch", "areas": "Kitchen"},
+    "light.bedroom": {"names": "Lamp", "domain": "light", "areas": "Bedroom"},
+    "sensor.outside": {"names": "Outside Temperature", "domain": "sensor"},
+}
+AREA_FLOORS = {"Kitchen": "Ground", "Bedroom": "First"}
+
+
+def test_prompt_only_lists_floors_and_areas():
+    text = ConversationService.format_home_hierarchy(ENTITIES, AREA_FLOORS)
+    assert yaml.safe_load(text) == [
+        {"floor": "Ground", "areas": {"Kitchen": {"light": 1, "switch": 1}}},
+        {"floor": "First", "areas": {"Bedroom": {"light": 1}}},
+        {"floor": "No floor", "areas": {"No area": {"sensor": 1}}},
+    ]
+
+
+@pytest.mark.anyio
+async def test_list_entities_expands_an_area():
+    context = {"entities": ENTITIES}
+
+    async def call(**arguments):
+        ctx = ToolContext(context=context, tool_name="list_entities", tool_call_id="1")
+        return await list_entities.on_invoke_tool(ctx, json.dumps({"domain": None, **arguments}))
+
+    assert await call(area="kitchen") == [ENTITIES["light.kitchen"], ENTITIES["switch.kitchen"]]
+    assert await call(area="Kitchen", domain="light") == [ENTITIES["light.kitchen"]]
+    assert "Known areas: Bedroom, Kitchen, No area" in (await call(area="Garage"))["error"]
+    assert ("kitchen", "light") in context["entity_listings"]
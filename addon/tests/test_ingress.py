@@ -0,0 +1,43 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+
+from app.ingress import IngressMiddleware
+
+
+@pytest.fixture
+def frontend(tmp_path):
+    (tmp_path / "index.html").write_text('<html><head><base href="/"></head></html>')
+    (tmp_path / "favicon.ico").write_bytes(b"icon")
+    return tmp_path
+
+
+@pytest.mark.anyio
+async def test_pages_are_rendered_for_the_ingress_path(frontend):
+    app = FastAPI()
+
+    @app.get("/api/page")
+    async def page():
+        return HTMLResponse("<html><head></head></html>")
+
+    @app.get("/{full_path:path}")
+    async def fallback(full_path: str):
+        return HTMLResponse(f"fallback {full_path}")
+
+    middleware = IngressMiddleware(app, frontend_dir=frontend)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=middleware), base_url="http://addon") as client:
+        response = await client.get("/conversations", headers={"X-Ingress-Path": "/api/hassio_ingress/token"})
+        assert response.text == '<html><head><base href="/api/hassio_ingress/token/"></head></html>'
+        assert response.headers["content-type"] == "text/html; charset=utf-8"
+
+        response = await client.get("/")
+        assert response.text == '<html><head><base href="/"></head></html>'
+        response = await client.get("/", headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
+
+        # Neither the API nor static files are touched
+        assert (await client.get("/api/page")).text == "<html><head></head></html>"
+        assert (await client.get("/favicon.ico")).text == "fallback favicon.ico"
+
+    assert len(middleware._pages) == 2
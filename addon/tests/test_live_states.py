@@ -0,0 +1,19 @@
+import pytest
+
+from tests.test_escalation import Home, converse, settings, tool_call  # noqa: F401
+
+LIVE_STATES = "Current state of the entities most relevant to the request"
+
+
+@pytest.mark.anyio
+async def test_live_states_are_dropped_once_something_changed(settings, tmp_path):
+    home = Home(large_turns=[
+        tool_call("get_timer_status", {"name": "pasta"}),
+        tool_call("turn_on", {"name": "Kitchen Light", "domain": "light"}),
+    ])
+
+    await converse(home, tmp_path, "check the pasta timer and turn on the kitchen light", tiers=("large",))
+
+    assert home.intents == ["HassTimerStatus", "HassTurnOn"]
+    # The light was off when the request came in, which is no longer true after turn_on
+    assert [LIVE_STATES in prompt for prompt in home.system_prompts] == [True, True, False]
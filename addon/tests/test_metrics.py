@@ -0,0 +1,41 @@
+import pytest
+
+from app.metrics import Counter, Gauge, Histogram, Registry
+
+
+def test_exposition_format():
+    registry = Registry()
+    requests = Counter("requests_total", "Requests.", ["outcome"], registry=registry)
+    depth = Gauge("queue_depth", "Queued calls.", ["connection"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency.", ["tool"], buckets=(0.1, 1.0), registry=registry)
+
+    requests.inc(outcome="completed")
+    requests.inc(2, outcome='say "hi"')
+    depth.set(3, connection="1")
+    for value in (0.05, 0.1, 0.5, 7.0):
+        latency.observe(value, tool="turn_on")
+
+    assert registry.render() == "\n".join([
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{outcome="completed"} 1.0',
+        'requests_total{outcome="say \\"hi\\""} 2.0',
+        "# HELP queue_depth Queued calls.",
+        "# TYPE queue_depth gauge",
+        'queue_depth{connection="1"} 3.0',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{tool="turn_on",le="0.1"} 2',
+        'latency_seconds_bucket{tool="turn_on",le="1.0"} 3',
+        'latency_seconds_bucket{tool="turn_on",le="+Inf"} 4',
+        'latency_seconds_sum{tool="turn_on"} 7.65',
+        'latency_seconds_count{tool="turn_on"} 4',
+    ]) + "\n"
+
+
+def test_labels_must_match():
+    counter = Counter("failures_total", "Failures.", ["tool"], registry=Registry())
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        counter.inc(tool="turn_on", domain="light")
@@ -0,0 +1,98 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+from agents import Agent, Runner
+
+from app.llm import ConnectionPool, PoolModel
+from app.models import Connection
+from tests.fake_model import FakeModel
+from tests.test_responses import get_text_message
+
+
+def connection(id: int) -> Connection:
+    return Connection(id=id, url=f"http://backend-{id}/v1", backend="llama.cpp", in_pool=True)
+
+
+def connection_error() -> openai.APIConnectionError:
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://backend-1/v1"))
+
+
+@pytest.fixture
+async def pool():
+    pool = ConnectionPool(failure_threshold=2, open_seconds=60, health_interval=None)
+    yield pool
+    await pool.stop()
+
+
+@pytest.mark.anyio
+async def test_routes_to_least_outstanding_and_skips_open_circuits(pool):
+    first, second = connection(1), connection(2)
+
+    async with pool.track(first):
+        assert pool.choose([first, second]) == second
+    assert pool.choose([first, second]) == first
+
+    for _ in range(2):
+        pool.record_failure(first, connection_error())
+    assert pool.circuit(first) == "open"
+    assert pool.choose([first, second]) == second
+
+    pool.record_success(first)
+    assert pool.circuit(first) == "closed"
+
+
+@pytest.mark.anyio
+async def test_first_turn_fails_over_to_the_next_connection(pool):
+    first, second = connection(1), connection(2)
+    models = {1: FakeModel(initial_output=connection_error()), 2: FakeModel()}
+    models[2].set_next_output([get_text_message("Done.")])
+
+    model = PoolModel(pool, [first, second], lambda c: models[c.id])
+    result = Runner.run_streamed(Agent(name="Test Agent", model=model), input="turn on the light")
+    async for _ in result.stream_events():
+        pass
+
+    assert result.final_output == "Done."
+    assert model.current == second
+    assert pool.status(first)["failures"] == 1
+    assert pool.status(first)["last_error"]
+
+
+class SlowModel(FakeModel):
+    """Model taking `delay` seconds before streaming anything."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.cancelled = False
+
+    async def stream_response(self, *args, **kwargs):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        async for event in super().stream_response(*args, **kwargs):
+            yield event
+
+
+@pytest.mark.anyio
+async def test_slow_first_turn_is_hedged_on_another_connection(pool):
+    first, second = connection(1), connection(2)
+    models = {1: SlowModel(delay=10), 2: SlowModel(delay=0)}
+    models[1].set_next_output([get_text_message("Slow.")])
+    models[2].set_next_output([get_text_message("Fast.")])
+
+    model = PoolModel(pool, [first, second], lambda c: models[c.id], hedge_delay=0.05)
+    result = Runner.run_streamed(Agent(name="Test Agent", model=model), input="turn on the light")
+    async for _ in result.stream_events():
+        pass
+
+    assert result.final_output == "Fast."
+    assert model.current == second
+    assert models[1].cancelled
+    # The slow connection was not at fault
+    assert pool.status(first)["failures"] == 0
+    assert pool.status(first)["outstanding"] == 0
@@ -0,0 +1,70 @@
+from app.tools.resolver import EntityResolver, edit_distance, tokenize
+
+ENTITIES = {
+    "light.kitchen": {"names": "Kitchen Light", "domain": "light", "areas": "Kitchen"},
+    "light.living_room_lamp": {"names": "Living Room Lamp, Reading Lamp", "domain": "light", "areas": "Living Room"},
+    "light.bedroom_ceiling": {"names": "Ceiling Light", "domain": "light", "areas": "Bedroom"},
+    "light.office_ceiling": {"names": "Ceiling Light", "domain": "light", "areas": "Office"},
+    "fan.kitchen": {"names": "Kitchen Fan", "domain": "fan", "areas": "Kitchen"},
+    "cover.garage_door": {"names": "Garage Door", "domain": "cover"},
+}
+
+
+def test_tokenize_singularizes_and_drops_stopwords():
+    assert tokenize("Turn the Kitchen Lights!") == ["turn", "kitchen", "light"]
+
+
+def test_edit_distance():
+    assert edit_distance("kitchen", "kitchen") == 0
+    assert edit_distance("kitchen", "kitchn") == 1
+    assert edit_distance("lamp", "lamps") == 1
+
+
+def test_exact_name():
+    resolution = EntityResolver(ENTITIES).resolve("kitchen light", domain="light")
+    assert resolution.entity_id == "light.kitchen"
+    assert not resolution.is_ambiguous
+
+
+def test_alias_plural_and_typo():
+    resolver = EntityResolver(ENTITIES)
+    assert resolver.resolve("reading lamps").entity_id == "light.living_room_lamp"
+    assert resolver.resolve("garage dor", domain="cover").name == "Garage Door"
+
+
+def test_domain_constraint():
+    resolution = EntityResolver(ENTITIES).resolve("kitchen", domain="fan")
+    assert resolution.entity_id == "fan.kitchen"
+
+
+def test_area_words_disambiguate_shared_names():
+    resolution = EntityResolver(ENTITIES).resolve("office ceiling light", domain="light")
+    assert resolution.entity_id == "light.office_ceiling"
+    assert resolution.name == "Ceiling Light"
+    assert resolution.area == "Office"
+
+
+def test_ambiguous_returns_ranked_candidates():
+    resolution = EntityResolver(ENTITIES).resolve("ceiling light", domain="light")
+    assert resolution.is_ambiguous
+    assert {c.entity_id for c in resolution.candidates[:2]} == {
+        "light.bedroom_ceiling",
+        "light.office_ceiling",
+    }
+    assert "Ceiling Light (light in Office)" in resolution.ambiguity_message()
+
+
+def test_no_match():
+    resolution = EntityResolver(ENTITIES).resolve("sprinkler", domain="switch")
+    assert resolution.name is None
+    assert not resolution.is_ambiguous
+
+
+def test_rank_prefers_mentioned_and_local_areas():
+    resolver = EntityResolver(ENTITIES)
+    assert resolver.rank("Turn off the ceiling light in the office", limit=2) == [
+        "light.office_ceiling",
+        "light.bedroom_ceiling",
+    ]
+    assert resolver.rank("Turn off the ceiling light", area="Bedroom")[0] == "light.bedroom_ceiling"
+    assert resolver.rank("What time is it?") == []
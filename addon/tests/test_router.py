@@ -0,0 +1,42 @@
+from app.llm import ModelRouter
+from app.tools.resolver import EntityResolver
+
+ENTITIES = {
+    "light.kitchen": {"names": "Kitchen Light", "domain": "light", "areas": "Kitchen"},
+    "fan.bedroom": {"names": "Bedroom Fan", "domain": "fan", "areas": "Bedroom"},
+    "cover.garage": {"names": "Garage Door", "domain": "cover", "areas": "Garage"},
+}
+
+
+def test_simple_commands_go_to_the_small_model():
+    router = ModelRouter()
+    resolver = EntityResolver(ENTITIES)
+
+    for text in ["Turn on the kitchen light", "Is the garage door open?"]:
+        decision = router.classify(text, resolver=resolver)
+        assert decision.route == "small", (text, decision)
+        assert decision.features["entities"] == 1
+
+
+def test_multi_step_and_follow_up_requests_go_to_the_large_model():
+    router = ModelRouter()
+    resolver = EntityResolver(ENTITIES)
+
+    assert router.classify(
+        "If the garage door is open when I leave, close it and then turn off the bedroom fan",
+        resolver=resolver,
+    ).route == "large"
+    assert router.classify("I'm cold", resolver=resolver).route == "large"
+    # References to earlier turns need the conversation, small models tend to lose track
+    assert router.classify("Turn it off again", resolver=resolver, history_items=4).route == "large"
+
+
+def test_route_stats():
+    router = ModelRouter()
+    router.record("small", 0.5)
+    router.record("small", 1.5, escalated=True)
+
+    [stats] = router.stats()
+    assert stats["requests"] == 2
+    assert stats["escalations"] == 1
+    assert stats["avg_latency"] == 1.0
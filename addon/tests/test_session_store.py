@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.memory import SessionStore
+from app.memory.compaction import compact_history
+
+
+def user(text: str) -> dict:
+    return {"role": "user", "content": text}
+
+
+def assistant(text: str) -> dict:
+    return {"role": "assistant", "content": text}
+
+
+def tool_call(call_id: str) -> dict:
+    return {"type": "function_call", "call_id": call_id, "name": "turn_on", "arguments": "{}"}
+
+
+def tool_output(call_id: str) -> dict:
+    return {"type": "function_call_output", "call_id": call_id, "output": "Done."}
+
+
+@pytest.fixture
+async def store():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    store = SessionStore(engine, max_items=4, ttl_seconds=600, max_bytes=10_000)
+    await store.start()
+    yield store
+    await store.stop()
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_item_limit_cuts_at_user_message(store: SessionStore):
+    session = await store.get_session("conv")
+    await session.add_items([user("turn on the light"), tool_call("1"), tool_output("1"), assistant("Done")])
+    await session.add_items([user("thanks")])
+
+    items = await session.get_items()
+    # Dropping only the first item would orphan the tool call
+    assert items == [user("thanks")]
+    assert store.stats()["items"] == 1
+
+
+@pytest.mark.anyio
+async def test_failed_run_is_removed_after_trimming(store: SessionStore):
+    session = await store.get_session("conv")
+    await session.add_items([user("hello"), assistant("Hi")])
+    last_id = await session.last_id()
+
+    # The failed run goes over the limit of 4, trimming the first turn: counting items
+    # would only undo one of its three
+    await session.add_items([user("turn on the light")])
+    await session.add_items([tool_call("1"), tool_output("1")])
+    assert [item for _, item in await session.get_rows()][0] == user("turn on the light")
+
+    await session.remove_items_after(last_id)
+    assert await session.get_items() == []
+    assert store.stats()["items"] == 0
+
+    # The escalated run replays the same input once
+    await session.add_items([user("turn on the light"), assistant("Done")])
+    assert await session.get_items() == [user("turn on the light"), assistant("Done")]
+
+
+@pytest.mark.anyio
+async def test_idle_sessions_are_evicted(store: SessionStore):
+    session = await store.get_session("old")
+    await session.add_items([user("hello")])
+    assert store.session_count == 1
+
+    store.ttl_seconds = 0
+    await store.get_session("new")
+
+    assert store.session_count == 1
+    assert await session.get_items() == []
+
+
+@pytest.mark.anyio
+async def test_size_cap_evicts_least_recently_used(store: SessionStore):
+    first = await store.get_session("first")
+    await first.add_items([user("a" * 4_000)])
+    second = await store.get_session("second")
+    await second.add_items([user("b" * 4_000)])
+    await first.get_items()  # "first" is now the most recently used
+
+    third = await store.get_session("third")
+    await third.add_items([user("c" * 4_000)])
+
+    assert await second.get_items() == []
+    assert len(await first.get_items()) == 1
+    assert store.size_bytes <= store.max_bytes
+
+
+def test_compact_history_collapses_old_tool_calls():
+    items = [
+        user("turn on the kitchen light"),
+        {"type": "function_call", "call_id": "1", "name": "turn_on", "arguments": '{"name": "Kitchen Light"}'},
+        tool_output("1"),
+        assistant("I turned on the kitchen light."),
+        user("and the fan"),
+        tool_call("2"),
+        tool_output("2"),
+        assistant("Done"),
+    ]
+
+    compacted = compact_history(items, keep_turns=1)
+
+    assert compacted[:3] == [
+        user("turn on the kitchen light"),
+        {"role": "assistant", "content": "Actions taken: turn_on(name='Kitchen Light') -> Done."},
+        assistant("I turned on the kitchen light."),
+    ]
+    assert compacted[3:] == items[4:]
+
+
+def test_compact_history_token_budget_keeps_latest_turn():
+    items = [user("a" * 400), assistant("ok"), user("b" * 400), assistant("ok")]
+
+    compacted = compact_history(items, keep_turns=2, token_budget=50)
+
+    assert compacted == items[2:]
+
+
+@pytest.mark.anyio
+async def test_background_summary_replaces_old_turns(store: SessionStore):
+    store.max_items = 100
+    store.keep_turns = 1
+    session = await store.get_session("conv")
+    await session.add_items([user("turn on the light"), tool_call("1"), tool_output("1"), assistant("Done")])
+    await session.add_items([user("thanks"), assistant("You're welcome")])
+
+    async def summarize(text: str) -> str:
+        assert "turn_on() -> Done." in text
+        return "The user turned on the light."
+
+    store.summarize_in_background("conv", summarize)
+    await asyncio.gather(*store._summaries.values())
+
+    assert await session.get_items() == [
+        {"role": "assistant", "content": "Summary of the earlier conversation: The user turned on the light."},
+        user("thanks"),
+        assistant("You're welcome"),
+    ]
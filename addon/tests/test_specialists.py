@@ -0,0 +1,28 @@
+from agents import Agent, RunContextWrapper
+
+from app.specialists import build_triage_agent
+from app.tools import get_all_tools
+from tests.fake_model import FakeModel
+
+ENTITIES = {
+    "light.kitchen": {"names": "Kitchen Light", "domain": "light"},
+    "cover.garage": {"names": "Garage Door", "domain": "cover"},
+    "media_player.tv": {"names": "TV", "domain": "media_player"},
+}
+
+
+def test_specialists_only_see_their_tools_and_entities():
+    model = FakeModel()
+    general = Agent(name="Home Agent", model=model, tools=get_all_tools())
+    triage = build_triage_agent(model, get_all_tools(), lambda entities: ",".join(entities), general=general)
+
+    agents = {agent.name: agent for agent in triage.handoffs}
+    assert set(agents) == {"lighting", "climate_covers", "media", "timers", "Home Agent"}
+    assert triage.tools == [] and triage.model_settings.tool_choice == "required"
+
+    lighting = agents["lighting"]
+    assert {tool.name for tool in lighting.tools} == {"turn_on", "turn_off", "set_light", "get_state"}
+    ctx = RunContextWrapper(context={"entities": ENTITIES})
+    assert lighting.instructions(ctx, lighting) == "light.kitchen"
+    assert agents["climate_covers"].instructions(ctx, agents["climate_covers"]) == "cover.garage"
+    assert agents["timers"].instructions(ctx, agents["timers"]) == ""
@@ -0,0 +1,71 @@
+import asyncio
+from typing import Any
+
+import pytest
+from agents import RunContextWrapper, function_tool
+from agents.tool_context import ToolContext
+from openai.types.responses import (
+    ResponseFunctionCallArgumentsDeltaEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputItemAddedEvent,
+)
+
+from app.tools.speculation import SpeculativeTools
+
+calls: list[str] = []
+
+
+@function_tool
+async def get_state(ctx_wrapper: RunContextWrapper[Any], name: str) -> str:
+    """Get the state of an entity."""
+    calls.append(name)
+    await asyncio.sleep(0.05)
+    return f"{name} is on"
+
+
+@function_tool
+async def turn_on(ctx_wrapper: RunContextWrapper[Any], name: str) -> str:
+    """Turn on an entity."""
+    calls.append(f"turn_on {name}")
+    return "done"
+
+
+def stream_call(name: str, call_id: str, chunks: list[str]) -> list[Any]:
+    events: list[Any] = [
+        ResponseOutputItemAddedEvent(
+            item=ResponseFunctionToolCall(id="x", call_id=call_id, arguments="", name=name, type="function_call"),
+            output_index=0,
+            type="response.output_item.added",
+            sequence_number=0,
+        )
+    ]
+    for chunk in chunks:
+        events.append(ResponseFunctionCallArgumentsDeltaEvent(
+            delta=chunk, item_id="x", output_index=0, type="response.function_call_arguments.delta", sequence_number=0,
+        ))
+    return events
+
+
+@pytest.mark.anyio
+async def test_read_only_tools_start_before_the_response_is_final():
+    calls.clear()
+    speculation = SpeculativeTools(context={})
+    wrapped = {tool.name: tool for tool in speculation.wrap([get_state, turn_on])}
+
+    for event in stream_call("get_state", "1", ['{"name": "kit', 'chen"}']):
+        speculation.observe(event)
+    for event in stream_call("turn_on", "2", ['{"name": "kitchen"}']):
+        speculation.observe(event)
+    # Only the read-only call started
+    await asyncio.sleep(0.06)
+    assert calls == ["kitchen"]
+
+    ctx = ToolContext(context={}, tool_name="get_state", tool_call_id="1")
+    assert await wrapped["get_state"].on_invoke_tool(ctx, '{"name": "kitchen"}') == "kitchen is on"
+    assert calls == ["kitchen"]
+    assert speculation.stats.hits == 1 and speculation.stats.saved > 0.04
+
+    # Calls that weren't started early run as usual
+    ctx = ToolContext(context={}, tool_name="get_state", tool_call_id="3")
+    assert await wrapped["get_state"].on_invoke_tool(ctx, '{"name": "hall"}') == "hall is on"
+    await speculation.aclose()
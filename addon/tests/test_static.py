@@ -0,0 +1,38 @@
+import gzip
+
+import httpx
+import pytest
+
+from app.static import PrecompressedStaticFiles, accepted_encodings
+
+SCRIPT = b"console.log('kitchen light');" * 100
+
+
+def test_refused_encodings_are_left_out():
+    assert accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert accepted_encodings("br;q=0.5, gzip") == {"br", "gzip"}
+    assert accepted_encodings("") == set()
+
+
+@pytest.mark.anyio
+async def test_precompressed_variants_are_negotiated(tmp_path):
+    (tmp_path / "index-AbC12_-z.js").write_bytes(SCRIPT)
+    (tmp_path / "index-AbC12_-z.js.gz").write_bytes(gzip.compress(SCRIPT))
+    (tmp_path / "favicon.ico").write_bytes(b"icon")
+
+    app = PrecompressedStaticFiles(directory=tmp_path)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://addon") as client:
+        response = await client.get("/index-AbC12_-z.js", headers={"Accept-Encoding": "br, gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/javascript")
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+        assert response.content == SCRIPT
+
+        response = await client.get("/index-AbC12_-z.js", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "accept-encoding"
+
+        response = await client.get("/favicon.ico")
+        assert response.headers["cache-control"] == "no-cache"
+        response = await client.get("/favicon.ico", headers={"If-None-Match": response.headers["etag"]})
+        assert response.status_code == 304
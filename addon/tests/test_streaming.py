@@ -0,0 +1,69 @@
+import asyncio
+from contextlib import aclosing
+
+import pytest
+
+from app.api.agent.streaming import Segment, coalesce, sse_event
+from app.models import ToolProgress
+
+
+async def tokens(*chunks: str | float | ToolProgress):
+    """Yields the chunks, sleeping on numbers."""
+    for chunk in chunks:
+        if isinstance(chunk, float):
+            await asyncio.sleep(chunk)
+        else:
+            yield chunk
+
+
+def test_sse_event_is_a_single_data_line():
+    assert sse_event("delta", {"text": "one\ntwo"}) == 'event: delta\ndata: {"text": "one\\ntwo"}\n\n'
+
+
+@pytest.mark.anyio
+async def test_flushes_on_sentences_and_size():
+    chunks = tokens("The", " kitchen", " light", " is", " on.", " The", " fan", " is", " off", ".")
+    assert [c async for c in coalesce(chunks, max_delay=None)] == [
+        Segment("The kitchen light is on. ", complete=True),
+        Segment("The fan is off.", complete=True),
+    ]
+
+    chunks = tokens("abc", "def", "ghi")
+    assert [c async for c in coalesce(chunks, max_bytes=4, max_delay=None, sentences=False)] == [
+        Segment("abcdef", complete=False),
+        Segment("ghi", complete=True),
+    ]
+
+
+@pytest.mark.anyio
+async def test_flushes_after_max_delay():
+    chunks = tokens("Let me", " check", 0.2, " that.")
+    assert [c.text async for c in coalesce(chunks, max_delay=0.05)] == ["Let me check", " that."]
+
+
+@pytest.mark.anyio
+async def test_tool_progress_flushes_the_text_before_it():
+    tool = ToolProgress(name="get_state", call_id="call_1")
+    chunks = tokens("Let me check.", tool, "It's on.")
+    assert [c async for c in coalesce(chunks, max_delay=None)] == [
+        Segment("Let me check.", complete=True),
+        tool,
+        Segment("It's on.", complete=True),
+    ]
+
+
+@pytest.mark.anyio
+async def test_closing_closes_the_source():
+    closed = asyncio.Event()
+
+    async def source():
+        try:
+            yield "Hello"
+            await asyncio.sleep(10)
+            yield " world"
+        finally:
+            closed.set()
+
+    async with aclosing(coalesce(source(), max_delay=0.01)) as chunks:
+        assert (await anext(chunks)).text == "Hello"
+    assert closed.is_set()
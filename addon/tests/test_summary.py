@@ -0,0 +1,31 @@
+import pytest
+
+from app.llm import AdmissionController, Priority
+from app.settings import get_settings
+from tests.test_escalation import Home, converse, settings, sse  # noqa: F401
+
+
+class RecordingAdmission(AdmissionController):
+    def __init__(self):
+        super().__init__(max_concurrency=1)
+        self.priorities: list[Priority] = []
+
+    def acquire(self, key, priority=Priority.INTERACTIVE, deadline=None):
+        self.priorities.append(priority)
+        return super().acquire(key, priority, deadline)
+
+
+@pytest.mark.anyio
+async def test_history_is_summarized_through_the_pool_in_the_background(settings, monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME_AGENT_HISTORY_SUMMARIZE", "true")
+    get_settings.cache_clear()
+    home = Home(large_turns=[
+        sse({"role": "assistant", "content": "Done."}, "stop"),
+        sse({"role": "assistant", "content": "The user greeted the assistant."}, "stop"),
+    ])
+    admission = RecordingAdmission()
+
+    await converse(home, tmp_path, "hello", tiers=("large",), keep_turns=0, admission=admission)
+
+    assert home.model_calls["large"] == 2
+    assert admission.priorities == [Priority.INTERACTIVE, Priority.BACKGROUND]
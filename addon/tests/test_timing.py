@@ -0,0 +1,34 @@
+from openai.types.responses import ResponseUsage
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+
+from app.llm.timing import percentile, token_timing
+
+
+def test_percentile():
+    values = [0.01 * i for i in range(1, 101)]
+    assert percentile(values, 50) == values[49]
+    assert percentile(values, 99) == values[98]
+    assert percentile([0.3], 90) == 0.3
+
+
+def test_token_timing():
+    usage = ResponseUsage(
+        input_tokens=900,
+        input_tokens_details=InputTokensDetails(cached_tokens=850),
+        output_tokens=5,
+        output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+        total_tokens=905,
+    )
+    timing = token_timing(10.0, [10.5, 10.52, 10.54, 10.56, 10.66], usage, queued=0.25)
+
+    assert timing["queue_time"] == 0.25
+    assert timing["time_to_first_token"] == 0.5
+    assert timing["inter_token_latency"] == {"p50": 0.02, "p90": 0.1, "p99": 0.1}
+    assert timing["tokens_per_second"] == 25.0
+    assert (timing["prompt_tokens"], timing["completion_tokens"], timing["cached_tokens"]) == (900, 5, 850)
+
+
+def test_nothing_streamed():
+    timing = token_timing(10.0, [], None)
+    assert timing["time_to_first_token"] is None
+    assert timing["prompt_tokens"] is None
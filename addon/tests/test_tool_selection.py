@@ -0,0 +1,72 @@
+from typing import Any
+
+import pytest
+from agents import Model
+
+from app.llm import ToolSelectionModel
+from app.tools import get_all_tools
+from app.tools.resolver import EntityResolver
+from app.tools.selection import CORE_TOOLS, ToolSelector
+
+ENTITIES = {
+    "light.kitchen": {"names": "Kitchen Light", "domain": "light", "areas": "Kitchen"},
+    "media_player.living_room": {"names": "Living Room Speaker", "domain": "media_player", "areas": "Living Room"},
+}
+
+
+class ToolsRecorder(Model):
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    async def get_response(self, *args: Any, **kwargs: Any) -> Any:
+        self.calls.append([tool.name for tool in kwargs["tools"]])
+
+    def stream_response(self, *args: Any, **kwargs: Any) -> Any:
+        self.calls.append([tool.name for tool in args[3]])
+
+
+def test_selection_follows_words_and_entity_domains():
+    tools = get_all_tools()
+    selector = ToolSelector()
+    resolver = EntityResolver(ENTITIES)
+
+    selection = selector.select(tools, "Dim the kitchen light", resolver=resolver)
+    assert selection.selected == CORE_TOOLS | {"set_light"}
+
+    selection = selector.select(tools, "Turn down the living room speaker", resolver=resolver)
+    assert "set_volume" in selection.selected and "set_light" not in selection.selected
+
+    selection = selector.select(tools, "How much time is left on my timers?", resolver=resolver)
+    assert "get_timer_status" in selection.selected and "start_timer" in selection.selected
+
+    selection = selector.select(tools, "Wake me up in 30 seconds", resolver=resolver)
+    assert "start_timer" in selection.selected
+
+
+def test_timer_words_need_a_timer_context():
+    tools = get_all_tools()
+    selector = ToolSelector()
+
+    for text in ("Turn on the left lamp", "Turn off the lights on the second floor"):
+        assert selector.select(tools, text).selected == CORE_TOOLS
+
+
+@pytest.mark.anyio
+async def test_selection_expands_when_the_model_calls_a_missing_tool():
+    tools = get_all_tools()
+    selection = ToolSelector().select(tools, "Turn on the kitchen light")
+    recorder = ToolsRecorder()
+    model = ToolSelectionModel(recorder, selection)
+
+    await model.get_response(system_instructions=None, input="Turn on the kitchen light", tools=tools)
+    model.stream_response(
+        None,
+        [{"type": "function_call", "name": "set_light", "arguments": "{}", "call_id": "1"}],
+        None,
+        tools,
+    )
+
+    first, second = recorder.calls
+    assert set(first) == CORE_TOOLS
+    assert set(second) == CORE_TOOLS | {"set_light"}
+    assert selection.expanded == ["set_light"]
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import Span, Trace
+from app.db.base import Base
+from app.models import ConversationTracesResponse
+from app.services import TraceService
+
+START = datetime(2025, 1, 1, 12, 0, 0, 123456)
+
+
+@pytest.fixture
+async def sessionmaker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'traces.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(bind=engine, expire_on_commit=False)
+    async with sessionmaker() as db:
+        for t in range(3):
+            db.add(Trace(id=f"trace_{t}", workflow_name="Agent workflow", group_id="conv"))
+            for s in range(3):
+                at = START + timedelta(seconds=10 * (2 - t) + s)
+                db.add(Span(
+                    id=f"span_{t}_{s}",
+                    trace_id=f"trace_{t}",
+                    parent_id=f"span_{t}_0" if s else None,
+                    started_at=at,
+                    ended_at=at + timedelta(milliseconds=500),
+                    span_type="generation" if s else "agent",
+                    span_data={"input": [{"role": "user", "content": "Turn on the \"kitchen\" light ✓"}]},
+                    error={"message": "Failed"} if s == 2 else None,
+                ))
+        db.add(Trace(id="other", group_id="other"))
+        await db.commit()
+    yield sessionmaker
+    await engine.dispose()
+
+
+@pytest.mark.anyio
+async def test_streamed_json_matches_the_models(sessionmaker):
+    streamed = b"".join([chunk async for chunk in TraceService.stream_traces_json(sessionmaker, "conv")])
+
+    async with sessionmaker() as db:
+        traces = await TraceService.get_traces_with_spans_by_group_id(db, "conv")
+    expected = ConversationTracesResponse(group_id="conv", traces=traces).model_dump(mode="json")
+
+    assert json.loads(streamed) == expected
+    assert [trace["trace_id"] for trace in expected["traces"]] == ["trace_2", "trace_1", "trace_0"]
+
+
+@pytest.mark.anyio
+async def test_empty_group(sessionmaker):
+    streamed = b"".join([chunk async for chunk in TraceService.stream_traces_json(sessionmaker, "unknown")])
+    assert json.loads(streamed) == {"group_id": "unknown", "traces": []}
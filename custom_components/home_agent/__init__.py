@@ -12,8 +12,9 @@ from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, ADDON_URL
+from .const import DOMAIN, ADDON_URL, CONNECT_TIMEOUT, DATA_ENTITY_INDEX
 from .api import async_register_api_endpoints
+from .entity_index import EntityIndex
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -27,7 +28,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Create client
     client = httpx.AsyncClient(
         base_url=ADDON_URL,
-        timeout=httpx.Timeout(None),  # TODO: Modify once streaming is implemented
+        # Requests are bounded by the per-request deadline, see HomeAgentConversationEntity
+        timeout=httpx.Timeout(None, connect=CONNECT_TIMEOUT),
     )
 
     # Store the client on the config entry
@@ -48,6 +50,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Reload entry on options update
     entry.async_on_unload(entry.add_update_listener(async_update_options))
 
+    # Index exposed entities for fast name lookups
+    entity_index = EntityIndex(hass)
+    entity_index.async_start()
+    entry.async_on_unload(entity_index.async_stop)
+    hass.data[DATA_ENTITY_INDEX] = entity_index
+
     # Register API endpoint
     async_register_api_endpoints(hass)
 
@@ -65,4 +73,5 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # Close the client when unloading
         client = entry.runtime_data
         await client.aclose()
+        hass.data.pop(DATA_ENTITY_INDEX, None)
     return unload_ok
@@ -3,16 +3,23 @@
 from http import HTTPStatus
 
 from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import async_should_expose
+from homeassistant.helpers import area_registry as ar
+from homeassistant.helpers import floor_registry as fr
 from homeassistant.helpers import intent
 from homeassistant.helpers import llm
 from homeassistant.helpers.http import HomeAssistantView, KEY_HASS
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
+
+from .const import DATA_ENTITY_INDEX
+from .entity_index import EntityIndex
 
 
 def async_register_api_endpoints(hass: HomeAssistant):
     """Register API endpoints."""
     hass.http.register_view(HomeAgentExposedEntitiesApiView())
     hass.http.register_view(HomeAgentEntityStateApiView())
+    hass.http.register_view(HomeAgentEntityStatesBatchApiView())
 
 
 class HomeAgentExposedEntitiesApiView(HomeAssistantView):
@@ -30,9 +37,58 @@ class HomeAgentExposedEntitiesApiView(HomeAssistantView):
             conversation.DOMAIN,
             include_state=False,
         )
+        exposed_entities["floors"] = _get_area_floors(hass)
         return self.json(exposed_entities)
 
 
+def _get_area_floors(hass: HomeAssistant) -> dict[str, str]:
+    """Map area names to the name of their floor, for areas on a floor."""
+    floor_reg = fr.async_get(hass)
+    area_floors = {}
+    for area in ar.async_get(hass).async_list_areas():
+        if area.floor_id and (floor := floor_reg.async_get_floor(area.floor_id)):
+            area_floors[area.name] = floor.name
+    return area_floors
+
+
+def _find_entities(
+    hass: HomeAssistant, name: str, domain: str | None = None
+) -> list[State]:
+    """Find the states matching a name and optional domain.
+
+    Uses the precomputed entity index when available and falls back to Home
+    Assistant's fuzzy intent matching for names the index doesn't know about.
+    """
+    index: EntityIndex | None = hass.data.get(DATA_ENTITY_INDEX)
+    if index is not None:
+        entity_ids = index.async_resolve(name, domain)
+        states = [
+            state for entity_id in entity_ids if (state := hass.states.get(entity_id))
+        ]
+        if states:
+            return states
+
+    match_constraints = intent.MatchTargetsConstraints(
+        name=name,
+        domains={domain} if domain else None,
+        assistant=conversation.DOMAIN,
+    )
+    match_preferences = intent.MatchTargetsPreferences()
+    match_result = intent.async_match_targets(
+        hass, match_constraints, match_preferences
+    )
+    return match_result.states
+
+
+def _format_state(state: State) -> dict:
+    """Format a state for the API response."""
+    return {
+        "entity_id": state.entity_id,
+        "state": state.state,
+        "attributes": state.attributes,
+    }
+
+
 class HomeAgentEntityStateApiView(HomeAssistantView):
     """View to find a single entity and provide its current state."""
 
@@ -51,25 +107,13 @@ class HomeAgentEntityStateApiView(HomeAssistantView):
                 "Query parameter 'name' is required.", HTTPStatus.BAD_REQUEST
             )
 
-        domains: set[str] | None = None
-        if domain:
-            domains = {domain}
+        states = _find_entities(hass, entity_name, domain)
 
-        match_constraints = intent.MatchTargetsConstraints(
-            name=entity_name,
-            domains=domains,
-            assistant=conversation.DOMAIN,
-        )
-        match_preferences = intent.MatchTargetsPreferences()
-        match_result = intent.async_match_targets(
-            hass, match_constraints, match_preferences
-        )
-
-        if not match_result.states:
+        if not states:
             return self.json_message("Entity not found", HTTPStatus.NOT_FOUND)
 
-        if len(match_result.states) > 1:
-            entity_ids = [s.entity_id for s in match_result.states]
+        if len(states) > 1:
+            entity_ids = [s.entity_id for s in states]
             return self.json(
                 {
                     "error": "Multiple entities found. Please be more specific.",
@@ -78,11 +122,61 @@ class HomeAgentEntityStateApiView(HomeAssistantView):
                 status_code=HTTPStatus.CONFLICT,
             )
 
-        state = match_result.states[0]
-        return self.json(
-            {
-                "entity_id": state.entity_id,
-                "state": state.state,
-                "attributes": state.attributes,
-            }
-        )
+        return self.json(_format_state(states[0]))
+
+
+class HomeAgentEntityStatesBatchApiView(HomeAssistantView):
+    """View to find several entities and provide their current states in one call."""
+
+    url = "/api/home_agent/entities/states"
+    name = "api:home_agent:entities:states"
+    requires_auth = True
+
+    async def post(self, request):
+        """Handle POST requests to fetch the states of several entities.
+
+        Expects a body of the form `{"entities": [{"name": ..., "domain": ...}]}`
+        and returns one result per requested entity, in order. Entities already
+        resolved by the add-on can be requested with `{"entity_id": ...}` instead.
+        """
+        hass = request.app[KEY_HASS]
+        try:
+            data = await request.json()
+        except ValueError:
+            return self.json_message("Invalid JSON.", HTTPStatus.BAD_REQUEST)
+
+        queries = data.get("entities") if isinstance(data, dict) else None
+        if not isinstance(queries, list) or not all(
+            isinstance(query, dict) and (query.get("name") or query.get("entity_id"))
+            for query in queries
+        ):
+            return self.json_message(
+                "Body must contain a list of 'entities' with a 'name' or 'entity_id' each.",
+                HTTPStatus.BAD_REQUEST,
+            )
+
+        results = []
+        for query in queries:
+            if entity_id := query.get("entity_id"):
+                if (state := hass.states.get(entity_id)) is None or not async_should_expose(
+                    hass, conversation.DOMAIN, entity_id
+                ):
+                    results.append({"entity_id": entity_id, "error": "Entity not found"})
+                else:
+                    results.append(_format_state(state))
+                continue
+
+            name = query["name"]
+            domain = query.get("domain")
+            result: dict = {"name": name, "domain": domain}
+            states = _find_entities(hass, name, domain)
+            if not states:
+                result["error"] = "Entity not found"
+            elif len(states) > 1:
+                result["error"] = "Multiple entities found. Please be more specific."
+                result["entities"] = [s.entity_id for s in states]
+            else:
+                result.update(_format_state(states[0]))
+            results.append(result)
+
+        return self.json({"results": results})
@@ -16,6 +16,9 @@ from homeassistant.helpers import llm
 from homeassistant.helpers.selector import (
     BooleanSelector,
     BooleanSelectorConfig,
+    NumberSelector,
+    NumberSelectorConfig,
+    NumberSelectorMode,
     SelectOptionDict,
     SelectSelector,
     SelectSelectorConfig,
@@ -24,7 +27,9 @@ from homeassistant.helpers.selector import (
 from .const import (
     DOMAIN,
     CONF_STREAMING,
+    CONF_TIMEOUT,
     DEFAULT_STREAMING,
+    DEFAULT_TIMEOUT,
 )
 
 
@@ -87,6 +92,18 @@ class HomeAgentOptionsFlow(OptionsFlow):
                 CONF_STREAMING,
                 default=self._options.get(CONF_STREAMING, DEFAULT_STREAMING),
             ): BooleanSelector(BooleanSelectorConfig()),
+            vol.Optional(
+                CONF_TIMEOUT,
+                default=self._options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT),
+            ): NumberSelector(
+                NumberSelectorConfig(
+                    min=5,
+                    max=300,
+                    step=1,
+                    unit_of_measurement="s",
+                    mode=NumberSelectorMode.BOX,
+                )
+            ),
         }
 
         return self.async_show_form(
@@ -13,3 +13,13 @@ MAX_HISTORY_SECONDS = 600  # How long to keep conversation history (10 minutes)
 
 CONF_STREAMING = "streaming"
 DEFAULT_STREAMING = True
+
+CONF_TIMEOUT = "timeout"
+DEFAULT_TIMEOUT = 30  # Seconds the add-on has to answer a request
+TIMEOUT_GRACE = 5  # Extra seconds given to the add-on to deliver its fallback answer
+CONNECT_TIMEOUT = 10
+
+# Remaining time budget of a request in milliseconds, honoured by the add-on
+DEADLINE_HEADER = "X-Home-Agent-Deadline-Ms"
+
+DATA_ENTITY_INDEX = f"{DOMAIN}_entity_index"
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
-from collections.abc import Callable
+import asyncio
+from collections.abc import AsyncIterator, Callable
+import dataclasses
+import json
 import logging
 import time
 from typing import Any, Literal
@@ -32,11 +35,22 @@ from .const import (
     DOMAIN,
     MAX_HISTORY_SECONDS,
     CONF_STREAMING,
+    CONF_TIMEOUT,
+    DEADLINE_HEADER,
     DEFAULT_STREAMING,
+    DEFAULT_TIMEOUT,
+    TIMEOUT_GRACE,
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# Tool calls made outside of Home Assistant (by the add-on here) can be added to the
+# chat log on recent versions. They make the voice pipeline start streaming TTS right
+# away instead of waiting for more text.
+_EXTERNAL_TOOL_CALLS = "external" in {
+    field.name for field in dataclasses.fields(llm.ToolInput)
+}
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -106,8 +120,14 @@ class HomeAgentConversationEntity(
             "text": user_input.text,
             "conversation_id": user_input.conversation_id or ulid.ulid_now(),
             "language": user_input.language,
+            "priority": _get_priority(user_input),
         }
 
+        # Lets the add-on favor the entities near the requesting satellite
+        context = _get_context(self.hass, user_input.as_llm_context(DOMAIN))
+        if location := context.get("location"):
+            payload["location"] = location
+
         try:
             await chat_log.async_provide_llm_data(
                 user_input.as_llm_context(DOMAIN),
@@ -120,55 +140,18 @@ class HomeAgentConversationEntity(
 
         streaming = self.entry.options.get(CONF_STREAMING, DEFAULT_STREAMING)
 
-        try:
-            if streaming:
-                async with client.stream(
-                    "POST",
-                    "/api/agent/conversation",
-                    params={"stream": True},
-                    json=payload,
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = (
-                            (await response.aread()).decode()
-                            if response.content is None
-                            else response.text
-                        )
-                        raise HomeAssistantError(
-                            f"Error from add-on: {response.status_code} {error_text}"
-                        )
-
-                    async def _delta_stream():
-                        """Yield assistant deltas from HTTP stream (text only)."""
-                        new_message = True
-                        async for chunk in response.aiter_text():
-                            if new_message:
-                                new_message = False
-                                yield {"role": "assistant"}
-                            if chunk:
-                                yield {"content": chunk}
-
-                    async for _ in chat_log.async_add_delta_content_stream(
-                        self.entity_id, _delta_stream()
-                    ):
-                        pass
-            else:
-                resp = await client.post(
-                    "/api/agent/conversation",
-                    params={"stream": False},
-                    json=payload,
-                )
-                if resp.status_code != 200:
-                    raise HomeAssistantError(
-                        f"Error from add-on: {resp.status_code} {resp.text}"
-                    )
-                data = resp.json()
-                chat_log.async_add_assistant_content_without_tools(
-                    conversation.AssistantContent(
-                        agent_id=self.entity_id, content=data.get("response", "")
-                    )
-                )
+        # The add-on answers with a fallback once the deadline expires, the grace period
+        # only guards against an unresponsive add-on
+        timeout = self.entry.options.get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+        deadline = time.monotonic() + timeout
 
+        def _headers() -> dict[str, str]:
+            remaining = max(deadline - time.monotonic(), 0)
+            return {DEADLINE_HEADER: str(int(remaining * 1000))}
+
+        try:
+            async with asyncio.timeout(timeout + TIMEOUT_GRACE):
+                await self._async_request(client, payload, chat_log, streaming, _headers())
         except (httpx.HTTPError, TimeoutError) as err:
             _LOGGER.error("Failed to communicate with Home Agent: %s", err)
             raise HomeAssistantError(
@@ -177,6 +160,94 @@ class HomeAgentConversationEntity(
 
         return conversation.async_get_result_from_chat_log(user_input, chat_log)
 
+    async def _async_request(
+        self,
+        client: httpx.AsyncClient,
+        payload: dict[str, Any],
+        chat_log: conversation.ChatLog,
+        streaming: bool,
+        headers: dict[str, str],
+    ) -> None:
+        """Send the conversation to the add-on and add its answer to the chat log."""
+        if streaming:
+            async with client.stream(
+                "POST",
+                "/api/agent/conversation",
+                params={"stream": True},
+                json=payload,
+                headers=headers,
+            ) as response:
+                if response.status_code != 200:
+                    error_text = (
+                        (await response.aread()).decode()
+                        if response.content is None
+                        else response.text
+                    )
+                    raise HomeAssistantError(
+                        f"Error from add-on: {response.status_code} {error_text}"
+                    )
+
+                async def _delta_stream():
+                    """Yield assistant deltas from the add-on's events.
+
+                    Sentences are forwarded as soon as they are complete so that
+                    streaming TTS can start on the first one while the agent is still
+                    running, and tool calls in progress are flagged.
+                    """
+                    new_message = True
+                    async for event, data in _iter_sse(response):
+                        if event == "done":
+                            if data.get("time_to_first_sentence") is not None:
+                                _LOGGER.debug(
+                                    "First sentence streamed after %.3fs",
+                                    data["time_to_first_sentence"],
+                                )
+                            break
+                        if event == "tool" and _EXTERNAL_TOOL_CALLS:
+                            if new_message:
+                                yield {"role": "assistant"}
+                            yield {
+                                "tool_calls": [
+                                    llm.ToolInput(
+                                        id=data["call_id"],
+                                        tool_name=data["name"],
+                                        tool_args={},
+                                        external=True,
+                                    )
+                                ]
+                            }
+                            # The answer continues in a new message
+                            new_message = True
+                            continue
+                        if event not in ("sentence", "delta") or not data.get("text"):
+                            continue
+                        if new_message:
+                            new_message = False
+                            yield {"role": "assistant"}
+                        yield {"content": data["text"]}
+
+                async for _ in chat_log.async_add_delta_content_stream(
+                    self.entity_id, _delta_stream()
+                ):
+                    pass
+        else:
+            resp = await client.post(
+                "/api/agent/conversation",
+                params={"stream": False},
+                json=payload,
+                headers=headers,
+            )
+            if resp.status_code != 200:
+                raise HomeAssistantError(
+                    f"Error from add-on: {resp.status_code} {resp.text}"
+                )
+            data = resp.json()
+            chat_log.async_add_assistant_content_without_tools(
+                conversation.AssistantContent(
+                    agent_id=self.entity_id, content=data.get("response", "")
+                )
+            )
+
     async def _async_entry_update_listener(
         self, hass: HomeAssistant, entry: ConfigEntry
     ) -> None:
@@ -184,6 +255,34 @@ class HomeAgentConversationEntity(
         await hass.config_entries.async_reload(entry.entry_id)
 
 
+async def _iter_sse(
+    response: httpx.Response,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Parse the Server-Sent Events of a response into (event, data) pairs."""
+    event = "message"
+    data: list[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+def _get_priority(user_input: conversation.ConversationInput) -> str:
+    """Get the priority of a request for the add-on's model queue.
+
+    Requests coming from a device (voice satellites) or a user are interactive,
+    anything else (e.g. automations calling `conversation.process`) is background.
+    """
+    if user_input.device_id or user_input.context.user_id:
+        return "interactive"
+    return "background"
+
+
 @callback
 def _get_context(
     hass: HomeAssistant,
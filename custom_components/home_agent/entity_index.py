@@ -0,0 +1,163 @@
+"""Precomputed name/alias/area index of exposed entities."""
+
+from __future__ import annotations
+
+from collections import defaultdict
+import logging
+import re
+
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_listen_entity_updates,
+    async_should_expose,
+)
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity_registry as er,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for index lookups."""
+    name = _PUNCTUATION.sub(" ", name.casefold())
+    return _WHITESPACE.sub(" ", name).strip()
+
+
+class EntityIndex:
+    """Index resolving (name, domain) to exposed entity ids.
+
+    The index is rebuilt lazily on the first lookup after a registry, exposure or
+    naming change, so bursts of registry events only cost a single rebuild.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the index."""
+        self.hass = hass
+        self._by_name: dict[str, set[str]] = {}
+        self._entity_areas: dict[str, set[str]] = {}
+        self._dirty = True
+        self._unsubs: list[CALLBACK_TYPE] = []
+
+    @callback
+    def async_start(self) -> None:
+        """Start listening for changes that invalidate the index."""
+        for event_type in (
+            er.EVENT_ENTITY_REGISTRY_UPDATED,
+            dr.EVENT_DEVICE_REGISTRY_UPDATED,
+            ar.EVENT_AREA_REGISTRY_UPDATED,
+        ):
+            self._unsubs.append(
+                self.hass.bus.async_listen(event_type, self._async_invalidate)
+            )
+        self._unsubs.append(
+            self.hass.bus.async_listen(
+                EVENT_STATE_CHANGED,
+                self._async_invalidate,
+                event_filter=self._state_changes_name,
+            )
+        )
+        self._unsubs.append(
+            async_listen_entity_updates(
+                self.hass, conversation.DOMAIN, self._async_invalidate
+            )
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop listening for changes."""
+        while self._unsubs:
+            self._unsubs.pop()()
+
+    @staticmethod
+    @callback
+    def _state_changes_name(event_data) -> bool:
+        """Return True if a state change adds, removes or renames an entity."""
+        old_state = event_data["old_state"]
+        new_state = event_data["new_state"]
+        if old_state is None or new_state is None:
+            return True
+        return old_state.name != new_state.name
+
+    @callback
+    def _async_invalidate(self, event: Event | None = None) -> None:
+        """Mark the index as stale."""
+        self._dirty = True
+
+    @callback
+    def _async_rebuild(self) -> None:
+        """Rebuild the index from the registries."""
+        entity_reg = er.async_get(self.hass)
+        device_reg = dr.async_get(self.hass)
+        area_reg = ar.async_get(self.hass)
+
+        by_name: defaultdict[str, set[str]] = defaultdict(set)
+        entity_areas: dict[str, set[str]] = {}
+
+        for state in self.hass.states.async_all():
+            if not async_should_expose(self.hass, conversation.DOMAIN, state.entity_id):
+                continue
+
+            names = {state.name}
+            area_id = None
+            if entity_entry := entity_reg.async_get(state.entity_id):
+                names.update(entity_entry.aliases)
+                area_id = entity_entry.area_id
+                if area_id is None and entity_entry.device_id:
+                    device = device_reg.async_get(entity_entry.device_id)
+                    area_id = device.area_id if device else None
+
+            area_names: set[str] = set()
+            if area_id and (area := area_reg.async_get_area(area_id)):
+                area_names = {normalize_name(area.name)}
+                area_names.update(normalize_name(alias) for alias in area.aliases)
+            entity_areas[state.entity_id] = area_names
+
+            for name in names:
+                if not (normalized := normalize_name(name)):
+                    continue
+                by_name[normalized].add(state.entity_id)
+                # Names qualified by area, e.g. "kitchen light" for a "Light" in the kitchen
+                for area_name in area_names:
+                    if not normalized.startswith(area_name):
+                        by_name[f"{area_name} {normalized}"].add(state.entity_id)
+
+        self._by_name = dict(by_name)
+        self._entity_areas = entity_areas
+        self._dirty = False
+        _LOGGER.debug(
+            "Rebuilt entity index: %d names for %d entities",
+            len(self._by_name),
+            len(self._entity_areas),
+        )
+
+    @callback
+    def async_resolve(
+        self, name: str, domain: str | None = None, area: str | None = None
+    ) -> list[str]:
+        """Return the entity ids matching a name, optionally constrained."""
+        if self._dirty:
+            self._async_rebuild()
+
+        entity_ids = self._by_name.get(normalize_name(name), set())
+        if domain:
+            entity_ids = {
+                entity_id
+                for entity_id in entity_ids
+                if entity_id.partition(".")[0] == domain
+            }
+        if area:
+            area = normalize_name(area)
+            entity_ids = {
+                entity_id
+                for entity_id in entity_ids
+                if area in self._entity_areas.get(entity_id, ())
+            }
+        return sorted(entity_ids)
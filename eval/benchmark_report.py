@@ -0,0 +1,58 @@
+import argparse
+import json
+from pathlib import Path
+
+import pandas as pd
+
+
+def to_markdown(df: pd.DataFrame) -> str:
+    """Render a table without pulling in tabulate."""
+    columns = [df.index.name or ""] + [str(c) for c in df.columns]
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "---|" * len(columns),
+    ]
+    for index, row in df.iterrows():
+        lines.append("| " + " | ".join([str(index)] + [str(v) for v in row]) + " |")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the addon variants benchmarked on the eval dataset.")
+    parser.add_argument(
+        "--model_output_dir",
+        type=Path,
+        required=True,
+        help="Directory containing benchmark.jsonl.",
+    )
+    args = parser.parse_args()
+
+    benchmark_file = args.model_output_dir / "benchmark.jsonl"
+    with open(benchmark_file, 'r') as f:
+        records = pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+    summary = records.groupby("variant").agg(
+        tasks=("task_id", "count"),
+        prompt_tokens_mean=("prompt_tokens", "mean"),
+        prompt_tokens_p95=("prompt_tokens", lambda s: s.quantile(0.95)),
+        turns_mean=("turns", "mean"),
+        latency_p50=("latency", "median"),
+        latency_p95=("latency", lambda s: s.quantile(0.95)),
+    ).round(2)
+
+    report_md_content = "# Benchmark\n\n"
+    report_md_content += to_markdown(summary) + "\n\n"
+
+    report_md_content += "## Prompt Tokens by Category\n\n"
+    report_md_content += to_markdown(records.pivot_table(
+        index="category", columns="variant", values="prompt_tokens", aggfunc="mean"
+    ).round(1)) + "\n"
+
+    report_file = args.model_output_dir / "benchmark.md"
+    with open(report_file, 'w') as f:
+        f.write(report_md_content)
+    print(report_md_content)
+
+
+if __name__ == "__main__":
+    main()
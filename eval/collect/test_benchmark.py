@@ -0,0 +1,102 @@
+"""Benchmark addon configurations on the eval dataset.
+
+Each task is sent to the addon once per variant and the prompt tokens, model turns
+and end-to-end latency of the run are appended to `benchmark.jsonl` in the model
+output directory. Summarize them with `benchmark_report.py`.
+"""
+import json
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from agents import set_tracing_disabled
+from agents.tracing import get_trace_provider
+from httpx import ASGITransport, AsyncClient
+from fastapi import FastAPI
+from homeassistant.core import HomeAssistant
+
+from home_assistant_datasets.agent import ConversationAgent
+from home_assistant_datasets.datasets.assist_eval_task import EvalTask
+
+# Settings overriding the defaults, as environment variables
+VARIANTS = {
+    "default": {},
+    "triage": {"HOME_AGENT_AGENT_TOPOLOGY": "triage"},
+    "no_inline_states": {"HOME_AGENT_INLINE_STATES": "0"},
+}
+
+
+@pytest.fixture(autouse=True)
+def enable_tracing(disable_tracing):
+    """Usage and turns are read back from the addon's traces."""
+    set_tracing_disabled(False)
+
+
+@pytest.fixture
+def benchmark_file(request: pytest.FixtureRequest) -> Path:
+    output_dir = Path(request.config.getoption("model_output_dir"))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return output_dir / "benchmark.jsonl"
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+@pytest.mark.parametrize("expected_lingering_timers", [True])
+@pytest.mark.parametrize("expected_lingering_tasks", [True])
+async def test_benchmark(
+    hass: HomeAssistant,
+    agent: ConversationAgent,  # Sets up the integration and its API
+    eval_task: EvalTask,
+    addon_app: FastAPI,
+    variant: str,
+    monkeypatch: pytest.MonkeyPatch,
+    benchmark_file: Path,
+) -> None:
+    """Run a task with the given variant and record what it cost."""
+    from app.settings import get_settings
+
+    for name, value in VARIANTS[variant].items():
+        monkeypatch.setenv(name, value)
+    get_settings.cache_clear()
+
+    conversation_id = str(uuid.uuid4())
+    async with AsyncClient(
+        transport=ASGITransport(app=addon_app), base_url="http://test"
+    ) as async_client:
+        started = time.perf_counter()
+        response = await async_client.post(
+            "/api/agent/conversation",
+            json={
+                "text": eval_task.input_text,
+                "conversation_id": conversation_id,
+                "language": "en",
+            },
+            timeout=None,
+        )
+        latency = time.perf_counter() - started
+        response.raise_for_status()
+
+        # Export the pending spans, every conversation installs a new processor anyway
+        get_trace_provider().shutdown()
+        traces = await async_client.get(f"/api/frontend/conversations/{conversation_id}/traces")
+        traces.raise_for_status()
+
+    generations = [
+        span["span_data"]
+        for trace in traces.json()["traces"]
+        for span in trace["spans"]
+        if span["span_type"] == "generation"
+    ]
+    usages = [generation.get("usage") or {} for generation in generations]
+    record = {
+        "variant": variant,
+        "task_id": eval_task.task_id,
+        "category": eval_task.category,
+        "turns": len(generations),
+        "prompt_tokens": sum(usage.get("input_tokens", 0) for usage in usages),
+        "completion_tokens": sum(usage.get("output_tokens", 0) for usage in usages),
+        "latency": round(latency, 3),
+        "response": response.json()["response"],
+    }
+    with benchmark_file.open("a") as f:
+        f.write(json.dumps(record) + "\n")